@@ -3,18 +3,17 @@
 
 set -e
 
-# Default command is to run Python doctest
+# Default command is to grade the submission with the harness
 if [ $# -eq 0 ]; then
     # Check if a specific file is provided in environment
     if [ -n "$SUBMISSION_FILE" ]; then
-        echo "Running doctest on $SUBMISSION_FILE"
-        python -m doctest -v "$SUBMISSION_FILE"
+        echo "Grading $SUBMISSION_FILE" >&2
+        python -m autograder.harness "$SUBMISSION_FILE"
     else
-        # Check for Python files in the code directory
-        PYTHON_FILES=$(find /code -name "*.py" | sort)
-        if [ -n "$PYTHON_FILES" ]; then
-            echo "Running doctest on all Python files in /code"
-            python -m doctest -v $PYTHON_FILES
+        # Grade the submission in the code directory
+        if [ -n "$(find /code -name "*.py" | head -n 1)" ]; then
+            echo "Grading submission in /code" >&2
+            python -m autograder.harness /code
         else
             echo "No Python files found in /code"
             exit 1
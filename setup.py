@@ -29,7 +29,7 @@ setup(
     author_email="example@example.com",
     description="A Python autograding system integrating GitHub Classroom and Canvas LMS",
     keywords="education, grading, docker, canvas, github",
-    python_requires=">=3.8",
+    python_requires=">=3.9",
     entry_points={
         "console_scripts": [
             "tool-grader=cli.commands:main",
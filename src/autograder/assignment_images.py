@@ -0,0 +1,172 @@
+"""
+Per-Assignment Grading Images for Tool Grader
+
+This module builds grading images for assignments that declare third-party
+dependencies (the "dependencies" list in the assignment configuration).
+Each image is derived from the base grading image with the dependencies
+installed in one extra layer, and tagged with a hash of the base image and
+the dependency list, so it is built once and reused until either changes.
+Grading runs never install packages.
+"""
+
+import io
+import json
+import shlex
+import hashlib
+import logging
+import threading
+
+from .container_events import GRADER_LABEL
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Label recording which dependencies an image was built with
+DEPENDENCIES_LABEL = "tool-grader.dependencies"
+
+
+def assignment_dependencies(assignment_config):
+    """
+    Get the dependencies an assignment declares.
+    
+    Args:
+        assignment_config: Assignment-specific configuration, or None
+        
+    Returns:
+        Sorted list of pip requirement strings (empty if there are none)
+    
+    Raises:
+        ValueError: If a dependency isn't a plain requirement string
+    """
+    dependencies = (assignment_config or {}).get("dependencies") or []
+    if isinstance(dependencies, str):
+        dependencies = dependencies.split()
+    
+    for dependency in dependencies:
+        # Options such as --index-url would change where packages come from
+        if not isinstance(dependency, str) or not dependency.strip() or dependency.startswith("-"):
+            raise ValueError(f"Invalid dependency: {dependency!r}")
+    
+    return sorted(set(dependency.strip() for dependency in dependencies))
+
+
+def assignment_image_tag(base_image, base_image_id, dependencies):
+    """
+    Get the tag of the derived image for a set of dependencies.
+    
+    Args:
+        base_image: Name of the base grading image, e.g. "python-autograder:latest"
+        base_image_id: ID the base image name currently refers to
+        dependencies: Sorted list of requirement strings
+        
+    Returns:
+        Tag such as "python-autograder:deps-0123456789abcdef"
+    """
+    key = json.dumps({"base": base_image_id, "dependencies": dependencies})
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    # Strip the tag, but not a registry port (registry:5000/name)
+    repository = base_image
+    if ":" in base_image.rsplit("/", 1)[-1]:
+        repository = base_image.rsplit(":", 1)[0]
+    return f"{repository}:deps-{digest[:16]}"
+
+
+def dependency_dockerfile(base_image_id, dependencies):
+    """
+    Build the Dockerfile for a derived image.
+    
+    Args:
+        base_image_id: ID of the base grading image
+        dependencies: Sorted list of requirement strings
+        
+    Returns:
+        Dockerfile contents
+    """
+    requirements = " ".join(shlex.quote(dependency) for dependency in dependencies)
+    return (
+        f"FROM {base_image_id}\n"
+        "USER root\n"
+        # pip compiles the installed modules, so imports don't write bytecode
+        f"RUN pip install --no-cache-dir --prefer-binary {requirements}\n"
+        "USER grader\n"
+    )
+
+
+class AssignmentImages:
+    """Builds and finds the grading image for each assignment's dependencies."""
+    
+    def __init__(self, client, images):
+        """
+        Initialize the image builder.
+        
+        Args:
+            client: Docker client
+            images: ImageCache used to resolve image names to IDs
+        """
+        self.client = client
+        self.images = images
+        
+        self._lock = threading.Lock()
+        self._building = {}
+        self._ready = set()
+        
+        self.stats = {
+            "built": 0,
+            "reused": 0
+        }
+    
+    def image_for(self, base_image, assignment_config=None):
+        """
+        Get the ID of the image to grade an assignment with, building it if needed.
+        
+        Args:
+            base_image: Name of the base grading image
+            assignment_config: Assignment-specific configuration, or None
+            
+        Returns:
+            Image ID
+        """
+        base_image_id = self.images.resolve(base_image)
+        dependencies = assignment_dependencies(assignment_config)
+        if not dependencies:
+            return base_image_id
+        
+        tag = assignment_image_tag(base_image, base_image_id, dependencies)
+        if tag in self._ready:
+            return self.images.resolve(tag)
+        
+        # Only one thread builds a given image; the others wait for it
+        with self._lock:
+            lock = self._building.setdefault(tag, threading.Lock())
+        with lock:
+            if tag not in self._ready:
+                if self.client.images.list(name=tag):
+                    self.stats["reused"] += 1
+                else:
+                    self._build(tag, base_image_id, dependencies)
+                self._ready.add(tag)
+        
+        return self.images.resolve(tag)
+    
+    def invalidate(self):
+        """Check again whether derived images exist (e.g. after they were pruned)."""
+        with self._lock:
+            self._ready.clear()
+    
+    def _build(self, tag, base_image_id, dependencies):
+        """Build a derived image with the dependencies installed."""
+        logger.info(f"Building {tag} with {', '.join(dependencies)}")
+        
+        dockerfile = dependency_dockerfile(base_image_id, dependencies)
+        self.client.images.build(
+            fileobj=io.BytesIO(dockerfile.encode('utf-8')),
+            tag=tag,
+            labels={GRADER_LABEL: "1", DEPENDENCIES_LABEL: " ".join(dependencies)},
+            rm=True,
+            forcerm=True
+        )
+        
+        # A rebuilt tag must not resolve to a stale ID
+        self.images.invalidate(tag)
+        self.stats["built"] += 1
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""
+Batch Grading for Tool Grader
+
+This module grades a whole roster of student submissions in parallel.
+A roster is a directory with one subdirectory (or one Python file) per
+student, like mvp-demo/submissions/.
+"""
+
+import os
+import ast
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .resources import resource_usage, summarize_resources
+from .test_runner import grade_submission, resolve_submission_file, format_results_markdown, has_timeouts
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def find_student_submissions(roster_dir):
+    """
+    Find student submissions in a roster directory.
+    
+    Args:
+        roster_dir: Directory with one subdirectory or .py file per student
+        
+    Returns:
+        Dictionary mapping student name to submission path, sorted by name
+    """
+    roster_dir = Path(roster_dir)
+    submissions = {}
+    
+    for entry in sorted(roster_dir.iterdir()):
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir():
+            submissions[entry.name] = entry
+        elif entry.suffix == ".py":
+            submissions[entry.stem] = entry
+            
+    return submissions
+
+
+def _grade_student(student, submission_path, assignment_config, cache=None):
+    """
+    Grade one student inside a worker process.
+    
+    Args:
+        student: Student name
+        submission_path: Path to student submission
+        assignment_config: Assignment-specific configuration
+        cache: Optional ResultCache
+        
+    Returns:
+        Tuple of (student, results, elapsed seconds)
+    """
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        results = grade_submission(submission_path, assignment_config, cache)
+    except Exception as e:
+        results = {
+            "error": f"Grading failed: {str(e)}",
+            "score": 0,
+            "max_score": 100
+        }
+    elapsed = time.perf_counter() - start
+    
+    # Peak memory isn't attributable to one submission in a shared worker
+    results["resources"] = resource_usage(
+        wall_seconds=elapsed,
+        cpu_seconds=time.process_time() - cpu_start,
+        timed_out=has_timeouts(results)
+    )
+    return student, results, elapsed
+
+
+def _result_score(results):
+    """Get the total score from a results dictionary."""
+    if "scores" in results:
+        return results["scores"]["total"]
+    return results.get("score", 0)
+
+
+def submission_fingerprint(student_file):
+    """
+    Hash a submission so that equivalent code gets the same fingerprint.
+    
+    The source is parsed and its AST dumped without line information, so
+    files that differ only in whitespace or comments hash the same.
+    Docstrings are part of the AST, so doctests must match exactly. Files
+    that don't parse are fingerprinted by their raw bytes.
+    
+    Args:
+        student_file: Path to the student's Python file
+            
+    Returns:
+        Hex digest of the normalized submission
+    """
+    student_file = Path(student_file)
+    source = student_file.read_bytes()
+    
+    try:
+        normalized = ast.dump(ast.parse(source), include_attributes=False).encode('utf-8')
+        kind = b"ast"
+    except (SyntaxError, ValueError):
+        normalized = source
+        kind = b"raw"
+    
+    digest = hashlib.sha256()
+    # The module name shows up in doctest names, so it is part of the key
+    digest.update(student_file.name.encode('utf-8'))
+    digest.update(b"\0" + kind + b"\0")
+    digest.update(normalized)
+    return digest.hexdigest()
+
+
+def _retarget_results(results, source_file, target_file):
+    """
+    Copy results graded from one file so they refer to another file.
+    
+    Args:
+        results: Results dictionary graded from source_file
+        source_file: File that was actually graded
+        target_file: Equivalent file the results are for
+        
+    Returns:
+        New results dictionary with file paths replaced
+    """
+    # Replace the path everywhere, including doctest output and error messages
+    old = json.dumps(str(source_file))[1:-1]
+    new = json.dumps(str(target_file))[1:-1]
+    retargeted = json.loads(json.dumps(results).replace(old, new))
+    retargeted["student_file"] = str(target_file)
+    retargeted["equivalent_to"] = str(source_file)
+    # Nothing was run for the duplicate
+    retargeted.pop("resources", None)
+    return retargeted
+
+
+def _run_grading(submissions, assignment_config, jobs, zygote, cache):
+    """
+    Grade submissions with the configured executor.
+    
+    Args:
+        submissions: Dictionary mapping student name to submission path
+        assignment_config: Assignment-specific configuration
+        jobs: Number of concurrent workers
+        zygote: Optional GradingZygote
+        cache: Optional ResultCache
+        
+    Returns:
+        Tuple of (results dict, durations dict) keyed by student
+    """
+    results = {}
+    durations = {}
+    
+    if zygote is not None:
+        for student, student_results, elapsed in zygote.grade_many(
+            submissions.items(), assignment_config, max_children=jobs, cache=cache
+        ):
+            results[student] = student_results
+            durations[student] = elapsed
+    elif jobs == 1:
+        # Grade in-process, no point paying for a pool
+        for student, path in submissions.items():
+            _, results[student], durations[student] = _grade_student(
+                student, path, assignment_config, cache
+            )
+    elif submissions:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(submissions))) as pool:
+            futures = [
+                pool.submit(_grade_student, student, path, assignment_config, cache)
+                for student, path in submissions.items()
+            ]
+            for future in as_completed(futures):
+                student, student_results, elapsed = future.result()
+                results[student] = student_results
+                durations[student] = elapsed
+                
+    return results, durations
+
+
+def grade_batch(roster_dir, assignment_config=None, jobs=None, zygote=None, cache=None,
+                dedupe=True):
+    """
+    Grade every submission in a roster using a process pool.
+    
+    Args:
+        roster_dir: Directory with one subdirectory or .py file per student
+        assignment_config: Optional assignment-specific configuration
+        jobs: Number of worker processes (default: number of CPUs)
+        zygote: Optional GradingZygote to fork a child per submission
+            instead of using a process pool
+        cache: Optional ResultCache shared by all workers
+        dedupe: Grade each group of equivalent submissions only once
+            
+    Returns:
+        Tuple of (results dict keyed by student, summary dict)
+    """
+    submissions = find_student_submissions(roster_dir)
+    jobs = jobs or os.cpu_count() or 1
+    
+    results = {}
+    start = time.perf_counter()
+    
+    # Resolve each student's file and group equivalent submissions
+    to_grade = {}
+    clusters = {}
+    for student, path in submissions.items():
+        student_file, error = resolve_submission_file(path, assignment_config)
+        if error:
+            results[student] = error
+            continue
+        
+        if not dedupe:
+            to_grade[student] = student_file
+            continue
+        
+        try:
+            fingerprint = submission_fingerprint(student_file)
+        except OSError:
+            to_grade[student] = student_file
+            continue
+        
+        if fingerprint not in clusters:
+            clusters[fingerprint] = []
+            to_grade[student] = student_file
+        clusters[fingerprint].append((student, student_file))
+    
+    graded, durations = _run_grading(to_grade, assignment_config, jobs, zygote, cache)
+    results.update(graded)
+    
+    # Fan each representative's results out to the rest of its cluster
+    duplicate_groups = []
+    for members in clusters.values():
+        representative, representative_file = members[0]
+        for student, student_file in members[1:]:
+            results[student] = _retarget_results(
+                results[representative], representative_file, student_file
+            )
+        if len(members) > 1:
+            duplicate_groups.append([student for student, _ in members])
+    
+    elapsed = time.perf_counter() - start
+    
+    # Keep results in roster order regardless of completion order
+    results = {student: results[student] for student in submissions}
+    
+    summary = {
+        "roster": str(roster_dir),
+        "jobs": jobs,
+        "executor": "zygote" if zygote is not None else "pool",
+        "submissions": len(results),
+        "errors": sum(1 for r in results.values() if "error" in r),
+        "cache_hits": sum(1 for r in results.values() if r.get("cached")),
+        "dedupe": {
+            "enabled": dedupe,
+            "graded": len(to_grade),
+            "executions_saved": sum(len(group) - 1 for group in duplicate_groups),
+            "duplicate_groups": duplicate_groups
+        },
+        "elapsed_seconds": elapsed,
+        "submissions_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "scores": {
+            student: _result_score(r) for student, r in results.items()
+        },
+        "grading_seconds": durations,
+        # Only submissions that were actually graded, not their duplicates
+        "resources": summarize_resources(r.get("resources") for r in graded.values())
+    }
+    summary["assignment"] = (assignment_config or {}).get("name")
+    
+    return results, summary
+
+
+def write_batch_results(results, summary, output_dir):
+    """
+    Write per-student results and the batch summary to a directory.
+    
+    Each student gets <student>_results.json and <student>_results.md,
+    and the summary is written to summary.json.
+    
+    Args:
+        results: Results dict keyed by student
+        summary: Summary dict from grade_batch
+        output_dir: Directory to write results to
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    for student, student_results in results.items():
+        with open(output_dir / f"{student}_results.json", 'w') as f:
+            json.dump(student_results, f, indent=2)
+        with open(output_dir / f"{student}_results.md", 'w') as f:
+            f.write(format_results_markdown(student_results))
+    
+    with open(output_dir / "summary.json", 'w') as f:
+        json.dump(summary, f, indent=2)
\ No newline at end of file
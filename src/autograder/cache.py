@@ -0,0 +1,241 @@
+"""
+Grading Result Cache for Tool Grader
+
+This module provides an on-disk, content-addressed cache of grading results.
+Entries are keyed by a hash of the submission's files, the normalized
+assignment configuration, the grading settings that affect results and the
+grader version, so resubmitting identical code (or a redelivered webhook)
+returns the stored results without running anything.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+
+from . import __version__
+from .config import get_config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Global grading settings that change the results of grading a submission
+GRADING_SETTINGS = ("example_timeout", "submission_timeout", "output_head_bytes", "output_tail_bytes")
+
+# Puts between full scans of the cache directory; other processes' writes
+# are only noticed by a scan, this process's own are counted as they happen
+EVICT_INTERVAL = 100
+
+
+def _normalize_value(value):
+    """Make config values that JSON can't represent (e.g. exception classes) hashable."""
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return str(value)
+
+
+def normalize_assignment_config(assignment_config):
+    """
+    Serialize an assignment configuration in a stable form.
+    
+    Args:
+        assignment_config: Assignment-specific configuration
+        
+    Returns:
+        JSON string with sorted keys
+    """
+    return json.dumps(
+        assignment_config or {},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_normalize_value
+    )
+
+
+def _submission_files(submission_dir):
+    """
+    List the files of a submission directory in a stable order.
+    
+    Bytecode caches and hidden directories (e.g. .git) are left out, since
+    they change without the submission changing.
+    
+    Args:
+        submission_dir: Path to the submission directory
+        
+    Returns:
+        Sorted list of (relative path, Path) tuples
+    """
+    submission_dir = Path(submission_dir)
+    files = []
+    for path in submission_dir.rglob("*"):
+        relative = path.relative_to(submission_dir)
+        if any(part == "__pycache__" or part.startswith(".") for part in relative.parts[:-1]):
+            continue
+        if path.is_file():
+            files.append((relative.as_posix(), path))
+    return sorted(files)
+
+
+class ResultCache:
+    """Size-bounded LRU cache of grading results stored as JSON files."""
+    
+    def __init__(self, directory=None, max_size_mb=None):
+        """
+        Initialize the result cache.
+        
+        Args:
+            directory: Cache directory
+            max_size_mb: Maximum total size of cached entries in megabytes
+        """
+        config = get_config()
+        
+        self.directory = Path(directory or config.get("cache", "directory")).expanduser()
+        self.max_size_mb = max_size_mb or config.get("cache", "max_size_mb")
+        self.max_bytes = int(self.max_size_mb * 1024 * 1024)
+        
+        # Estimated size of the cache since the last scan (None: not scanned)
+        self._size = None
+        self._puts = 0
+    
+    def make_key(self, student_file, assignment_config=None, submission_dir=None):
+        """
+        Compute the cache key for a submission.
+        
+        Args:
+            student_file: Path to the student's Python file
+            assignment_config: Assignment-specific configuration
+            submission_dir: Directory the submission was graded from, if it
+                was a directory; every file in it (e.g. helper modules the
+                student imports) is part of the key
+            
+        Returns:
+            Hex digest identifying the submission, config and grader version
+        """
+        grading = get_config().get("grading")
+        settings = {name: grading.get(name) for name in GRADING_SETTINGS}
+        
+        digest = hashlib.sha256()
+        digest.update(__version__.encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(normalize_assignment_config(assignment_config).encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(normalize_assignment_config(settings).encode('utf-8'))
+        digest.update(b"\0")
+        # The module name shows up in doctest names, so it is part of the key
+        digest.update(Path(student_file).name.encode('utf-8'))
+        digest.update(b"\0")
+        
+        files = _submission_files(submission_dir) if submission_dir is not None else []
+        if not files:
+            files = [(Path(student_file).name, Path(student_file))]
+        for name, path in files:
+            digest.update(name.encode('utf-8'))
+            digest.update(b"\0")
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        return digest.hexdigest()
+    
+    def _entry_path(self, key):
+        """Get the file path for a cache key."""
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def get(self, key):
+        """
+        Look up cached results.
+        
+        Args:
+            key: Cache key from make_key
+            
+        Returns:
+            Results dictionary, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        return results
+    
+    def put(self, key, results):
+        """
+        Store results in the cache and evict old entries if over budget.
+        
+        Args:
+            key: Cache key from make_key
+            results: Results dictionary to store
+        """
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Write atomically so concurrent workers never see partial entries
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(results, f, default=str)
+                os.replace(temp_name, path)
+            except BaseException:
+                self._remove(Path(temp_name))
+                raise
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {path}: {e}")
+            return
+        
+        # Scanning the whole cache is O(entries), so only do it when this
+        # process's writes may have filled it, or every EVICT_INTERVAL puts
+        self._puts += 1
+        if self._size is not None:
+            try:
+                self._size += path.stat().st_size
+            except OSError:
+                pass
+        if self._size is None or self._size > self.max_bytes or self._puts >= EVICT_INTERVAL:
+            self.evict()
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_size_mb."""
+        self._puts = 0
+        entries = []
+        total_size = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+            
+        if total_size > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.max_bytes:
+                    break
+                self._remove(path)
+                total_size -= size
+        self._size = total_size
+    
+    def clear(self):
+        """Remove every cached entry."""
+        for path in self.directory.glob("*/*.json"):
+            self._remove(path)
+        self._size = 0
+    
+    def _remove(self, path):
+        """Remove a file, ignoring files that are already gone."""
+        try:
+            path.unlink()
+        except OSError:
+            pass
\ No newline at end of file
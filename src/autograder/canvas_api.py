@@ -4,6 +4,8 @@ Canvas LMS API Integration for Tool Grader
 This module handles integration with the Canvas LMS API for grade reporting.
 """
 
+import time
+import asyncio
 import logging
 from pathlib import Path
 
@@ -11,6 +13,9 @@ from canvasapi import Canvas
 from canvasapi.exceptions import CanvasException
 
 from .config import get_config
+from .canvas_cache import SubmissionIndex, PostedState, grade_matches
+from .canvas_client import AsyncCanvasClient
+from .canvas_outbox import get_outbox_worker
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -35,6 +40,21 @@ class CanvasIntegration:
         self.api_token = api_token or config.get("canvas_api", "token")
         self.course_id = course_id or config.get("canvas_api", "course_id")
         
+        # Submissions are fetched once per assignment rather than once per student
+        self._assignments = {}
+        self.submission_index = SubmissionIndex(
+            self._fetch_submissions,
+            ttl=config.get("canvas", "submission_index_ttl", 300)
+        )
+        
+        # Hashes of what was last posted per student, so unchanged posts are skipped
+        self.skip_unchanged = config.get("canvas", "skip_unchanged", True)
+        self.update_existing = config.get("canvas", "update_existing", True)
+        self.seed_posted = config.get("canvas", "seed_posted_state", False)
+        self.posted_state = PostedState()
+        # Either option needs to know what Canvas already holds
+        self.track_posted = self.skip_unchanged or not self.update_existing
+        
         if not self.api_url or not self.api_token:
             logger.warning("Canvas API URL or token not configured")
             self.canvas = None
@@ -47,6 +67,13 @@ class CanvasIntegration:
                 logger.error(f"Failed to initialize Canvas API: {e}")
                 self.canvas = None
                 self.course = None
+        
+        # Posts go through a durable outbox drained in the background, so
+        # grading doesn't wait on Canvas and posts survive Canvas outages.
+        # The outbox is opened on the first post, not for lookups.
+        self.outbox_enabled = bool(
+            self.is_configured() and self.course_id and config.get("canvas", "outbox_enabled", True)
+        )
     
     def is_configured(self):
         """Check if Canvas API is configured."""
@@ -66,16 +93,106 @@ class CanvasIntegration:
             logger.error("Canvas API not configured or course not set")
             return None
         
+        if assignment_id in self._assignments:
+            return self._assignments[assignment_id]
+        
         try:
-            return self.course.get_assignment(assignment_id)
+            assignment = self.course.get_assignment(assignment_id)
         except CanvasException as e:
             logger.error(f"Failed to get assignment {assignment_id}: {e}")
             return None
     
+        self._assignments[assignment_id] = assignment
+        return assignment
+    
+    def _fetch_submissions(self, assignment_id):
+        """
+        Fetch every submission of an assignment for the submission index.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            
+        Returns:
+            List of Canvas Submission objects
+        """
+        assignment = self.get_assignment(assignment_id)
+        if not assignment:
+            return []
+        
+        # Large pages keep the number of requests for a big class low
+        if not self.track_posted:
+            return list(assignment.get_submissions(per_page=100))
+        
+        # The same fetch tells us what Canvas already holds for every student
+        # (comments are only compared when skipping unchanged posts)
+        include = ["submission_comments"] if self.skip_unchanged else []
+        submissions = list(assignment.get_submissions(per_page=100, include=include))
+        self.posted_state.seed(assignment_id, submissions)
+        return submissions
+    
+    def seed_posted_state(self, assignment_id):
+        """
+        Load the grades and latest comments Canvas holds for an assignment.
+        
+        Uses the submission index's fetch (one paginated request), after
+        which posts matching what Canvas holds are skipped without having
+        been posted by this process first.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            
+        Returns:
+            True if the state was seeded, False otherwise
+        """
+        if not self.track_posted:
+            return False
+        
+        self.submission_index.invalidate(assignment_id)
+        try:
+            self.submission_index.index(assignment_id)
+        except CanvasException as e:
+            logger.warning(f"Failed to seed posted grades for assignment {assignment_id}: {e}")
+            return False
+        return self.posted_state.seeded(assignment_id)
+    
+    def _changes(self, assignment_id, student_id, grade=None, comment=None):
+        """
+        Get the parts of a post that would change what Canvas holds.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            student_id: Canvas student ID
+            grade: Grade to post, or None
+            comment: Comment to post, or None
+            
+        Returns:
+            (grade, comment) to post, with unchanged parts set to None, or
+            None if there's nothing to post
+        """
+        # Keeping existing grades needs to know which grades Canvas holds
+        seed = self.seed_posted or not self.update_existing
+        if seed and not self.posted_state.seeded(assignment_id):
+            self.seed_posted_state(assignment_id)
+        
+        if not self.update_existing and grade is not None and self.posted_state.has_grade(assignment_id, student_id):
+            # Keep grades already in Canvas
+            grade = None
+            if not comment:
+                return None
+        
+        if not self.skip_unchanged:
+            return grade, comment
+        return self.posted_state.changes(assignment_id, student_id, grade, comment)
+    
     def get_student_submission(self, assignment_id, student_id):
         """
         Get student submission for an assignment.
         
+        The submission is looked up in the assignment's submission index,
+        which is built with one paginated fetch and refreshed after
+        canvas.submission_index_ttl seconds. Students missing from the index
+        are fetched directly.
+        
         Args:
             assignment_id: Canvas assignment ID
             student_id: Canvas student ID
@@ -83,24 +200,35 @@ class CanvasIntegration:
         Returns:
             Canvas Submission object or None
         """
+        try:
+            submission = self.submission_index.get(assignment_id, student_id)
+            if submission is not None:
+                return submission
+        except CanvasException as e:
+            logger.warning(f"Failed to index submissions for assignment {assignment_id}: {e}")
+        
         assignment = self.get_assignment(assignment_id)
         if not assignment:
             return None
         
         try:
-            submissions = assignment.get_submissions()
-            for submission in submissions:
-                if submission.user_id == student_id:
-                    return submission
+            submission = assignment.get_submission(student_id)
         except CanvasException as e:
             logger.error(f"Failed to get submission for assignment {assignment_id}, student {student_id}: {e}")
+            return None
         
-        return None
+        self.submission_index.put(assignment_id, submission)
+        return submission
     
     def post_grade(self, assignment_id, student_id, grade, comment=None):
         """
         Post grade for a student submission.
         
+        With the outbox enabled the grade is queued and posted in the
+        background; a grade queued for the same student and assignment but
+        not yet posted is replaced. A grade or comment matching what was
+        last posted (see canvas.skip_unchanged) isn't posted again.
+        
         Args:
             assignment_id: Canvas assignment ID
             student_id: Canvas student ID
@@ -108,23 +236,266 @@ class CanvasIntegration:
             comment: Optional comment to post
             
         Returns:
-            True if successful, False otherwise
+            True if successful (or queued), False otherwise
         """
+        if self.outbox_enabled:
+            # Unchanged posts are dropped on delivery rather than here, so a
+            # grade that reverts a queued one isn't mistaken for unchanged
+            return self._enqueue(assignment_id, student_id, grade=grade, comment=comment)
+        
+        changes = self._changes(assignment_id, student_id, grade, comment)
+        if changes is None:
+            logger.debug(f"Grade for assignment {assignment_id}, student {student_id} unchanged; not posting")
+            return True
+        grade, comment = changes
+        
         submission = self.get_student_submission(assignment_id, student_id)
         if not submission:
             return False
         
         try:
-            submission.edit(submission={'posted_grade': grade})
+            if grade is not None:
+                submission.edit(submission={'posted_grade': grade})
             
             if comment:
                 submission.edit(comment={'text_comment': comment})
             
+            self.posted_state.record(assignment_id, student_id, grade, comment)
             return True
         except CanvasException as e:
             logger.error(f"Failed to post grade for assignment {assignment_id}, student {student_id}: {e}")
             return False
     
+    def _outbox_worker(self):
+        """
+        Get the process's outbox worker for this course, starting it if needed.
+        
+        A new worker also delivers posts left over from a previous run.
+        """
+        return get_outbox_worker(self.course_id, self.post_grades_concurrent)
+    
+    def _enqueue(self, assignment_id, student_id, grade=None, comment=None):
+        """Queue a post in the outbox and wake the worker."""
+        try:
+            worker = self._outbox_worker()
+            worker.outbox.enqueue(self.course_id, assignment_id, student_id, grade=grade, comment=comment)
+        except Exception as e:
+            logger.error(f"Failed to queue post for assignment {assignment_id}, student {student_id}: {e}")
+            return False
+        worker.notify()
+        return True
+    
+    def flush_outbox(self, timeout=60):
+        """
+        Deliver queued posts now, e.g. before a command-line run exits.
+        
+        Args:
+            timeout: Seconds to keep trying
+            
+        Returns:
+            Number of posts still queued (0 when everything was delivered)
+        """
+        if not self.outbox_enabled:
+            return 0
+        return self._outbox_worker().flush(timeout)
+    
+    def _filter_changes(self, assignment_id, grades):
+        """
+        Drop the unchanged parts of many posts.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            grades: Dictionary of student ID to (grade, comment)
+            
+        Returns:
+            Tuple of the dictionary of posts still to make and the list of
+            student IDs with nothing to post
+        """
+        changes = {}
+        skipped = []
+        for student_id, (grade, comment) in grades.items():
+            change = self._changes(assignment_id, student_id, grade, comment)
+            if change is None:
+                skipped.append(student_id)
+            else:
+                changes[student_id] = change
+        if skipped:
+            logger.info(f"Skipping {len(skipped)} unchanged grades for assignment {assignment_id}")
+        return changes, skipped
+    
+    def _record_posted(self, assignment_id, grades, posted):
+        """Remember the posts Canvas accepted."""
+        for student_id in posted:
+            grade, comment = grades[student_id]
+            self.posted_state.record(assignment_id, student_id, grade, comment)
+    
+    def post_grades_bulk(self, assignment_id, grades, poll_interval=None, timeout=None):
+        """
+        Post grades (and optional comments) for many students in one batch.
+        
+        Canvas applies the batch asynchronously, so the returned progress is
+        polled until it finishes. Canvas doesn't report failures per student,
+        so afterwards the submissions are fetched once more (one paginated
+        request) and any student whose grade didn't change is reported.
+        Students whose grade and comment match what was last posted are
+        left out of the batch and reported as skipped.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            grades: Dictionary of student ID to (grade, comment); comment may be None
+            poll_interval: Seconds between progress checks (default: canvas.progress_poll_interval)
+            timeout: Seconds to wait for the batch (default: canvas.progress_timeout)
+            
+        Returns:
+            Dictionary with success, posted (student IDs), skipped (student
+            IDs), failed (student ID to reason) and the final progress state
+        """
+        config = get_config()
+        poll_interval = poll_interval or config.get("canvas", "progress_poll_interval", 1.0)
+        timeout = timeout or config.get("canvas", "progress_timeout", 300)
+        
+        failed = {}
+        grades, skipped = self._filter_changes(assignment_id, grades)
+        
+        def result(state):
+            posted = [student_id for student_id in grades if student_id not in failed]
+            if state == "completed":
+                self._record_posted(assignment_id, grades, posted)
+            return {
+                'success': not failed and state == "completed",
+                'posted': posted,
+                'skipped': skipped,
+                'failed': failed,
+                'progress': state
+            }
+        
+        if not grades:
+            return result("completed")
+        
+        assignment = self.get_assignment(assignment_id)
+        if not assignment:
+            failed.update({student_id: "Assignment not found" for student_id in grades})
+            return result(None)
+        
+        grade_data = {}
+        for student_id, (grade, comment) in grades.items():
+            data = {}
+            if grade is not None:
+                data['posted_grade'] = grade
+            if comment:
+                data['text_comment'] = comment
+            grade_data[student_id] = data
+        
+        try:
+            progress = assignment.submissions_bulk_update(grade_data=grade_data)
+        except CanvasException as e:
+            logger.error(f"Failed to submit grades for assignment {assignment_id}: {e}")
+            failed.update({student_id: str(e) for student_id in grades})
+            return result(None)
+        
+        state = self._wait_for_progress(progress, poll_interval, timeout)
+        if state != "completed":
+            reason = f"Batch update {state}: {getattr(progress, 'message', None) or 'no message'}"
+            logger.error(f"Grades for assignment {assignment_id} not posted: {reason}")
+            failed.update({student_id: reason for student_id in grades})
+            return result(state)
+        
+        # Check what Canvas actually recorded
+        self.submission_index.invalidate(assignment_id)
+        for student_id, (grade, _) in grades.items():
+            if grade is None:
+                # Only a comment was posted
+                continue
+            try:
+                submission = self.submission_index.get(assignment_id, student_id)
+            except CanvasException as e:
+                logger.warning(f"Failed to verify grades for assignment {assignment_id}: {e}")
+                break
+            if submission is None:
+                failed[student_id] = "No submission for student"
+            elif not grade_matches(submission, grade):
+                failed[student_id] = f"Grade is {getattr(submission, 'entered_grade', None)!r}, not {grade!r}"
+        
+        if failed:
+            logger.warning(f"{len(failed)} of {len(grades)} grades not posted for assignment {assignment_id}")
+        return result(state)
+    
+    def post_grades_concurrent(self, assignment_id, grades):
+        """
+        Post grades and comments with one request per student, many at once.
+        
+        Each student's grade and comment go in a single request, and as many
+        requests run at once as Canvas's rate-limit budget allows. Unlike
+        post_grades_bulk, failures are reported per student directly. Only
+        grades and comments that differ from what was last posted are sent.
+        Must not be called from a running event loop (use AsyncCanvasClient
+        there).
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            grades: Dictionary of student ID to (grade, comment); comment may be None
+            
+        Returns:
+            Dictionary with success, posted (student IDs), skipped (student
+            IDs) and failed (student ID to reason)
+        """
+        if not self.is_configured() or not self.course_id:
+            logger.error("Canvas API not configured or course not set")
+            return {
+                'success': False,
+                'posted': [],
+                'skipped': [],
+                'failed': {student_id: "Canvas API not configured" for student_id in grades}
+            }
+        
+        grades, skipped = self._filter_changes(assignment_id, grades)
+        if not grades:
+            return {'success': True, 'posted': [], 'skipped': skipped, 'failed': {}}
+        
+        async def post():
+            async with AsyncCanvasClient(self.api_url, self.api_token) as client:
+                results = await client.edit_submissions(self.course_id, assignment_id, grades)
+                logger.info(
+                    f"Posted {len(results['posted'])} grades for assignment {assignment_id} "
+                    f"with {client.stats['requests']} requests "
+                    f"({client.stats['throttled']} throttled)"
+                )
+                return results
+        
+        results = asyncio.run(post())
+        self._record_posted(assignment_id, grades, results['posted'])
+        results['skipped'] = skipped
+        # The index holds the submissions as they were before
+        self.submission_index.invalidate(assignment_id)
+        return results
+    
+    def _wait_for_progress(self, progress, poll_interval, timeout):
+        """
+        Poll a Canvas Progress object until its job finishes.
+        
+        Args:
+            progress: Canvas Progress object
+            poll_interval: Seconds between checks
+            timeout: Seconds to wait in total
+            
+        Returns:
+            Final workflow state ("completed" or "failed"), or "timed out"
+        """
+        deadline = time.monotonic() + timeout
+        state = progress.workflow_state
+        while state in ("queued", "running"):
+            if time.monotonic() >= deadline:
+                return "timed out"
+            time.sleep(poll_interval)
+            try:
+                progress = progress.query()
+            except CanvasException as e:
+                # A failed poll doesn't mean the job failed; try again
+                logger.warning(f"Failed to check progress {progress.id}: {e}")
+                continue
+            state = progress.workflow_state
+        return state
+    
     def post_feedback(self, assignment_id, student_id, feedback_file, feedback_format="markdown"):
         """
         Post feedback for a student submission from a file.
@@ -159,6 +530,13 @@ class CanvasIntegration:
         else:  # text
             comment = feedback
         
+        if self.outbox_enabled:
+            return self._enqueue(assignment_id, student_id, comment=comment)
+        
+        if self._changes(assignment_id, student_id, comment=comment) is None:
+            logger.debug(f"Feedback for assignment {assignment_id}, student {student_id} unchanged; not posting")
+            return True
+        
         # Post comment
         submission = self.get_student_submission(assignment_id, student_id)
         if not submission:
@@ -166,6 +544,7 @@ class CanvasIntegration:
         
         try:
             submission.edit(comment={'text_comment': comment})
+            self.posted_state.record(assignment_id, student_id, comment=comment)
             return True
         except CanvasException as e:
             logger.error(f"Failed to post feedback for assignment {assignment_id}, student {student_id}: {e}")
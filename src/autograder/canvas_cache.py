@@ -0,0 +1,318 @@
+"""
+Canvas Caches for Tool Grader
+
+This module keeps Canvas data the grader looks up for every student, so
+posting grades for a class doesn't refetch it once per student, and
+remembers what was posted, so unchanged grades aren't posted again. It has
+no dependency on the Canvas API client; callers provide the fetch functions.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class SubmissionIndex:
+    """Maps user IDs to submissions for each assignment, refreshed after a TTL."""
+    
+    def __init__(self, fetch, ttl=300):
+        """
+        Initialize the index.
+        
+        Args:
+            fetch: Function taking an assignment ID and returning an iterable
+                of all its submissions (one paginated request)
+            ttl: Seconds before an assignment's index is rebuilt
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        
+        self._lock = threading.Lock()
+        self._building = {}
+        self._indexes = {}
+        
+        self.stats = {
+            "builds": 0,
+            "hits": 0,
+            "misses": 0
+        }
+    
+    def _key(self, user_id):
+        # IDs may arrive as ints from Canvas or strings from the command line
+        return str(user_id)
+    
+    def _fresh(self, assignment_id):
+        """Get an assignment's index if it hasn't expired, else None."""
+        entry = self._indexes.get(assignment_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+    
+    def index(self, assignment_id):
+        """
+        Get the user ID to submission map of an assignment, building it if needed.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            
+        Returns:
+            Dictionary of user ID (string) to submission
+        """
+        with self._lock:
+            index = self._fresh(assignment_id)
+            if index is not None:
+                return index
+            lock = self._building.setdefault(assignment_id, threading.Lock())
+        
+        # Concurrent callers wait for one fetch instead of all fetching
+        with lock:
+            with self._lock:
+                index = self._fresh(assignment_id)
+                if index is not None:
+                    return index
+            
+            try:
+                start = time.monotonic()
+                index = {
+                    self._key(submission.user_id): submission
+                    for submission in self.fetch(assignment_id)
+                }
+                logger.info(
+                    f"Indexed {len(index)} submissions for assignment {assignment_id} "
+                    f"in {time.monotonic() - start:.2f}s"
+                )
+                
+                with self._lock:
+                    self._indexes[assignment_id] = (index, start)
+                    self.stats["builds"] += 1
+                return index
+            finally:
+                # Callers still waiting on the lock find the stored index;
+                # dropping it keeps one lock per assignment from piling up
+                with self._lock:
+                    if self._building.get(assignment_id) is lock:
+                        del self._building[assignment_id]
+    
+    def get(self, assignment_id, user_id):
+        """
+        Look up a student's submission.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            user_id: Canvas user ID
+            
+        Returns:
+            Submission, or None if the index doesn't have one (e.g. the
+            student enrolled after it was built)
+        """
+        submission = self.index(assignment_id).get(self._key(user_id))
+        with self._lock:
+            self.stats["hits" if submission is not None else "misses"] += 1
+        return submission
+    
+    def put(self, assignment_id, submission):
+        """
+        Add or replace a submission fetched outside the index.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            submission: Submission with a user_id attribute
+        """
+        with self._lock:
+            entry = self._indexes.get(assignment_id)
+            if entry is not None:
+                entry[0][self._key(submission.user_id)] = submission
+    
+    def invalidate(self, assignment_id=None):
+        """
+        Drop an assignment's index, or all of them.
+        
+        Args:
+            assignment_id: Canvas assignment ID, or None for every assignment
+        """
+        with self._lock:
+            if assignment_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(assignment_id, None)
+    
+    def get_stats(self):
+        """
+        Get index counters.
+        
+        Returns:
+            Dictionary with builds, hits, misses and the number of indexed assignments
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["assignments"] = len(self._indexes)
+            return stats
+
+
+def _normalize_grade(grade):
+    """Put a grade in one form, so 90, "90" and "90.0" compare equal."""
+    try:
+        return repr(float(grade))
+    except (TypeError, ValueError):
+        return str(grade).strip()
+
+
+def _entered_grade(submission):
+    """Get the grade Canvas holds for a submission, or None."""
+    grade = getattr(submission, "entered_grade", None)
+    if grade is None:
+        grade = getattr(submission, "grade", None)
+    return grade
+
+
+def grade_matches(submission, grade):
+    """
+    Check whether a submission's recorded grade is the one that was posted.
+    
+    Args:
+        submission: Canvas submission
+        grade: Grade that was posted
+        
+    Returns:
+        True if the grades are equal, comparing numbers by value
+    """
+    entered = _entered_grade(submission)
+    if entered is None:
+        return grade is None or grade == ""
+    return _normalize_grade(entered) == _normalize_grade(grade)
+
+
+def post_digest(value, grade=False):
+    """
+    Hash a posted grade or comment.
+    
+    Args:
+        value: Grade or comment text, or None
+        grade: True if value is a grade
+        
+    Returns:
+        Hex digest, or None for None
+    """
+    if value is None:
+        return None
+    text = _normalize_grade(value) if grade else str(value)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _latest_comment(submission):
+    """Get the text of a submission's most recent comment, or None."""
+    comments = getattr(submission, "submission_comments", None) or []
+    if not comments:
+        return None
+    latest = comments[-1]
+    return latest.get("comment") if isinstance(latest, dict) else getattr(latest, "comment", None)
+
+
+class PostedState:
+    """Remembers what was last posted for each student, as hashes of the grade and comment."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+        self._seeded = set()
+        
+        self.stats = {
+            "recorded": 0,
+            "skipped": 0
+        }
+    
+    def _key(self, assignment_id, student_id):
+        return (str(assignment_id), str(student_id))
+    
+    def changes(self, assignment_id, student_id, grade=None, comment=None):
+        """
+        Drop the parts of a post that match what was last posted.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            student_id: Canvas student ID
+            grade: Grade to post, or None
+            comment: Comment to post, or None
+            
+        Returns:
+            (grade, comment) still to post, with unchanged parts set to None,
+            or None if nothing changed
+        """
+        with self._lock:
+            posted = self._state.get(self._key(assignment_id, student_id), {})
+            if grade is not None and post_digest(grade, grade=True) == posted.get("grade"):
+                grade = None
+            if comment and post_digest(comment) == posted.get("comment"):
+                comment = None
+            if grade is None and not comment:
+                self.stats["skipped"] += 1
+                return None
+            return grade, comment
+    
+    def has_grade(self, assignment_id, student_id):
+        """Check whether a grade is known to be posted for a student."""
+        with self._lock:
+            return self._state.get(self._key(assignment_id, student_id), {}).get("grade") is not None
+    
+    def record(self, assignment_id, student_id, grade=None, comment=None):
+        """
+        Remember a successful post.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            student_id: Canvas student ID
+            grade: Grade posted, or None if the grade wasn't posted
+            comment: Comment posted, or None
+        """
+        with self._lock:
+            posted = self._state.setdefault(self._key(assignment_id, student_id), {})
+            if grade is not None:
+                posted["grade"] = post_digest(grade, grade=True)
+            if comment:
+                posted["comment"] = post_digest(comment)
+            self.stats["recorded"] += 1
+    
+    def seed(self, assignment_id, submissions):
+        """
+        Set an assignment's state to what Canvas holds.
+        
+        Args:
+            assignment_id: Canvas assignment ID
+            submissions: Every submission of the assignment, with their
+                submission_comments if comments should be compared too
+        """
+        state = {}
+        for submission in submissions:
+            state[self._key(assignment_id, submission.user_id)] = {
+                "grade": post_digest(_entered_grade(submission), grade=True),
+                "comment": post_digest(_latest_comment(submission))
+            }
+        
+        with self._lock:
+            prefix = str(assignment_id)
+            for key in [key for key in self._state if key[0] == prefix]:
+                del self._state[key]
+            self._state.update(state)
+            self._seeded.add(prefix)
+    
+    def seeded(self, assignment_id):
+        """Check whether an assignment's state has been seeded from Canvas."""
+        with self._lock:
+            return str(assignment_id) in self._seeded
+    
+    def get_stats(self):
+        """
+        Get posted-state counters.
+        
+        Returns:
+            Dictionary with recorded posts, skipped posts, known students and
+            seeded assignments
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({"students": len(self._state), "seeded": len(self._seeded)})
+            return stats
\ No newline at end of file
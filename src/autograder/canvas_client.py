@@ -0,0 +1,343 @@
+"""
+Concurrent Canvas Client for Tool Grader
+
+This module talks to the Canvas REST API directly for the few operations
+the grader needs (get an assignment, list its submissions, grade or comment
+on a submission), so many students can be posted at once. Requests share
+one keep-alive connection pool, and concurrency follows the rate-limit
+budget Canvas reports in X-Rate-Limit-Remaining: it shrinks as the budget
+runs down and throttled requests are retried with jittered backoff.
+"""
+
+import random
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import get_config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CanvasRequestError(Exception):
+    """A Canvas API request failed."""
+    
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_throttled(response):
+    """Check whether Canvas rejected a request for exceeding the rate limit."""
+    if response.status_code == 429:
+        return True
+    # Canvas answers throttled requests with 403 and this text
+    return response.status_code == 403 and "Rate Limit Exceeded" in (response.text or "")
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """
+    Get how long to wait before retrying ("full jitter" exponential backoff).
+    
+    Args:
+        attempt: Number of attempts made so far (0 for the first retry)
+        base: Delay scale in seconds
+        cap: Longest delay in seconds
+        
+    Returns:
+        Seconds to wait
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RateLimitBudget:
+    """Concurrency limit that follows Canvas's remaining rate-limit budget."""
+    
+    def __init__(self, max_concurrency, low=100.0, high=400.0):
+        """
+        Initialize the budget.
+        
+        Args:
+            max_concurrency: Most requests in flight while the budget is healthy
+            low: Remaining budget at or below which requests go one at a time
+            high: Remaining budget at or above which max_concurrency is allowed
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.low = low
+        self.high = high
+        self.remaining = None
+        self.limit = self.max_concurrency
+        
+        self._active = 0
+        self._condition = None
+    
+    def update(self, remaining):
+        """
+        Adjust the limit to a newly reported budget.
+        
+        Args:
+            remaining: Value of the X-Rate-Limit-Remaining header
+        """
+        self.remaining = remaining
+        if remaining >= self.high:
+            limit = self.max_concurrency
+        elif remaining <= self.low:
+            limit = 1
+        else:
+            share = (remaining - self.low) / (self.high - self.low)
+            limit = 1 + int((self.max_concurrency - 1) * share)
+        self.limit = limit
+    
+    def throttled(self):
+        """Drop to one request at a time after Canvas throttled a request."""
+        self.remaining = 0.0
+        self.limit = 1
+    
+    def _get_condition(self):
+        # Created on first use so it belongs to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+    
+    async def acquire(self):
+        """
+        Wait until another request may be sent.
+        
+        Waiters only exist while requests are in flight, and each release
+        wakes them to re-check the limit, so a raised limit is seen promptly.
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+    
+    async def release(self):
+        """Mark a request as finished."""
+        condition = self._get_condition()
+        async with condition:
+            self._active -= 1
+            condition.notify_all()
+
+
+class AsyncCanvasClient:
+    """Asyncio client for the Canvas operations used to post grades."""
+    
+    def __init__(self, api_url, api_token, max_concurrency=None, max_retries=None, session=None):
+        """
+        Initialize the client.
+        
+        Args:
+            api_url: Canvas URL, e.g. "https://canvas.example.edu"
+            api_token: Canvas API token
+            max_concurrency: Most requests in flight (default: canvas.max_concurrency)
+            max_retries: Retries per request after throttling or server errors
+                (default: canvas.max_retries)
+            session: requests.Session to use (default: a new pooled session)
+        """
+        config = get_config()
+        
+        self.base_url = api_url.rstrip("/") + "/api/v1/"
+        self.max_concurrency = max_concurrency or config.get("canvas", "max_concurrency", 8)
+        self.max_retries = max_retries if max_retries is not None else config.get(
+            "canvas", "max_retries", 5
+        )
+        self.timeout = config.get("canvas", "request_timeout", 30)
+        self.budget = RateLimitBudget(
+            self.max_concurrency,
+            low=config.get("canvas", "rate_limit_low", 100),
+            high=config.get("canvas", "rate_limit_high", 400)
+        )
+        
+        self.session = session or self._create_session()
+        self.session.headers["Authorization"] = f"Bearer {api_token}"
+        
+        # requests is blocking, so each request in flight holds a thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="canvas"
+        )
+        
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0
+        }
+    
+    def _create_session(self):
+        """Create a keep-alive session with a connection per concurrent request."""
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    
+    def close(self):
+        """Close pooled connections and worker threads."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.close()
+    
+    async def request(self, method, path, **kwargs):
+        """
+        Send a request, retrying when throttled or on server errors.
+        
+        Args:
+            method: HTTP method
+            path: Path under /api/v1/, or an absolute URL (e.g. a next page link)
+            **kwargs: Passed to requests (params, data, ...)
+        
+        Returns:
+            requests.Response
+            
+        Raises:
+            CanvasRequestError: If the request fails or is still throttled
+                after max_retries retries
+        """
+        url = path if path.startswith("http") else self.base_url + path.lstrip("/")
+        loop = asyncio.get_running_loop()
+        
+        for attempt in range(self.max_retries + 1):
+            await self.budget.acquire()
+            try:
+                self.stats["requests"] += 1
+                response = await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(self.session.request, method, url, timeout=self.timeout, **kwargs)
+                )
+            except OSError as e:
+                # requests' connection errors and timeouts are OSErrors
+                error = CanvasRequestError(f"{method} {path} failed: {e}")
+                response = None
+            finally:
+                await self.budget.release()
+            
+            if response is not None:
+                remaining = response.headers.get("X-Rate-Limit-Remaining")
+                if remaining is not None:
+                    self.budget.update(float(remaining))
+                
+                if is_throttled(response):
+                    self.stats["throttled"] += 1
+                    self.budget.throttled()
+                    error = CanvasRequestError(f"{method} {path} throttled", response.status_code)
+                elif response.status_code >= 500:
+                    error = CanvasRequestError(
+                        f"{method} {path} failed with {response.status_code}", response.status_code
+                    )
+                elif response.status_code >= 400:
+                    raise CanvasRequestError(
+                        f"{method} {path} failed with {response.status_code}: {response.text}",
+                        response.status_code
+                    )
+                else:
+                    return response
+            
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                delay = backoff_delay(attempt)
+                logger.debug(f"{error}; retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        
+        raise error
+    
+    async def get_paginated(self, path, params=None):
+        """
+        Get every item of a paginated list.
+        
+        Args:
+            path: Path under /api/v1/
+            params: Query parameters
+            
+        Returns:
+            List of items from all pages
+        """
+        params = dict(params or {})
+        params.setdefault("per_page", 100)
+        
+        items = []
+        response = await self.request("GET", path, params=params)
+        while True:
+            items.extend(response.json())
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url:
+                return items
+            # The next link already carries the query parameters
+            response = await self.request("GET", next_url)
+    
+    async def get_assignment(self, course_id, assignment_id):
+        """
+        Get an assignment.
+        
+        Returns:
+            Assignment as a dictionary
+        """
+        response = await self.request("GET", f"courses/{course_id}/assignments/{assignment_id}")
+        return response.json()
+    
+    async def get_submissions(self, course_id, assignment_id):
+        """
+        Get every submission of an assignment.
+        
+        Returns:
+            List of submissions as dictionaries
+        """
+        return await self.get_paginated(f"courses/{course_id}/assignments/{assignment_id}/submissions")
+    
+    async def edit_submission(self, course_id, assignment_id, user_id, grade=None, comment=None):
+        """
+        Grade and/or comment on a submission in one request.
+        
+        Returns:
+            Updated submission as a dictionary
+        """
+        data = {}
+        if grade is not None:
+            data["submission[posted_grade]"] = grade
+        if comment:
+            data["comment[text_comment]"] = comment
+            
+        response = await self.request(
+            "PUT", f"courses/{course_id}/assignments/{assignment_id}/submissions/{user_id}", data=data
+        )
+        return response.json()
+    
+    async def edit_submissions(self, course_id, assignment_id, grades):
+        """
+        Grade many submissions concurrently, as fast as the rate limit allows.
+        
+        Args:
+            course_id: Canvas course ID
+            assignment_id: Canvas assignment ID
+            grades: Dictionary of student ID to (grade, comment)
+        
+        Returns:
+            Dictionary with success, posted (student IDs) and failed
+            (student ID to reason)
+        """
+        student_ids = list(grades)
+        results = await asyncio.gather(
+            *(
+                self.edit_submission(course_id, assignment_id, student_id, *grades[student_id])
+                for student_id in student_ids
+            ),
+            return_exceptions=True
+        )
+        
+        failed = {}
+        for student_id, result in zip(student_ids, results):
+            if isinstance(result, BaseException):
+                failed[student_id] = str(result)
+        return {
+            'success': not failed,
+            'posted': [student_id for student_id in student_ids if student_id not in failed],
+            'failed': failed
+        }
\ No newline at end of file
@@ -0,0 +1,502 @@
+"""
+Durable Canvas Outbox for Tool Grader
+
+This module queues grade and feedback posts in a local SQLite database and
+delivers them to Canvas from a background worker, so grading never waits on
+Canvas and a post isn't lost when Canvas is slow or down. Pending posts for
+the same student and assignment collapse into one (the latest grade and the
+latest comment), failed posts are retried with backoff, and a circuit
+breaker stops hammering Canvas while it is failing. Posts are leased to one
+sender at a time, so processes sharing the outbox never send a post twice.
+"""
+
+import os
+import time
+import uuid
+import atexit
+import random
+import socket
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+
+from .config import get_config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    course_id TEXT NOT NULL DEFAULT '',
+    assignment_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    grade TEXT,
+    comment TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    created REAL NOT NULL,
+    last_error TEXT,
+    dead INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    PRIMARY KEY (assignment_id, student_id)
+)
+"""
+
+# Columns added since the table was first created, for existing outboxes
+_ADDED_COLUMNS = {
+    "course_id": "TEXT NOT NULL DEFAULT ''",
+    "lease_owner": "TEXT",
+    "lease_until": "REAL"
+}
+
+_workers_lock = threading.Lock()
+_workers = {}
+
+
+def get_outbox_worker(course_id, post, path=None):
+    """
+    Get the process-wide outbox worker for a course, starting it on first use.
+    
+    Args:
+        course_id: Canvas course ID
+        post: Post function for a new worker (see OutboxWorker); an existing
+            worker keeps the one it was created with
+        path: SQLite database file (default: canvas.outbox_path)
+        
+    Returns:
+        Started OutboxWorker
+    """
+    config = get_config()
+    path = Path(path or config.get(
+        "canvas", "outbox_path", "~/.cache/tool-grader/outbox.sqlite3"
+    )).expanduser()
+    key = (str(path), str(course_id))
+    
+    with _workers_lock:
+        pid, worker = _workers.get(key, (None, None))
+        # Threads don't survive a fork, so a child process starts its own
+        if pid != os.getpid():
+            if not _workers:
+                atexit.register(stop_outbox_workers)
+            worker = OutboxWorker(
+                CanvasOutbox(path),
+                course_id,
+                post,
+                breaker=CircuitBreaker(
+                    failure_threshold=config.get("canvas", "breaker_threshold", 5),
+                    reset_timeout=config.get("canvas", "breaker_reset", 60)
+                )
+            )
+            worker.start()
+            _workers[key] = (os.getpid(), worker)
+        return worker
+
+
+def stop_outbox_workers(timeout=5):
+    """
+    Stop this process's outbox workers and close their outboxes.
+    
+    Queued posts stay in the outbox for the next run.
+    
+    Args:
+        timeout: Seconds to wait for each worker's current pass
+    """
+    with _workers_lock:
+        workers = [worker for pid, worker in _workers.values() if pid == os.getpid()]
+        _workers.clear()
+    for worker in workers:
+        worker.stop(timeout)
+        worker.outbox.close()
+
+
+class CanvasOutbox:
+    """SQLite queue of pending Canvas posts, one row per student and assignment."""
+    
+    def __init__(self, path=None, max_attempts=None, lease=None):
+        """
+        Open (or create) the outbox.
+        
+        Args:
+            path: SQLite database file (default: canvas.outbox_path)
+            max_attempts: Attempts before a post is given up on (default: canvas.outbox_max_attempts)
+            lease: Seconds a claimed post is reserved for its sender before
+                another may claim it (default: canvas.outbox_lease)
+        """
+        config = get_config()
+        
+        self.path = Path(path or config.get(
+            "canvas", "outbox_path", "~/.cache/tool-grader/outbox.sqlite3"
+        )).expanduser()
+        self.max_attempts = max_attempts or config.get("canvas", "outbox_max_attempts", 10)
+        self.lease = lease or config.get("canvas", "outbox_lease", 300)
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(outbox)")}
+            for name, definition in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._db.execute(f"ALTER TABLE outbox ADD COLUMN {name} {definition}")
+        
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed_attempts": 0
+        }
+    
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+    
+    def enqueue(self, course_id, assignment_id, student_id, grade=None, comment=None):
+        """
+        Queue a grade and/or comment for a student.
+        
+        A post already pending for the student and assignment is replaced:
+        the new grade and comment win, and anything the new post doesn't
+        set is kept from the pending one.
+        
+        Args:
+            course_id: Canvas course ID the assignment belongs to
+            assignment_id: Canvas assignment ID
+            student_id: Canvas student ID
+            grade: Grade to post, or None
+            comment: Comment to post, or None
+        """
+        if grade is None and not comment:
+            raise ValueError("Nothing to post: grade and comment are both empty")
+        
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO outbox (course_id, assignment_id, student_id, grade, comment, next_attempt, created)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (assignment_id, student_id) DO UPDATE SET
+                    course_id = excluded.course_id,
+                    grade = COALESCE(excluded.grade, outbox.grade),
+                    comment = COALESCE(excluded.comment, outbox.comment),
+                    version = outbox.version + 1,
+                    attempts = 0,
+                    next_attempt = excluded.next_attempt,
+                    last_error = NULL,
+                    dead = 0
+                """,
+                (str(course_id), str(assignment_id), str(student_id),
+                 None if grade is None else str(grade), comment or None, now, now)
+            )
+            self.stats["enqueued"] += 1
+    
+    def claim(self, course_id, limit=100):
+        """
+        Reserve posts that are ready to be sent.
+        
+        Claimed posts are leased to the caller until they are marked sent
+        or failed, or the lease expires (e.g. the sender died), so no other
+        sender, in this process or another, picks them up meanwhile.
+        
+        Args:
+            course_id: Canvas course ID to claim posts for
+            limit: Maximum number of posts
+            
+        Returns:
+            List of dictionaries with assignment_id, student_id, grade,
+            comment, version, attempts and lease
+        """
+        lease = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        now = time.time()
+        with self._lock, self._db:
+            # One statement, so claiming is atomic across processes
+            self._db.execute(
+                """
+                UPDATE outbox SET lease_owner = ?, lease_until = ?
+                WHERE rowid IN (
+                    SELECT rowid FROM outbox
+                    WHERE course_id = ? AND dead = 0 AND next_attempt <= ?
+                        AND (lease_until IS NULL OR lease_until <= ?)
+                    ORDER BY next_attempt LIMIT ?
+                )
+                """,
+                (lease, now + self.lease, str(course_id), now, now, limit)
+            )
+            rows = self._db.execute(
+                """
+                SELECT assignment_id, student_id, grade, comment, version, attempts, lease_owner AS lease
+                FROM outbox WHERE lease_owner = ?
+                """,
+                (lease,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def _release(self, post):
+        """Release a post's lease (still held if it was replaced while being sent)."""
+        self._db.execute(
+            """
+            UPDATE outbox SET lease_owner = NULL, lease_until = NULL
+            WHERE assignment_id = ? AND student_id = ? AND lease_owner = ?
+            """,
+            (post["assignment_id"], post["student_id"], post["lease"])
+        )
+    
+    def mark_sent(self, post):
+        """
+        Remove a delivered post.
+        
+        If the post was replaced while it was being sent, the newer version
+        stays queued.
+        
+        Args:
+            post: Dictionary from claim()
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM outbox WHERE assignment_id = ? AND student_id = ? AND version = ?",
+                (post["assignment_id"], post["student_id"], post["version"])
+            )
+            self._release(post)
+            self.stats["sent"] += 1
+    
+    def mark_failed(self, post, error, retry_after=None):
+        """
+        Schedule a failed post for another attempt, or give up on it.
+        
+        Args:
+            post: Dictionary from claim()
+            error: Why the post failed
+            retry_after: Seconds to wait (default: jittered exponential backoff)
+        """
+        attempts = post["attempts"] + 1
+        if retry_after is None:
+            retry_after = random.uniform(0.5, 1.0) * min(3600, 5 * 2 ** attempts)
+        dead = attempts >= self.max_attempts
+        if dead:
+            logger.error(
+                f"Giving up posting to Canvas for assignment {post['assignment_id']}, "
+                f"student {post['student_id']} after {attempts} attempts: {error}"
+            )
+        
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ?, dead = ?
+                WHERE assignment_id = ? AND student_id = ? AND version = ?
+                """,
+                (attempts, time.time() + retry_after, str(error), int(dead),
+                 post["assignment_id"], post["student_id"], post["version"])
+            )
+            self._release(post)
+            self.stats["failed_attempts"] += 1
+    
+    def get_stats(self):
+        """
+        Get outbox counters.
+        
+        Returns:
+            Dictionary with pending and dead post counts plus enqueue, send
+            and failure counts since the outbox was opened
+        """
+        with self._lock:
+            pending, dead = self._db.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM outbox"
+            ).fetchone()
+        stats = dict(self.stats)
+        stats.update({"pending": pending, "dead": dead})
+        return stats
+
+
+class CircuitBreaker:
+    """Stops calls to a failing service, then lets one call through to test it."""
+    
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        """
+        Initialize the breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+    
+    @property
+    def state(self):
+        """"closed" (calls allowed), "open" (calls blocked) or "half-open" (one trial call)."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+    
+    def allow(self):
+        """Check whether a call may be made now."""
+        return self.state != "open"
+    
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        if self.opened_at is not None:
+            logger.info("Canvas is responding again; resuming posts")
+        self.failures = 0
+        self.opened_at = None
+    
+    def record_failure(self):
+        """Count a failed call, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.state == "half-open":
+            if self.state != "open":
+                logger.warning(f"Canvas failing; pausing posts for {self.reset_timeout}s")
+            self.opened_at = time.monotonic()
+
+
+class OutboxWorker:
+    """Background thread that delivers a course's queued posts to Canvas."""
+    
+    def __init__(self, outbox, course_id, post, interval=None, batch_size=100, breaker=None):
+        """
+        Initialize the worker.
+        
+        Args:
+            outbox: CanvasOutbox to drain
+            course_id: Canvas course whose posts to send
+            post: Function taking an assignment ID and a dictionary of student
+                ID to (grade, comment), returning a dictionary with posted
+                and failed (student ID to reason), e.g.
+                CanvasIntegration.post_grades_concurrent
+            interval: Seconds between checks for due posts (default: canvas.outbox_interval)
+            batch_size: Most posts sent per pass
+            breaker: CircuitBreaker (default: opens after 5 failed passes for 60 seconds)
+        """
+        self.outbox = outbox
+        self.course_id = course_id
+        self.post = post
+        self.interval = interval or get_config().get("canvas", "outbox_interval", 5)
+        self.batch_size = batch_size
+        self.breaker = breaker or CircuitBreaker()
+        
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def drain_once(self):
+        """
+        Send the posts that are due.
+        
+        Returns:
+            Number of posts delivered
+        """
+        # flush() may drain while the background thread does; claims keep
+        # them from sending the same posts, this keeps the breaker consistent
+        with self._drain_lock:
+            if not self.breaker.allow():
+                return 0
+            return self._drain(self.outbox.claim(self.course_id, self.batch_size))
+    
+    def _drain(self, posts):
+        """Send posts grouped by assignment, recording each outcome."""
+        by_assignment = {}
+        for post in posts:
+            by_assignment.setdefault(post["assignment_id"], []).append(post)
+        
+        delivered = 0
+        for assignment_id, assignment_posts in by_assignment.items():
+            grades = {post["student_id"]: (post["grade"], post["comment"]) for post in assignment_posts}
+            try:
+                result = self.post(assignment_id, grades)
+            except Exception as e:
+                logger.warning(f"Failed to post to Canvas for assignment {assignment_id}: {e}")
+                result = {"posted": [], "failed": {student_id: str(e) for student_id in grades}}
+            
+            failed = result.get("failed", {})
+            for post in assignment_posts:
+                if post["student_id"] in failed:
+                    self.outbox.mark_failed(post, failed[post["student_id"]])
+                else:
+                    self.outbox.mark_sent(post)
+                    delivered += 1
+                    
+            # Every post failing means Canvas is in trouble, not one student's post
+            if failed and len(failed) == len(grades):
+                self.breaker.record_failure()
+                if not self.breaker.allow():
+                    break
+            else:
+                self.breaker.record_success()
+        
+        return delivered
+    
+    def flush(self, timeout=60):
+        """
+        Keep sending until nothing is queued or the timeout passes.
+        
+        Args:
+            timeout: Seconds to keep trying
+            
+        Returns:
+            Number of posts still queued
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            self.drain_once()
+            pending = self.outbox.get_stats()["pending"]
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                if pending:
+                    logger.warning(f"{pending} Canvas posts still queued; they'll be retried later")
+                return pending
+            time.sleep(min(self.interval, remaining))
+    
+    def get_stats(self):
+        """
+        Get outbox and circuit breaker state.
+        
+        Returns:
+            Dictionary of outbox counters plus the breaker state
+        """
+        stats = self.outbox.get_stats()
+        stats["breaker"] = self.breaker.state
+        return stats
+    
+    def notify(self):
+        """Wake the worker to send newly queued posts."""
+        self._wake.set()
+    
+    def start(self):
+        """Start draining in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="canvas-outbox", daemon=True)
+        self._thread.start()
+    
+    def _loop(self):
+        """Drain until stopped."""
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception as e:
+                logger.error(f"Canvas outbox pass failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+    
+    def stop(self, timeout=None):
+        """
+        Stop the background thread (queued posts stay in the outbox).
+        
+        Args:
+            timeout: Seconds to wait for a pass in progress (None: wait until it ends)
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
\ No newline at end of file
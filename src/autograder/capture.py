@@ -0,0 +1,179 @@
+"""
+Bounded Output Capture for Tool Grader
+
+This module captures program output without holding all of it in memory.
+Only the beginning and end of the output are kept, with a count of what was
+dropped in between, so a submission that prints in a loop can't exhaust the
+grader's memory or bloat its results.
+"""
+
+import io
+import doctest
+from collections import deque
+
+from .config import get_config
+
+
+def output_limits():
+    """
+    Get the configured head and tail sizes for captured output.
+    
+    Returns:
+        Tuple of (head size, tail size)
+    """
+    config = get_config()
+    return (
+        config.get("grading", "output_head_bytes", 32768),
+        config.get("grading", "output_tail_bytes", 32768)
+    )
+
+
+class HeadTailBuffer:
+    """Keeps the first head_size and last tail_size units of a stream."""
+    
+    def __init__(self, head_size, tail_size, empty=b""):
+        """
+        Initialize the buffer.
+        
+        Args:
+            head_size: Number of leading bytes (or characters) to keep
+            tail_size: Number of trailing bytes (or characters) to keep
+            empty: b"" to capture bytes, "" to capture text
+        """
+        self.head_size = head_size
+        self.tail_size = tail_size
+        self.empty = empty
+        self.total = 0
+        
+        self._head = []
+        self._head_length = 0
+        self._tail = deque()
+        self._tail_length = 0
+    
+    def write(self, data):
+        """Add data to the buffer."""
+        if not data:
+            return
+        self.total += len(data)
+        
+        room = self.head_size - self._head_length
+        if room > 0:
+            self._head.append(data[:room])
+            self._head_length += min(room, len(data))
+            data = data[room:]
+            if not data:
+                return
+        
+        if self.tail_size <= 0:
+            return
+        self._tail.append(data[-self.tail_size:])
+        self._tail_length += len(self._tail[-1])
+        
+        # Drop whole chunks that have scrolled out of the tail window
+        while self._tail_length - len(self._tail[0]) >= self.tail_size:
+            self._tail_length -= len(self._tail.popleft())
+    
+    @property
+    def truncated_bytes(self):
+        """Number of bytes (or characters) dropped from the middle."""
+        return self.total - self._head_length - min(self._tail_length, self.tail_size)
+    
+    @property
+    def truncated(self):
+        """True if any output was dropped."""
+        return self.truncated_bytes > 0
+    
+    def getvalue(self):
+        """
+        Get the kept output.
+        
+        Returns:
+            The head and tail joined, with a marker where output was dropped
+        """
+        head = self.empty.join(self._head)
+        tail = self.empty.join(self._tail)[-self.tail_size:] if self.tail_size > 0 else self.empty
+        if not self.truncated:
+            return head + tail
+        
+        marker = f"\n... [{self.truncated_bytes} {self._unit} truncated] ...\n"
+        if isinstance(self.empty, bytes):
+            marker = marker.encode('utf-8')
+        return head + marker + tail
+    
+    @property
+    def _unit(self):
+        return "bytes" if isinstance(self.empty, bytes) else "characters"
+    
+    def text(self):
+        """Get the kept output as text."""
+        value = self.getvalue()
+        if isinstance(value, bytes):
+            return value.decode('utf-8', errors='replace')
+        return value
+
+
+class HeadTailWriter(io.TextIOBase):
+    """Text stream (e.g. a replacement sys.stdout) backed by a HeadTailBuffer."""
+    
+    def __init__(self, head_size=None, tail_size=None):
+        """
+        Initialize the writer.
+        
+        Args:
+            head_size: Characters to keep from the start (default: configured)
+            tail_size: Characters to keep from the end (default: configured)
+        """
+        default_head, default_tail = output_limits()
+        self.buffer_ = HeadTailBuffer(
+            default_head if head_size is None else head_size,
+            default_tail if tail_size is None else tail_size,
+            empty=""
+        )
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        self.buffer_.write(text)
+        return len(text)
+    
+    @property
+    def truncated_bytes(self):
+        """Number of characters dropped from the middle."""
+        return self.buffer_.truncated_bytes
+    
+    def getvalue(self):
+        """Get the kept output."""
+        return self.buffer_.getvalue()
+
+
+class BoundedSpoofOut(doctest._SpoofOut):
+    """
+    Capture for an example's output that stops growing past a limit.
+    
+    doctest compares the whole captured output with the expected output, so
+    only the head is kept; anything longer than the limit fails anyway.
+    """
+    
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.dropped = 0
+    
+    def write(self, text):
+        room = self.limit - self.tell()
+        if room < len(text):
+            self.dropped += len(text) - max(room, 0)
+            text = text[:max(room, 0)]
+        super().write(text)
+        return len(text)
+    
+    def getvalue(self):
+        value = super().getvalue()
+        if self.dropped:
+            value += f"... [{self.dropped} characters truncated]\n"
+        return value
+    
+    def truncate(self, size=None):
+        self.dropped = 0
+        return super().truncate(size)
\ No newline at end of file
@@ -21,19 +21,79 @@ class Config:
             "image": "python-autograder:latest",
             "memory_limit": "256m",
             "cpu_limit": 0.5,
-            "timeout": 30
+            "timeout": 30,
+            "pool_size": 0,
+            "pool_max_uses": 20,
+            "transport": "stream",
+            "max_output_bytes": 10485760,
+            "max_concurrency": 0,
+            "completion_events": True,
+            "client_pool_size": 32,
+            "image_cache_ttl": 60,
+            "pids_limit": 64,
+            "read_only": True,
+            "tmpfs_size": "64m",
+            "nofile_limit": 256,
+            "file_size_limit": 16777216,
+            "cpu_pinning": True
         },
         "grading": {
             "show_test_names": True,
             "show_expected_output": True,
             "show_test_docstrings": True,
-            "show_full_traceback": False
+            "show_full_traceback": False,
+            "example_timeout": 5,
+            "submission_timeout": 60,
+            "output_head_bytes": 32768,
+            "output_tail_bytes": 32768
         },
         "canvas": {
             "post_grades": False,
             "post_feedback": False,
             "update_existing": True,
-            "feedback_format": "markdown"
+            "skip_unchanged": True,
+            "seed_posted_state": False,
+            "feedback_format": "markdown",
+            "submission_index_ttl": 300,
+            "progress_poll_interval": 1.0,
+            "progress_timeout": 300,
+            "max_concurrency": 8,
+            "max_retries": 5,
+            "rate_limit_low": 100,
+            "rate_limit_high": 400,
+            "request_timeout": 30,
+            "outbox_enabled": True,
+            "outbox_path": "~/.cache/tool-grader/outbox.sqlite3",
+            "outbox_interval": 5,
+            "outbox_max_attempts": 10,
+            "outbox_lease": 300,
+            "breaker_threshold": 5,
+            "breaker_reset": 60
+        },
+        "runner": {
+            "backend": "docker"
+        },
+        "sandbox": {
+            "namespaces": ["user", "net", "mount", "pid"],
+            "cgroup_root": "/sys/fs/cgroup/tool-grader",
+            "pids_limit": 64,
+            "user": "nobody",
+            "read_only_paths": []
+        },
+        "warmup": {
+            "enabled": True,
+            "retry_delay": 30,
+            "max_retry_delay": 600
+        },
+        "reaper": {
+            "enabled": True,
+            "interval": 300,
+            "max_age": 3600
+        },
+        "cache": {
+            "enabled": True,
+            "directory": "~/.cache/tool-grader/results",
+            "max_size_mb": 256
         }
     }
     
@@ -0,0 +1,226 @@
+"""
+Container Completion Tracking for Tool Grader
+
+This module watches a single Docker events stream for grading containers
+exiting, instead of holding one blocking wait() request per container.
+Each watched container gets a future that is resolved when the daemon
+reports that it died.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Label put on every grading container so they can be told apart from others
+GRADER_LABEL = "tool-grader"
+
+# Number of recent exits remembered for containers watched late or twice
+RECENT_EXITS = 1024
+
+
+class ContainerCompletionTracker:
+    """Resolves per-container futures from one Docker events subscription."""
+    
+    def __init__(self, client, label=GRADER_LABEL, reconnect_delay=1.0):
+        """
+        Initialize the tracker.
+        
+        Args:
+            client: Docker client
+            label: Only containers with this label are tracked
+            reconnect_delay: Seconds to wait before resubscribing after the
+                events stream drops
+        """
+        self.client = client
+        self.label = label
+        self.reconnect_delay = reconnect_delay
+        
+        self._pending = {}
+        self._oom = set()
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self._stream = None
+        self._thread = None
+        self._closed = False
+        self._since = None
+    
+    def start(self):
+        """Subscribe to the events stream in a background thread."""
+        if self._thread is not None:
+            return
+        # Subscribe before returning so no exit after start() is missed
+        self._stream = self._subscribe()
+        self._thread = threading.Thread(target=self._listen, name="container-events", daemon=True)
+        self._thread.start()
+    
+    def _subscribe(self):
+        """Open a filtered events stream, resuming from the last event seen."""
+        return self.client.events(
+            decode=True,
+            since=self._since,
+            filters={
+                "type": "container",
+                "label": self.label,
+                "event": ["die", "oom"]
+            }
+        )
+    
+    def _listen(self):
+        """Read events until closed, resubscribing if the stream drops."""
+        while not self._closed:
+            try:
+                for event in self._stream:
+                    self._handle_event(event)
+            except Exception as e:
+                if self._closed:
+                    break
+                logger.warning(f"Docker events stream failed: {e}")
+            
+            if self._closed:
+                break
+            
+            time.sleep(self.reconnect_delay)
+            try:
+                self._stream = self._subscribe()
+            except Exception as e:
+                logger.warning(f"Failed to resubscribe to Docker events: {e}")
+                continue
+            # Exits that happened while disconnected may have been missed
+            self._reconcile()
+    
+    def _handle_event(self, event):
+        """
+        Record one container event.
+        
+        Args:
+            event: Decoded event dictionary from the daemon
+        """
+        time_nano = event.get("timeNano")
+        if time_nano:
+            self._since = time_nano / 1e9
+            
+        action = event.get("Action") or event.get("status")
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID") or event.get("id")
+        if not container_id:
+            return
+        
+        if action == "oom":
+            with self._lock:
+                self._oom.add(container_id)
+            return
+        
+        if action == "die":
+            try:
+                exit_code = int(actor.get("Attributes", {}).get("exitCode", -1))
+            except ValueError:
+                exit_code = -1
+            self._resolve(container_id, exit_code)
+    
+    def _resolve(self, container_id, exit_code, oom_killed=False):
+        """Complete the future for a container, or remember the exit for later."""
+        with self._lock:
+            oom_killed = oom_killed or container_id in self._oom
+            self._oom.discard(container_id)
+            status = {"StatusCode": exit_code, "OOMKilled": oom_killed}
+            
+            # Remembered so watching again (or late) still sees the exit
+            self._recent[container_id] = status
+            while len(self._recent) > RECENT_EXITS:
+                self._recent.popitem(last=False)
+            
+            future = self._pending.pop(container_id, None)
+            
+        if future is not None and not future.done():
+            future.set_result(status)
+    
+    def _reconcile(self):
+        """Check watched containers directly after an events stream gap."""
+        with self._lock:
+            pending = list(self._pending)
+        
+        for container_id in pending:
+            try:
+                state = self.client.api.inspect_container(container_id)["State"]
+            except Exception as e:
+                with self._lock:
+                    future = self._pending.pop(container_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                continue
+            
+            if not state.get("Running"):
+                self._resolve(container_id, state.get("ExitCode", -1), state.get("OOMKilled", False))
+    
+    def watch(self, container_id):
+        """
+        Get a future for a container's exit.
+        
+        Args:
+            container_id: Full ID of a container with the tracked label
+            
+        Returns:
+            Future resolving to {"StatusCode": int, "OOMKilled": bool}, the
+            same shape as container.wait()
+        """
+        with self._lock:
+            future = self._pending.get(container_id)
+            if future is not None:
+                return future
+            
+            future = Future()
+            status = self._recent.get(container_id)
+            if status is None:
+                self._pending[container_id] = future
+                
+        if status is not None:
+            future.set_result(status)
+        return future
+    
+    def forget(self, container_id):
+        """Stop watching a container (e.g. after giving up on it)."""
+        with self._lock:
+            future = self._pending.pop(container_id, None)
+            self._recent.pop(container_id, None)
+        if future is not None:
+            future.cancel()
+    
+    def wait(self, container_id, timeout=None):
+        """
+        Block until a container exits.
+        
+        Args:
+            container_id: Full ID of a container with the tracked label
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            Dictionary with StatusCode and OOMKilled
+            
+        Raises:
+            concurrent.futures.TimeoutError: If the container is still running
+        """
+        future = self.watch(container_id)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            self.forget(container_id)
+            raise
+    
+    def close(self):
+        """Stop listening and fail any futures still waiting."""
+        self._closed = True
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("Container completion tracker closed"))
\ No newline at end of file
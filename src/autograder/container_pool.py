@@ -0,0 +1,259 @@
+"""
+Warm Container Pool for Tool Grader
+
+This module keeps a set of pre-started, network-less grading containers
+idle so a submission can be graded without paying for container create,
+start and teardown. Each submission is streamed into a container and graded
+in a fresh child process; containers are replaced after a configurable
+number of uses.
+"""
+
+import os
+import socket
+import logging
+import threading
+
+from .docker_streams import STDOUT, send_stdin, iter_frames, close_socket
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Label holding the owner of a pooled container, as "hostname:pid"
+POOL_LABEL = "tool-grader.pool"
+
+# Fails if any process besides the container's init (PID 1) and this shell
+# is left, e.g. one a submission started in the background. Uses only shell
+# builtins, so it doesn't start processes of its own.
+LEFTOVER_CHECK = (
+    'for p in /proc/[0-9]*; do n=${p#/proc/}; '
+    '[ "$n" = 1 ] || [ "$n" = $$ ] || exit 1; done'
+)
+
+
+def pool_owner():
+    """
+    Identify this process as the owner of pooled containers.
+    
+    A PID alone is ambiguous: grader processes on the host and in other
+    containers share one Docker daemon but not a PID namespace, so the
+    hostname says where the PID means something.
+    
+    Returns:
+        String "hostname:pid"
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ContainerPool:
+    """Pool of idle grading containers that are reused across submissions."""
+    
+    def __init__(self, client, image, size, max_uses, container_options=None):
+        """
+        Initialize the container pool.
+        
+        Args:
+            client: Docker client
+            image: Docker image to start containers from
+            size: Number of idle containers to keep ready
+            max_uses: Number of submissions a container grades before it is replaced
+            container_options: Extra keyword arguments for containers.run
+                (resource limits, security options)
+        """
+        self.client = client
+        self.image = image
+        self.size = size
+        self.max_uses = max_uses
+        self.container_options = container_options or {}
+        
+        self._idle = []
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "cold_starts": 0,
+            "recycled": 0
+        }
+    
+    def start(self):
+        """Start containers until the pool is full."""
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) >= self.size:
+                    return
+            container = self._start_container()
+            with self._lock:
+                self._idle.append(container)
+    
+    def _start_container(self):
+        """
+        Start an idle container that waits for work.
+        
+        Returns:
+            Docker container object
+        """
+        options = dict(self.container_options)
+        # Pooled containers idle for a long time; mark them so the reaper
+        # only removes them once the owning process is gone
+        options["labels"] = dict(options.get("labels") or {}, **{POOL_LABEL: pool_owner()})
+        container = self.client.containers.run(
+            image=self.image,
+            command=["sleep", "infinity"],
+            detach=True,
+            **options
+        )
+        with self._lock:
+            self._uses[container.id] = 0
+            self.stats["cold_starts"] += 1
+        return container
+    
+    def acquire(self):
+        """
+        Take a container from the pool, starting one if none are idle.
+        
+        Returns:
+            Docker container object
+        """
+        with self._lock:
+            if self._idle:
+                self.stats["hits"] += 1
+                return self._idle.pop()
+            self.stats["misses"] += 1
+        return self._start_container()
+    
+    def release(self, container, healthy=True):
+        """
+        Return a container to the pool.
+        
+        Containers that failed, or have reached max_uses, are removed and a
+        fresh one is started in the background.
+        
+        Args:
+            container: Container returned by acquire
+            healthy: False if the container may be in a bad state
+        """
+        with self._lock:
+            self._uses[container.id] = self._uses.get(container.id, 0) + 1
+            keep = (
+                healthy
+                and not self._closed
+                and self._uses[container.id] < self.max_uses
+                and len(self._idle) < self.size
+            )
+            if keep:
+                self._idle.append(container)
+                return
+            self._uses.pop(container.id, None)
+            self.stats["recycled"] += 1
+            
+        self._discard(container)
+        if not self._closed:
+            threading.Thread(target=self._refill, daemon=True).start()
+    
+    def _refill(self):
+        """Top the pool back up, logging instead of raising."""
+        try:
+            self.start()
+        except Exception as e:
+            logger.error(f"Failed to refill container pool: {e}")
+    
+    def _discard(self, container):
+        """Remove a container, ignoring containers that are already gone."""
+        try:
+            container.remove(force=True, v=True)
+        except Exception as e:
+            logger.warning(f"Failed to remove pooled container {container.id[:12]}: {e}")
+    
+    def run(self, archive, command, timeout, stdout, stderr, cpuset=None):
+        """
+        Grade a submission in a pooled container.
+        
+        The grading command is started with exec and the submission archive
+        is written to its stdin; its stdout and stderr are streamed into the
+        given buffers as they arrive. Killing the command on timeout doesn't
+        kill processes it started, so afterwards the container is checked
+        and only reused if the grading process left nothing running (the
+        next submission would otherwise share it with those processes).
+        
+        Args:
+            archive: Tar archive of the submission (bytes)
+            command: Command (list) that reads the archive from stdin and grades it
+            timeout: Time limit in seconds for the grading process
+            stdout: Buffer (with a write method) for the process's stdout
+            stderr: Buffer for the process's stderr
+            cpuset: CPUs to pin the container to while it grades (Docker
+                cpuset_cpus format), or None to leave it as it is
+            
+        Returns:
+            Tuple of (exit code, stdout, stderr)
+        """
+        container = self.acquire()
+        healthy = False
+        try:
+            if cpuset:
+                container.update(cpuset_cpus=cpuset)
+            api = self.client.api
+            exec_id = api.exec_create(
+                container.id,
+                ["timeout", "-s", "KILL", str(timeout)] + command,
+                stdin=True,
+                stdout=True,
+                stderr=True,
+                workdir="/tmp"
+            )["Id"]
+            
+            sock = api.exec_start(exec_id, socket=True)
+            try:
+                send_stdin(sock, archive)
+                for stream_id, data in iter_frames(sock):
+                    (stdout if stream_id == STDOUT else stderr).write(data)
+            finally:
+                close_socket(sock)
+            
+            exit_code = api.exec_inspect(exec_id)["ExitCode"]
+            healthy = exit_code == 0 and self._is_clean(container)
+            return exit_code, stdout, stderr
+        finally:
+            self.release(container, healthy)
+    
+    def _is_clean(self, container):
+        """
+        Check that no processes are left in a container after grading.
+        
+        Args:
+            container: Container a submission was graded in
+            
+        Returns:
+            True if only the container's idle process is running
+        """
+        api = self.client.api
+        try:
+            exec_id = api.exec_create(container.id, ["sh", "-c", LEFTOVER_CHECK])["Id"]
+            api.exec_start(exec_id)
+            clean = api.exec_inspect(exec_id)["ExitCode"] == 0
+        except Exception as e:
+            logger.warning(f"Failed to check pooled container {container.id[:12]}: {e}")
+            return False
+        if not clean:
+            logger.warning(f"Submission left processes running in {container.id[:12]}; replacing it")
+        return clean
+    
+    def close(self):
+        """Remove every idle container and stop refilling."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for container in idle:
+            self._discard(container)
+    
+    def get_stats(self):
+        """
+        Get pool usage counters.
+        
+        Returns:
+            Dictionary with hits, misses, cold_starts, recycled and idle counts
+        """
+        with self._lock:
+            return dict(self.stats, idle=len(self._idle), size=self.size)
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+CPU Slot Allocation for Tool Grader
+
+This module splits the host's CPUs into disjoint slots and hands one to each
+running submission, so grading containers are pinned to their own cores
+instead of migrating between cores and competing for the same caches. That
+keeps timings repeatable when many submissions run at once.
+"""
+
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from .host import host_cpus, cpu_topology
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_shared = {}
+
+
+def shared_cpu_slots(slot_cpus, cpus=None, topology=None):
+    """
+    Get the process-wide slot allocator for a slot size and set of CPUs.
+    
+    Every runner in a process must draw from the same allocator, or two
+    runners could hand out the same CPUs.
+    
+    Args:
+        slot_cpus: Number of CPUs per slot
+        cpus: CPU IDs to divide up (default: those this process may use)
+        topology: Dictionary of CPU ID to (package, core) (default: detected)
+        
+    Returns:
+        CpuSlots instance
+    """
+    key = (slot_cpus, tuple(cpus) if cpus is not None else None)
+    with _lock:
+        if key not in _shared:
+            _shared[key] = CpuSlots(slot_cpus, cpus, topology)
+        return _shared[key]
+
+
+class CpuSlots:
+    """Hands out disjoint sets of CPUs to concurrently running submissions."""
+    
+    def __init__(self, slot_cpus, cpus=None, topology=None):
+        """
+        Initialize the slots.
+        
+        Args:
+            slot_cpus: Number of CPUs per slot
+            cpus: CPU IDs to divide up (default: those this process may use)
+            topology: Dictionary of CPU ID to (package, core) (default: detected)
+        """
+        cpus = host_cpus() if cpus is None else list(cpus)
+        topology = cpu_topology(cpus) if topology is None else topology
+        self.slot_cpus = max(1, int(slot_cpus))
+        
+        # Keep hyperthreads of a core next to each other, so a slot of two
+        # CPUs gets one whole core rather than halves of two
+        ordered = sorted(cpus, key=lambda cpu: (topology.get(cpu, (-1, cpu)), cpu))
+        self.slots = [
+            tuple(ordered[i:i + self.slot_cpus])
+            for i in range(0, len(ordered) - self.slot_cpus + 1, self.slot_cpus)
+        ]
+        if not self.slots:
+            # Fewer CPUs than one slot needs: share them all
+            self.slots = [tuple(ordered)]
+        self._cores = [{topology.get(cpu, (-1, cpu)) for cpu in slot} for slot in self.slots]
+        
+        self._free = set(range(len(self.slots)))
+        self._busy_since = {}
+        self._condition = threading.Condition()
+        self._started = time.monotonic()
+        
+        self.stats = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_seconds": 0.0,
+            "busy_seconds": 0.0
+        }
+    
+    def cpuset(self, index):
+        """
+        Get a slot's CPUs in Docker's cpuset_cpus format.
+        
+        Args:
+            index: Slot index from acquire
+            
+        Returns:
+            String such as "2,3"
+        """
+        return ",".join(str(cpu) for cpu in self.slots[index])
+    
+    def _pick(self):
+        """Choose the free slot that shares the fewest cores with busy slots."""
+        busy_cores = Counter(
+            core for index in self._busy_since for core in self._cores[index]
+        )
+        return min(
+            self._free,
+            key=lambda index: (sum(busy_cores[core] for core in self._cores[index]), index)
+        )
+    
+    def acquire(self, timeout=None):
+        """
+        Take a free slot, waiting for one if they're all in use.
+        
+        Args:
+            timeout: Seconds to wait (None: wait indefinitely)
+        
+        Returns:
+            Slot index
+            
+        Raises:
+            TimeoutError: If no slot became free in time
+        """
+        start = time.monotonic()
+        with self._condition:
+            if not self._free:
+                self.stats["waited"] += 1
+                if not self._condition.wait_for(lambda: self._free, timeout):
+                    raise TimeoutError(f"No free CPU slot after {timeout} seconds")
+                self.stats["wait_seconds"] += time.monotonic() - start
+                
+            index = self._pick()
+            self._free.remove(index)
+            self._busy_since[index] = time.monotonic()
+            self.stats["acquired"] += 1
+            return index
+    
+    def release(self, index):
+        """
+        Return a slot.
+        
+        Args:
+            index: Slot index from acquire
+        """
+        with self._condition:
+            self.stats["busy_seconds"] += time.monotonic() - self._busy_since.pop(index)
+            self._free.add(index)
+            self._condition.notify()
+    
+    @contextmanager
+    def slot(self, timeout=None):
+        """
+        Hold a slot for the duration of a with block.
+        
+        Yields:
+            The slot's CPUs in Docker's cpuset_cpus format
+        """
+        index = self.acquire(timeout)
+        try:
+            yield self.cpuset(index)
+        finally:
+            self.release(index)
+    
+    def get_stats(self):
+        """
+        Get slot counters.
+        
+        Returns:
+            Dictionary with slot counts, waits and utilization (the fraction
+            of slot time spent running submissions since the slots were created)
+        """
+        with self._condition:
+            now = time.monotonic()
+            busy_seconds = self.stats["busy_seconds"] + sum(
+                now - since for since in self._busy_since.values()
+            )
+            elapsed = (now - self._started) * len(self.slots)
+            
+            stats = dict(self.stats)
+            stats.update({
+                "slots": len(self.slots),
+                "slot_cpus": self.slot_cpus,
+                "busy": len(self._busy_since),
+                "busy_seconds": busy_seconds,
+                "utilization": busy_seconds / elapsed if elapsed > 0 else 0.0
+            })
+            return stats
\ No newline at end of file
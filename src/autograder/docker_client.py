@@ -0,0 +1,189 @@
+"""
+Shared Docker Connections for Tool Grader
+
+This module keeps one Docker client (with a connection pool), one image
+lookup cache, one builder for assignment images, one container completion
+tracker and the daemon's pinnable CPUs per process, so that creating a
+DockerRunner for every request or submission doesn't open new connections,
+event streams or re-inspect the grading image or the daemon.
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+
+from .config import get_config
+from .host import host_cpus
+from .container_events import ContainerCompletionTracker
+from .assignment_images import AssignmentImages
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Reentrant: factories get the objects they're built on (e.g. the client)
+_lock = threading.RLock()
+_shared = {}
+
+
+def _shared_object(name, factory):
+    """
+    Get a per-process shared object, creating it on first use.
+    
+    Objects are recreated after a fork, because connections and threads
+    don't survive into the child.
+    """
+    with _lock:
+        pid, value = _shared.get(name, (None, None))
+        if pid != os.getpid():
+            value = factory()
+            _shared[name] = (os.getpid(), value)
+        return value
+
+
+def get_docker_client():
+    """
+    Get the process-wide Docker client.
+    
+    Returns:
+        docker.DockerClient
+    """
+    def create():
+        # Imported here so the caches below work without the Docker SDK
+        import docker
+        pool_size = get_config().get("docker", "client_pool_size", 32)
+        return docker.from_env(max_pool_size=pool_size)
+    
+    return _shared_object("client", create)
+
+
+def get_image_cache():
+    """
+    Get the process-wide image lookup cache.
+    
+    Returns:
+        ImageCache using the shared client
+    """
+    ttl = get_config().get("docker", "image_cache_ttl", 60)
+    return _shared_object("images", lambda: ImageCache(get_docker_client(), ttl))
+
+
+def get_assignment_images():
+    """
+    Get the process-wide builder for per-assignment dependency images.
+    
+    Returns:
+        AssignmentImages using the shared client and image cache
+    """
+    return _shared_object(
+        "assignment_images", lambda: AssignmentImages(get_docker_client(), get_image_cache())
+    )
+
+
+def get_completion_tracker():
+    """
+    Get the process-wide container completion tracker, started.
+    
+    Returns:
+        ContainerCompletionTracker using the shared client
+    """
+    def create():
+        tracker = ContainerCompletionTracker(get_docker_client())
+        tracker.start()
+        return tracker
+    
+    return _shared_object("tracker", create)
+
+
+def get_daemon_cpus():
+    """
+    Get the CPUs the shared client's Docker daemon can pin containers to.
+    
+    Returns:
+        Tuple of (CPU IDs, topology), as from daemon_cpus
+    """
+    return _shared_object("daemon_cpus", lambda: daemon_cpus(get_docker_client()))
+
+
+def daemon_cpus(client):
+    """
+    Get the CPUs the Docker daemon can pin containers to.
+    
+    The grader's own CPUs are only meaningful when the daemon runs on the
+    same host; a remote DOCKER_HOST or Docker Desktop's VM has its own.
+    
+    Args:
+        client: Docker client
+        
+    Returns:
+        Tuple of (CPU IDs, topology): topology is None when the daemon is
+        local (detect it from this host), or {} when it's elsewhere and
+        unknown (every CPU counts as its own core)
+    """
+    info = client.info()
+    # Local sockets (unix or named pipe) show up as http+docker:// URLs
+    local_socket = client.api.base_url.startswith("http+docker://")
+    if local_socket and info.get("Name") == socket.gethostname():
+        return host_cpus(), None
+    return list(range(info.get("NCPU") or 1)), {}
+
+
+class ImageCache:
+    """Caches image name to image ID lookups for a limited time."""
+    
+    def __init__(self, client, ttl=60):
+        """
+        Initialize the cache.
+        
+        Args:
+            client: Docker client
+            ttl: Seconds before an image name is looked up again, so a tag
+                that was moved (e.g. by a rebuild) is picked up
+        """
+        self.client = client
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+    
+    def resolve(self, image):
+        """
+        Get the ID of the image a name currently refers to.
+        
+        Args:
+            image: Image name, e.g. "python-autograder:latest"
+            
+        Returns:
+            Image ID (sha256 digest of the image config)
+        
+        Raises:
+            docker.errors.ImageNotFound: If the image doesn't exist
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(image)
+            if entry is not None and now - entry[1] < self.ttl:
+                return entry[0]
+        
+        image_id = self.client.images.get(image).id
+        with self._lock:
+            self.lookups += 1
+            previous = self._entries.get(image)
+            if previous is not None and previous[0] != image_id:
+                logger.info(f"Image '{image}' now refers to {image_id[:19]}")
+            self._entries[image] = (image_id, now)
+        return image_id
+    
+    def invalidate(self, image=None):
+        """
+        Forget a cached lookup, or all of them.
+        
+        Args:
+            image: Image name, or None to clear everything
+        """
+        with self._lock:
+            if image is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(image, None)
\ No newline at end of file
@@ -5,29 +5,60 @@ This module handles running code in Docker containers for secure execution.
 """
 
 import os
+import math
+import time
+import asyncio
 import tempfile
 import json
 import logging
+import functools
+import contextlib
 from pathlib import Path
 
-import docker
+import requests
 from docker.errors import ContainerError, ImageNotFound
+from docker.types import Ulimit
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 from .config import get_config
+from .runner import BaseRunner, harness_command, runner_results, stream_results, record_wall_time
+from .resources import resource_usage
+from .container_pool import ContainerPool
+from .cpu_slots import shared_cpu_slots
+from .container_events import GRADER_LABEL
+from .reaper import TEMP_PREFIX
+from .docker_client import (
+    get_docker_client, get_image_cache, get_assignment_images, get_completion_tracker, get_daemon_cpus
+)
+from .assignment_images import assignment_dependencies
+from .docker_streams import CappedBuffer, tar_directory, send_stdin, close_socket
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
-class DockerRunner:
+def _is_wait_timeout(error):
+    """Check whether waiting for a container failed because it ran too long."""
+    return isinstance(error, (FutureTimeoutError, requests.exceptions.Timeout,
+                              requests.exceptions.ConnectionError))
+
+
+class DockerRunner(BaseRunner):
     """Runs code in Docker containers for security and isolation."""
     
+    backend = "docker"
+    
     def __init__(
         self,
         docker_image=None,
         memory_limit=None,
         cpu_limit=None,
-        timeout=None
+        timeout=None,
+        pool_size=None,
+        pool_max_uses=None,
+        transport=None,
+        max_concurrency=None,
+        completion_events=None
     ):
         """
         Initialize the Docker runner.
@@ -37,38 +68,549 @@ class DockerRunner:
             memory_limit: Memory limit for the container
             cpu_limit: CPU limit for the container
             timeout: Timeout in seconds
+            pool_size: Number of warm containers to keep (0 disables the pool)
+            pool_max_uses: Submissions graded per pooled container before it is replaced
+            transport: "stream" to send submissions on stdin and read results from
+                stdout, or "bind" to bind-mount temp directories
+            max_concurrency: Maximum containers run_doctest_async runs at once
+                (0 or None: as many as fit in host CPUs and memory)
+            completion_events: Detect container exits from one Docker events
+                stream instead of a blocking wait() per container
         """
+        super().__init__(memory_limit, cpu_limit, timeout, max_concurrency)
         config = get_config()
         
         self.docker_image = docker_image or config.get("docker", "image")
-        self.memory_limit = memory_limit or config.get("docker", "memory_limit")
-        self.cpu_limit = cpu_limit or config.get("docker", "cpu_limit")
-        self.timeout = timeout or config.get("docker", "timeout")
+        self.pool_size = pool_size if pool_size is not None else config.get("docker", "pool_size", 0)
+        self.pool_max_uses = pool_max_uses or config.get("docker", "pool_max_uses", 20)
+        self.transport = transport or config.get("docker", "transport", "stream")
+        self.pids_limit = config.get("docker", "pids_limit", 64)
+        self.read_only = config.get("docker", "read_only", True)
+        self.tmpfs_size = config.get("docker", "tmpfs_size", "64m")
         
-        self.client = docker.from_env()
+        if completion_events is None:
+            completion_events = config.get("docker", "completion_events", True)
+        
+        # Connections, image lookups and the events stream are shared by
+        # every runner in the process
+        self.client = get_docker_client()
+        self.images = get_image_cache()
+        self.assignment_images = get_assignment_images()
+        
+        # Pin each container to its own CPUs of the daemon's host; more
+        # containers than slots would only queue for one
+        self.cpu_slots = None
+        if config.get("docker", "cpu_pinning", True):
+            cpus, topology = get_daemon_cpus()
+            self.cpu_slots = shared_cpu_slots(math.ceil(self.cpu_limit), cpus, topology)
+            self.max_concurrency = min(self.max_concurrency, len(self.cpu_slots.slots))
         
         # Verify the Docker image exists
         try:
-            self.client.images.get(self.docker_image)
+            self.images.resolve(self.docker_image)
         except ImageNotFound:
             logger.error(f"Docker image '{self.docker_image}' not found. Did you build it?")
             raise
+        
+        # One events subscription replaces a wait() request per container
+        self.tracker = get_completion_tracker() if completion_events else None
+        
+        # Keep warm containers ready if pooling is enabled
+        self.pool = None
+        self.pool_dependencies = []
+        if self.pool_size:
+            self._start_pool(self._image())
+    
+    def _start_pool(self, image):
+        """Start a pool of warm containers from an image."""
+        self.pool = ContainerPool(
+            self.client,
+            image,
+            self.pool_size,
+            self.pool_max_uses,
+            self._container_options()
+        )
+        self.pool.start()
     
-    def run_doctest(self, code_path, module_name=None):
+    def _container_options(self, cpuset=None):
         """
-        Run doctest on code inside a Docker container.
+        Get resource limits and security options shared by all grading containers.
+        
+        Args:
+            cpuset: CPUs to pin the container to (Docker cpuset_cpus format)
+        
+        Returns:
+            Dictionary of keyword arguments for containers.run
+        """
+        options = {
+            "mem_limit": self.memory_limit,
+            "cpu_quota": int(100000 * self.cpu_limit),  # Docker uses microseconds
+            "pids_limit": self.pids_limit,  # Stops fork bombs
+            "network_mode": "none",  # No network access
+            "cap_drop": ["ALL"],     # Drop all capabilities
+            "security_opt": ["no-new-privileges:true"],
+            "read_only": self.read_only,
+            "ulimits": [
+                Ulimit(name="nofile", soft=self.nofile_limit, hard=self.nofile_limit),
+                Ulimit(name="fsize", soft=self.file_size_limit, hard=self.file_size_limit),
+                Ulimit(name="core", soft=0, hard=0)
+            ],
+            "labels": {GRADER_LABEL: "1"}
+        }
+        if cpuset:
+            options["cpuset_cpus"] = cpuset
+        if self.tmpfs_size:
+            # Scratch space (where streamed submissions are unpacked); it is
+            # memory-backed and counts towards the memory limit
+            options["tmpfs"] = {"/tmp": f"rw,nosuid,nodev,size={self.tmpfs_size},mode=1777"}
+        return options
+    
+    def resource_limits(self):
+        """
+        Get the limits each container is held to, for the resources entry.
+        
+        Returns:
+            Dictionary of limit names and values
+        """
+        limits = super().resource_limits()
+        limits.update({
+            "pids_limit": self.pids_limit,
+            "read_only": self.read_only,
+            "tmpfs_size": self.tmpfs_size
+        })
+        return limits
+    
+    def _image(self, assignment_config=None):
+        """
+        Get the ID of the grading image, looking the tag up at most once per TTL.
+        
+        Assignments that declare dependencies get a derived image with them
+        installed, built the first time it's needed. Containers are created
+        from the ID, so a batch keeps using one image even if the tag is
+        moved while it runs.
+        """
+        return self.assignment_images.image_for(self.docker_image, assignment_config)
+    
+    def prepare(self, assignment_config=None):
+        """
+        Build or find the assignment's grading image before grading starts.
+        
+        With pooling enabled, the pool is restarted on the assignment's image
+        if it needs different dependencies.
+        
+        Args:
+            assignment_config: Assignment-specific configuration
+            
+        Returns:
+            ID of the image submissions will be graded with
+        """
+        image = self._image(assignment_config)
+        dependencies = assignment_dependencies(assignment_config)
+        
+        if self.pool and dependencies != self.pool_dependencies:
+            self.pool.close()
+            self._start_pool(image)
+            self.pool_dependencies = dependencies
+        return image
+    
+    def _pooled(self, assignment_config=None):
+        """Check whether the pool's image can grade an assignment."""
+        if self.pool is None:
+            return False
+        try:
+            return assignment_dependencies(assignment_config) == self.pool_dependencies
+        except ValueError:
+            # Let the unpooled path report the invalid configuration
+            return False
+    
+    def close(self):
+        """Release pooled containers and worker threads (shared connections stay open)."""
+        if self.pool:
+            self.pool.close()
+        super().close()
+    
+    def get_pool_stats(self):
+        """
+        Get warm pool counters.
+        
+        Returns:
+            Dictionary with hits, misses and cold starts, or None if pooling is off
+        """
+        return self.pool.get_stats() if self.pool else None
+    
+    def get_cpu_slot_stats(self):
+        """
+        Get CPU slot counters.
+        
+        Returns:
+            Dictionary with slot utilization and waits, or None if pinning is off
+        """
+        return self.cpu_slots.get_stats() if self.cpu_slots else None
+    
+    async def _run_async(self, loop, code_path, module_name=None, assignment_config=None):
+        """
+        Run one submission once a concurrency slot is free.
+        
+        With the completion tracker, streamed runs don't hold a thread while
+        the container runs.
+        """
+        if self.tracker and not self._pooled(assignment_config) and self.transport == "stream":
+            start = time.perf_counter()
+            slot = await self._acquire_slot_async(loop) if self.cpu_slots else None
+            try:
+                cpuset = self.cpu_slots.cpuset(slot) if slot is not None else None
+                results = await self._run_streamed_async(
+                    loop, code_path, module_name, assignment_config, cpuset
+                )
+            finally:
+                if slot is not None:
+                    self.cpu_slots.release(slot)
+            return record_wall_time(results, start, self._run_limits(cpuset))
+        return await super()._run_async(loop, code_path, module_name, assignment_config)
+    
+    async def _acquire_slot_async(self, loop):
+        """Take a CPU slot without blocking the event loop."""
+        # Slots are shared with synchronous callers, so this may have to wait
+        future = loop.run_in_executor(self._get_executor(), self.cpu_slots.acquire)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Give the slot back once the thread gets it
+            future.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or self.cpu_slots.release(f.result())
+            )
+            raise
+    
+    async def _run_streamed_async(self, loop, code_path, module_name=None, assignment_config=None,
+                                  cpuset=None):
+        """
+        Run a streamed container, holding a thread only to start it and read its output.
+        
+        While the container runs, the coroutine waits on the completion
+        tracker's future instead of a blocking wait() request.
+        
+        Args:
+            loop: Running event loop
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            cpuset: CPUs to pin the container to
+            
+        Returns:
+            Dict containing test results
+        """
+        try:
+            container = await loop.run_in_executor(
+                self._get_executor(),
+                functools.partial(
+                    self._launch_streamed, code_path, module_name, assignment_config, cpuset
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to run tests: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Failed to run tests: {str(e)}",
+                'output': None
+            }
+        
+        try:
+            status = await asyncio.wait_for(
+                asyncio.wrap_future(self.tracker.watch(container.id)),
+                self.timeout
+            )
+        except (Exception, asyncio.CancelledError) as e:
+            self.tracker.forget(container.id)
+            await loop.run_in_executor(self._get_executor(), self._kill_and_remove, container)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return {
+                'success': False,
+                'error': f"Execution timed out or failed: {str(e) or type(e).__name__}",
+                'output': None,
+                'resources': resource_usage(timed_out=isinstance(e, asyncio.TimeoutError))
+            }
+        
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(),
+                self._collect_streamed, container, status
+            )
+        except Exception as e:
+            logger.error(f"Failed to run tests: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Failed to run tests: {str(e)}",
+                'output': None
+            }
+    
+    def _kill_and_remove(self, container):
+        """Kill a container that is still running and remove it."""
+        try:
+            container.kill()
+        except Exception:
+            pass
+        self._remove_container(container)
+    
+    def _run_in_pool(self, code_path, module_name=None, assignment_config=None, cpuset=None):
+        """
+        Run doctest in a warm container from the pool.
         
         Args:
             code_path: Path to directory containing code
             module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            cpuset: CPUs to pin the container to while it grades this submission
+            
+        Returns:
+            Dict containing test results
+        """
+        start = time.perf_counter()
+        try:
+            exit_code, stdout, stderr = self.pool.run(
+                tar_directory(code_path),
+                harness_command(module_name, assignment_config),
+                self.timeout,
+                CappedBuffer(self.max_output_bytes),
+                self._output_buffer(),
+                cpuset
+            )
+        except Exception as e:
+            logger.error(f"Failed to run tests in pooled container: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Failed to run tests: {str(e)}",
+                'output': None
+            }
+        
+        results = stream_results(exit_code, stdout, stderr)
+        # 'timeout -s KILL' exits with 128 + SIGKILL
+        results['resources']['timed_out'] = (
+            exit_code == 137 and time.perf_counter() - start >= self.timeout
+        )
+        return results
+        
+    def _launch_streamed(self, code_path, module_name=None, assignment_config=None, cpuset=None):
+        """
+        Start a new grading container and send it the submission.
+        
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            cpuset: CPUs to pin the container to
+            
+        Returns:
+            Docker container object (running)
+        """
+        archive = tar_directory(code_path)
+        
+        options = dict(
+            command=harness_command(module_name, assignment_config),
+            working_dir="/tmp",
+            stdin_open=True,      # Stdin closes once the archive is sent
+            **self._container_options(cpuset)
+        )
+        try:
+            container = self.client.containers.create(image=self._image(assignment_config), **options)
+        except ImageNotFound:
+            # The cached ID was removed (e.g. by a rebuild and prune); look it up again
+            self.images.invalidate()
+            self.assignment_images.invalidate()
+            container = self.client.containers.create(image=self._image(assignment_config), **options)
+        
+        try:
+            # Watch and attach before starting so no exit or input is lost
+            if self.tracker:
+                self.tracker.watch(container.id)
+            sock = container.attach_socket(params={'stdin': 1, 'stream': 1})
+            container.start()
+            try:
+                send_stdin(sock, archive)
+            finally:
+                close_socket(sock)
+        except Exception:
+            self._remove_container(container)
+            raise
+        
+        return container
+    
+    def _wait_container(self, container):
+        """
+        Wait for a container to exit, killing it if it runs past the timeout.
+        
+        Returns:
+            Dictionary with StatusCode and OOMKilled
+        """
+        try:
+            if self.tracker:
+                return self.tracker.wait(container.id, timeout=self.timeout)
+            status = container.wait(timeout=self.timeout)
+            if status['StatusCode'] != 0:
+                container.reload()
+                return {
+                    'StatusCode': status['StatusCode'],
+                    'OOMKilled': container.attrs['State'].get('OOMKilled', False)
+                }
+            return {'StatusCode': 0, 'OOMKilled': False}
+        except BaseException:
+            # Try to kill the container if it's still running
+            try:
+                container.kill()
+            except Exception:
+                pass
+            raise
+    
+    def _collect_streamed(self, container, status):
+        """
+        Read a finished container's output and remove it.
+        
+        Args:
+            container: Docker container object
+            status: Exit status from _wait_container or the completion tracker
+            
+        Returns:
+            Dict containing test results
+        """
+        try:
+            stdout = CappedBuffer(self.max_output_bytes)
+            for chunk in container.logs(stdout=True, stderr=False, stream=True):
+                stdout.write(chunk)
+                if stdout.truncated:
+                    break
+            stderr = self._output_buffer()
+            for chunk in container.logs(stdout=False, stderr=True, stream=True):
+                stderr.write(chunk)
+            
+            results = stream_results(status['StatusCode'], stdout, stderr)
+            results['resources']['oom_killed'] = status.get('OOMKilled', False)
+            if results['resources']['oom_killed'] and "error" in results:
+                results['error'] = f"Memory limit of {self.memory_limit} exceeded"
+            return results
+        finally:
+            self._remove_container(container)
+    
+    def _read_logs(self, container):
+        """
+        Stream a container's stdout and stderr into head/tail buffers.
+        
+        Returns:
+            Tuple of (stdout HeadTailBuffer, stderr HeadTailBuffer)
+        """
+        stdout = self._output_buffer()
+        for chunk in container.logs(stdout=True, stderr=False, stream=True):
+            stdout.write(chunk)
+        stderr = self._output_buffer()
+        for chunk in container.logs(stdout=False, stderr=True, stream=True):
+            stderr.write(chunk)
+        return stdout, stderr
+    
+    def _remove_container(self, container):
+        """Remove a container, logging instead of raising."""
+        try:
+            container.remove(force=True, v=True)
+        except Exception as e:
+            logger.warning(f"Failed to remove container {container.id[:12]}: {e}")
+    
+    def _run_streamed(self, code_path, module_name=None, assignment_config=None, cpuset=None):
+        """
+        Run doctest in a new container without touching the host filesystem.
+        
+        The submission is sent as an in-memory tar on the container's stdin
+        and the results come back as NDJSON on its stdout.
+        
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            cpuset: CPUs to pin the container to
+            
+        Returns:
+            Dict containing test results
+        """
+        try:
+            container = self._launch_streamed(code_path, module_name, assignment_config, cpuset)
+        except Exception as e:
+            logger.error(f"Failed to run tests: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Failed to run tests: {str(e)}",
+                'output': None
+            }
+        
+        try:
+            status = self._wait_container(container)
+        except Exception as e:
+            self._remove_container(container)
+            return {
+                'success': False,
+                'error': f"Execution timed out or failed: {str(e) or type(e).__name__}",
+                'output': None,
+                'resources': resource_usage(timed_out=_is_wait_timeout(e))
+            }
+        
+        try:
+            return self._collect_streamed(container, status)
+        except Exception as e:
+            logger.error(f"Failed to run tests: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Failed to run tests: {str(e)}",
+                'output': None
+            }
+    
+    def run_doctest(self, code_path, module_name=None, assignment_config=None):
+        """
+        Grade code inside a Docker container.
+        
+        The container runs the grading harness, so the results have the same
+        per-test and per-error-case detail as test_runner.grade_submission,
+        plus the success, attempted, failed and output summary fields and
+        the run's resource usage.
+        
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
             
         Returns:
             Dict containing test results
         """
         code_path = Path(code_path)
+        start = time.perf_counter()
+        
+        slot = self.cpu_slots.slot() if self.cpu_slots else contextlib.nullcontext()
+        with slot as cpuset:
+            if self._pooled(assignment_config):
+                results = self._run_in_pool(code_path, module_name, assignment_config, cpuset)
+            elif self.transport == "stream":
+                results = self._run_streamed(code_path, module_name, assignment_config, cpuset)
+            else:
+                results = self._run_bound(code_path, module_name, assignment_config, cpuset)
+        
+        return record_wall_time(results, start, self._run_limits(cpuset))
+    
+    def _run_limits(self, cpuset=None):
+        """Get the limits of one run, including the CPUs it was pinned to."""
+        limits = self.resource_limits()
+        limits["cpuset_cpus"] = cpuset
+        return limits
+    
+    def _run_bound(self, code_path, module_name=None, assignment_config=None, cpuset=None):
+        """
+        Run doctest in a new container with the code and results bind-mounted.
         
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            cpuset: CPUs to pin the container to
+            
+        Returns:
+            Dict containing test results
+        """
         # Create temporary directory for results
-        with tempfile.TemporaryDirectory() as temp_dir:
+        with tempfile.TemporaryDirectory(prefix=TEMP_PREFIX) as temp_dir:
             temp_path = Path(temp_dir)
             results_file = temp_path / "results.json"
             
@@ -92,45 +634,46 @@ class DockerRunner:
             try:
                 # Run container with resource constraints
                 container = self.client.containers.run(
-                    image=self.docker_image,
+                    image=self._image(assignment_config),
                     volumes=volumes,
                     working_dir="/code",
-                    mem_limit=self.memory_limit,
-                    cpu_quota=int(100000 * self.cpu_limit),  # Docker uses microseconds
-                    network_mode="none",  # No network access
-                    cap_drop=["ALL"],     # Drop all capabilities
-                    security_opt=["no-new-privileges:true"],
                     environment=environment,
-                    command=f"python -c 'import doctest, json, sys; import importlib.util; module_name = \"{module_name or 'main'}\"; spec = importlib.util.spec_from_file_location(module_name, \"/code/{module_name or '*.py'}\"); module = importlib.util.module_from_spec(spec); spec.loader.exec_module(module); result = doctest.testmod(module, verbose=True); json.dump({{'attempted': result.attempted, 'failed': result.failed}}, open(\"/results/results.json\", \"w\"))'",
+                    command=harness_command(
+                        module_name, assignment_config, "/code", "/results/results.json"
+                    ),
                     remove=True,          # Remove container after execution
-                    detach=True
+                    detach=True,
+                    **self._container_options(cpuset)
                 )
                 
                 try:
                     # Wait for container to finish with timeout
-                    exit_code = container.wait(timeout=self.timeout)
-                    container_logs = container.logs().decode('utf-8')
+                    if self.tracker:
+                        exit_code = self.tracker.wait(container.id, timeout=self.timeout)
+                    else:
+                        exit_code = container.wait(timeout=self.timeout)
+                    stdout, stderr = self._read_logs(container)
+                    container_logs = stdout.text()
                     
                     if exit_code['StatusCode'] != 0:
                         logger.error(f"Container exited with code {exit_code['StatusCode']}")
-                        logger.error(f"Container logs: {container_logs}")
+                        logger.error(f"Container logs: {stderr.text()}")
                         return {
                             'success': False,
                             'error': f"Execution failed with code {exit_code['StatusCode']}",
-                            'output': container_logs
+                            'output': container_logs,
+                            'stderr': stderr.text()
                         }
                         
                 except Exception as e:
-                    # Try to kill the container if it's still running
-                    try:
-                        container.kill()
-                    except:
-                        pass
+                    # Kill and remove it now rather than leave it to the reaper
+                    self._kill_and_remove(container)
                     
                     return {
                         'success': False,
                         'error': f"Execution timed out or failed: {str(e)}",
-                        'output': None
+                        'output': None,
+                        'resources': resource_usage(timed_out=_is_wait_timeout(e))
                     }
                 
                 # Read results from the JSON file
@@ -138,12 +681,12 @@ class DockerRunner:
                     with open(results_file, 'r') as f:
                         results = json.load(f)
                     
-                    return {
-                        'success': results.get('failed', 0) == 0,
-                        'attempted': results.get('attempted', 0),
-                        'failed': results.get('failed', 0),
-                        'output': container_logs
-                    }
+                    return runner_results(
+                        results,
+                        container_logs,
+                        stderr.text(),
+                        {"stdout": stdout.truncated_bytes, "stderr": stderr.truncated_bytes}
+                    )
                 else:
                     return {
                         'success': False,
@@ -178,15 +721,27 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run code in Docker container")
     parser.add_argument("path", help="Path to code directory")
     parser.add_argument("--module", help="Specific module to test")
+    parser.add_argument("--config", help="Path to assignment configuration file (JSON)")
     parser.add_argument("--timeout", type=int, help="Timeout in seconds")
+    parser.add_argument("--pool-size", type=int, help="Number of warm containers to keep")
+    parser.add_argument("--transport", choices=["stream", "bind"], help="How to move code and results")
     
     args = parser.parse_args()
     
     # Create Docker runner
-    runner = DockerRunner(timeout=args.timeout)
+    runner = DockerRunner(timeout=args.timeout, pool_size=args.pool_size, transport=args.transport)
+    
+    assignment_config = None
+    if args.config:
+        with open(args.config, 'r') as f:
+            assignment_config = json.load(f)
     
     # Run doctest
-    results = runner.run_doctest(args.path, args.module)
+    try:
+        runner.prepare(assignment_config)
+        results = runner.run_doctest(args.path, args.module, assignment_config)
+    finally:
+        runner.close()
     
     # Print results
     print(json.dumps(results, indent=2))
\ No newline at end of file
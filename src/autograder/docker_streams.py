@@ -0,0 +1,172 @@
+"""
+Container Stream Helpers for Tool Grader
+
+This module moves submissions into grading containers and results out of
+them without touching the host filesystem: submissions are sent as an
+in-memory tar on the container's stdin, and the harness writes grading
+events to stdout as NDJSON.
+"""
+
+import io
+import json
+import socket
+import struct
+import tarfile
+import logging
+from pathlib import Path
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Name of the submission directory inside streamed archives
+SUBMISSION_ARCNAME = "submission"
+
+# Docker multiplexed stream IDs
+STDOUT = 1
+STDERR = 2
+
+
+def _grader_owned(tarinfo):
+    """Make archive members usable by the unprivileged user in the image."""
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = "root"
+    tarinfo.mode = 0o777 if tarinfo.isdir() else 0o644
+    return tarinfo
+
+
+def tar_directory(source_dir, arcname=SUBMISSION_ARCNAME):
+    """
+    Build an in-memory tar archive of a directory.
+    
+    Args:
+        source_dir: Directory to archive
+        arcname: Name of the top-level directory inside the archive
+        
+    Returns:
+        Bytes of the tar archive
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        tar.add(str(Path(source_dir)), arcname=arcname, filter=_grader_owned)
+    return buffer.getvalue()
+
+
+def _raw_socket(sock):
+    """Get the underlying socket from a docker-py attach/exec socket."""
+    return getattr(sock, "_sock", sock)
+
+
+def send_stdin(sock, data):
+    """
+    Write data to a container's stdin and signal end of input.
+    
+    Args:
+        sock: Socket returned by attach_socket or exec_start(socket=True)
+        data: Bytes to send
+    """
+    raw = _raw_socket(sock)
+    raw.sendall(data)
+    try:
+        raw.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+def close_socket(sock):
+    """Close a docker-py socket wrapper and the socket underneath it."""
+    for closable in (sock, _raw_socket(sock)):
+        try:
+            closable.close()
+        except OSError:
+            pass
+
+
+def _recv_exactly(raw, size):
+    """Read exactly size bytes, or fewer if the stream ends."""
+    chunks = []
+    while size > 0:
+        chunk = raw.recv(min(size, 65536))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def iter_frames(sock):
+    """
+    Read a docker multiplexed stream (non-TTY attach or exec).
+    
+    Args:
+        sock: Socket returned by attach_socket or exec_start(socket=True)
+    
+    Yields:
+        Tuples of (stream ID, bytes)
+    """
+    raw = _raw_socket(sock)
+    while True:
+        header = _recv_exactly(raw, 8)
+        if len(header) < 8:
+            return
+        stream_id, size = struct.unpack(">BxxxL", header)
+        data = _recv_exactly(raw, size)
+        if data:
+            yield stream_id, data
+
+
+class CappedBuffer:
+    """Byte buffer that keeps at most max_bytes and counts what it dropped."""
+    
+    def __init__(self, max_bytes):
+        """
+        Initialize the buffer.
+        
+        Args:
+            max_bytes: Maximum number of bytes to keep
+        """
+        self.max_bytes = max_bytes
+        self.truncated_bytes = 0
+        self._chunks = []
+        self._size = 0
+    
+    def write(self, data):
+        """Append data, dropping whatever doesn't fit."""
+        room = self.max_bytes - self._size
+        if room > 0:
+            self._chunks.append(data[:room])
+            self._size += min(room, len(data))
+        self.truncated_bytes += max(0, len(data) - max(room, 0))
+    
+    @property
+    def truncated(self):
+        """True if any data was dropped."""
+        return self.truncated_bytes > 0
+    
+    def getvalue(self):
+        """Get the kept bytes."""
+        return b"".join(self._chunks)
+
+
+def parse_ndjson(data):
+    """
+    Parse NDJSON output, skipping lines that aren't JSON objects.
+    
+    Args:
+        data: Bytes of newline-delimited JSON
+        
+    Returns:
+        List of decoded objects
+    """
+    events = []
+    for line in data.decode('utf-8', errors='replace').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            logger.warning(f"Ignoring non-JSON line in grading output: {line[:80]}")
+            continue
+        if isinstance(event, dict):
+            events.append(event)
+    return events
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+In-Container Grading Harness for Tool Grader
+
+This module is the entry point run inside the grading container. It runs
+the same grading logic as test_runner.grade_submission and writes the full
+results (per-test and per-error-case) as JSON, so sandboxed grading gives
+the same detail as local grading.
+
+Usage:
+    python -m autograder.harness /code --config-json '{...}' --output /results/results.json
+    python -m autograder.harness --stdin-tar --format ndjson --config-json '{...}' < submission.tar
+"""
+
+import os
+import sys
+import json
+import tarfile
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+from .test_runner import grade_submission, iter_grade_events
+from .capture import HeadTailWriter
+from .resources import process_usage
+from .docker_streams import SUBMISSION_ARCNAME
+
+
+def encode_assignment_config(assignment_config):
+    """
+    Serialize an assignment configuration for passing to the harness.
+    
+    Exception classes in error_cases are replaced by their names, which the
+    test runner resolves again inside the container.
+    
+    Args:
+        assignment_config: Assignment-specific configuration
+        
+    Returns:
+        JSON string
+    """
+    def encode_value(value):
+        if isinstance(value, type):
+            return value.__name__
+        return str(value)
+    
+    return json.dumps(assignment_config or {}, default=encode_value)
+
+
+def _extract_stdin_tar(target_dir):
+    """
+    Extract a submission archive read from stdin.
+    
+    Args:
+        target_dir: Directory to extract into
+        
+    Returns:
+        Path to the extracted submission directory
+    """
+    with tarfile.open(fileobj=sys.stdin.buffer, mode="r|") as tar:
+        for member in tar:
+            # Only plain files and directories inside the target
+            if not (member.isfile() or member.isdir()):
+                continue
+            if member.name.startswith(("/", "..")) or "/../" in member.name:
+                continue
+            tar.extract(member, target_dir)
+    return Path(target_dir) / SUBMISSION_ARCNAME
+
+
+def write_events(path, assignment_config, output=None):
+    """
+    Stream grading events as NDJSON on the original stdout (or to a file).
+    
+    Anything the student's code prints outside doctests is captured
+    (head and tail only) and reported in an "output" event; output written
+    straight to file descriptor 1 goes to stderr. Either way stdout carries
+    nothing but events. A final "usage" event reports the CPU time and peak
+    memory of the grading process.
+    
+    Args:
+        path: Path to student submission
+        assignment_config: Assignment-specific configuration
+        output: Path to write the events to instead of stdout
+    """
+    sys.stdout.flush()
+    saved_stdout = os.dup(1)
+    events = open(output, 'w') if output else os.fdopen(os.dup(saved_stdout), 'w')
+    os.dup2(2, 1)
+    student_output = HeadTailWriter()
+    try:
+        with contextlib.redirect_stdout(student_output):
+            for event in iter_grade_events(path, assignment_config):
+                events.write(json.dumps(event) + "\n")
+                events.flush()
+        events.write(json.dumps({
+            "event": "output",
+            "stdout": student_output.getvalue(),
+            "truncated": student_output.truncated_bytes
+        }) + "\n")
+        cpu_seconds, peak_memory_bytes = process_usage()
+        events.write(json.dumps({
+            "event": "usage",
+            "cpu_seconds": cpu_seconds,
+            "peak_memory_bytes": peak_memory_bytes
+        }) + "\n")
+    finally:
+        events.close()
+        # Give file descriptor 1 back, for callers that keep running
+        os.dup2(saved_stdout, 1)
+        os.close(saved_stdout)
+
+
+def main(argv=None):
+    """Harness entry point."""
+    parser = argparse.ArgumentParser(description="Grade a submission inside the grading container")
+    parser.add_argument("path", nargs="?", help="Path to student submission (file or directory)")
+    parser.add_argument("--stdin-tar", action="store_true",
+                        help="Read the submission as a tar archive from stdin instead of path")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="Write one JSON document, or stream NDJSON events to stdout")
+    parser.add_argument("--config-json", help="Assignment configuration as a JSON string")
+    parser.add_argument("--main-file", help="File to grade when path is a directory")
+    parser.add_argument("--output", help="Path to write results JSON (default: stdout)")
+    
+    args = parser.parse_args(argv)
+    
+    assignment_config = json.loads(args.config_json) if args.config_json else {}
+    if args.main_file:
+        assignment_config["main_file"] = args.main_file
+        
+    if args.stdin_tar:
+        # Don't leave submissions behind in reused containers
+        with tempfile.TemporaryDirectory(prefix="grading-") as temp_dir:
+            return _grade(_extract_stdin_tar(temp_dir), assignment_config, args)
+    
+    if not args.path:
+        parser.error("path is required unless --stdin-tar is given")
+    return _grade(args.path, assignment_config, args)
+
+
+def _grade(path, assignment_config, args):
+    """
+    Grade a submission and write results in the requested format.
+    
+    Args:
+        path: Path to student submission
+        assignment_config: Assignment-specific configuration
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit code
+    """
+    if args.format == "ndjson":
+        write_events(path, assignment_config)
+        return 0
+    
+    results = grade_submission(path, assignment_config)
+    
+    output = json.dumps(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
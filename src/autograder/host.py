@@ -0,0 +1,169 @@
+"""
+Host Resource Detection for Tool Grader
+
+This module works out how many CPUs and how much memory the grader can use,
+taking CPU affinity and cgroup limits into account, how those CPUs map to
+physical cores, and how many grading containers fit on the host at once.
+"""
+
+import os
+import re
+import math
+import logging
+from pathlib import Path
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# cgroup v2 files of the cgroup the grader runs in
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# Per-CPU topology files
+CPU_ROOT = Path("/sys/devices/system/cpu")
+
+# Docker memory limit suffixes
+_MEMORY_UNITS = {
+    "": 1,
+    "b": 1,
+    "k": 1024,
+    "m": 1024 ** 2,
+    "g": 1024 ** 3,
+    "t": 1024 ** 4
+}
+
+
+def parse_memory_limit(value):
+    """
+    Convert a Docker-style memory limit to bytes.
+    
+    Args:
+        value: Limit such as "256m", "1g", "512k" or a number of bytes
+        
+    Returns:
+        Number of bytes
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([bkmgt]?)b?\s*", str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid memory limit: {value!r}")
+    return int(float(match.group(1)) * _MEMORY_UNITS[match.group(2)])
+
+
+def _read_cgroup_file(name):
+    """Read a cgroup v2 control file, or return None if it isn't there."""
+    try:
+        return (CGROUP_ROOT / name).read_text().strip()
+    except OSError:
+        return None
+
+
+def host_cpu_count():
+    """
+    Get the number of CPUs available to this process.
+    
+    Returns:
+        CPU count (may be fractional when a cgroup CPU quota applies)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+        
+    # cpu.max is "<quota> <period>" or "max <period>"
+    cpu_max = _read_cgroup_file("cpu.max")
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            cpus = min(cpus, int(quota) / int(period))
+    
+    return cpus
+
+
+def host_cpus():
+    """
+    Get the IDs of the CPUs this process may run on.
+    
+    Returns:
+        Sorted list of CPU IDs
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_topology(cpus):
+    """
+    Map CPUs to the physical core they belong to.
+    
+    Hyperthreads of one core share its caches and execution units, so they
+    map to the same (package, core) pair.
+    
+    Args:
+        cpus: CPU IDs
+        
+    Returns:
+        Dictionary of CPU ID to (package ID, core ID); CPUs whose topology
+        can't be read count as separate cores
+    """
+    topology = {}
+    for cpu in cpus:
+        try:
+            path = CPU_ROOT / f"cpu{cpu}" / "topology"
+            package = int((path / "physical_package_id").read_text())
+            core = int((path / "core_id").read_text())
+        except (OSError, ValueError):
+            package, core = -1, cpu
+        topology[cpu] = (package, core)
+    return topology
+
+
+def host_memory_bytes():
+    """
+    Get the amount of memory available to this process.
+    
+    Returns:
+        Memory in bytes, or None if it can't be determined
+    """
+    memory = None
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        pass
+    
+    memory_max = _read_cgroup_file("memory.max")
+    if memory_max and memory_max != "max":
+        limit = int(memory_max)
+        memory = limit if memory is None else min(memory, limit)
+    
+    return memory
+
+
+def host_capacity(cpu_limit, memory_limit, cpus=None, memory=None):
+    """
+    Work out how many grading containers the host can run at once.
+    
+    Args:
+        cpu_limit: CPUs given to each container
+        memory_limit: Memory limit of each container (Docker format or bytes)
+        cpus: Available CPUs (default: detected)
+        memory: Available memory in bytes (default: detected)
+    
+    Returns:
+        Number of containers (at least 1)
+    """
+    cpus = host_cpu_count() if cpus is None else cpus
+    memory = host_memory_bytes() if memory is None else memory
+    
+    limits = []
+    if cpu_limit:
+        limits.append(cpus / float(cpu_limit))
+    if memory_limit and memory:
+        limits.append(memory / parse_memory_limit(memory_limit))
+    
+    if not limits:
+        return max(1, int(cpus))
+    
+    # Small epsilon so e.g. 2 / 0.1 isn't rounded down to 19
+    return max(1, math.floor(min(limits) + 1e-9))
\ No newline at end of file
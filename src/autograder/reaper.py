@@ -0,0 +1,293 @@
+"""
+Orphan Reaper for Tool Grader
+
+This module removes what grading leaves behind when something goes wrong:
+grading containers that were never removed (e.g. the grader crashed or a
+kill failed after a timeout), along with their anonymous volumes, and
+temporary directories left by crashed workers. Everything the grader creates is
+labelled or prefixed, so only the grader's own leftovers are touched.
+"""
+
+import os
+import time
+import socket
+import shutil
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+from .config import get_config
+from .container_events import GRADER_LABEL
+from .container_pool import POOL_LABEL
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Prefix of every temporary directory the grader creates
+TEMP_PREFIX = "tool-grader-"
+
+
+def _parse_timestamp(value):
+    """
+    Convert a Docker timestamp to seconds since the epoch.
+    
+    Args:
+        value: Epoch seconds, or an RFC 3339 string (possibly with nanoseconds)
+    
+    Returns:
+        Seconds since the epoch, or None if the value can't be parsed
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return None
+    
+    value = value.replace("Z", "+00:00")
+    # fromisoformat accepts at most microseconds
+    if "." in value:
+        whole, rest = value.split(".", 1)
+        digits = len(rest) - len(rest.lstrip("0123456789"))
+        value = f"{whole}.{rest[:min(digits, 6)]}{rest[digits:]}"
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _process_alive(pid):
+    """Check whether a process with the given ID exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_alive(owner):
+    """
+    Check whether the process that owns a pooled container may still be running.
+    
+    Owners elsewhere (another host or container, whose PIDs mean nothing
+    here) are assumed alive; only a reaper where they run can tell.
+    
+    Args:
+        owner: Value of the pool label, "hostname:pid"
+    """
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    return _process_alive(int(pid))
+
+
+def reap_containers(client, max_age, now=None):
+    """
+    Remove stale grading containers.
+    
+    A grading container is stale once it is older than max_age. Pooled
+    containers are meant to live long, so they are only removed once they
+    have stopped, or the process on this host that owns the pool is gone.
+    
+    Args:
+        client: Docker client
+        max_age: Age in seconds after which a container is stale
+        now: Current time (default: time.time())
+    
+    Returns:
+        Number of containers removed
+    """
+    now = time.time() if now is None else now
+    removed = 0
+    
+    for container in client.api.containers(all=True, filters={"label": GRADER_LABEL}):
+        created = _parse_timestamp(container.get("Created"))
+        if created is None or now - created < max_age:
+            continue
+        
+        owner = (container.get("Labels") or {}).get(POOL_LABEL)
+        if owner and container.get("State") == "running" and _owner_alive(owner):
+            continue
+        
+        try:
+            # v=True removes the container's anonymous volumes with it
+            client.api.remove_container(container["Id"], v=True, force=True)
+        except Exception as e:
+            logger.warning(f"Failed to remove stale container {container['Id'][:12]}: {e}")
+            continue
+        logger.info(f"Removed stale container {container['Id'][:12]} ({container.get('State')})")
+        removed += 1
+        
+    return removed
+
+
+def reap_temp_dirs(max_age, directory=None, prefix=TEMP_PREFIX, now=None):
+    """
+    Remove stale grader temporary directories.
+    
+    Args:
+        max_age: Age in seconds (since last modified) after which a directory is stale
+        directory: Directory to look in (default: the system temp directory)
+        prefix: Name prefix of the grader's temporary directories
+        now: Current time (default: time.time())
+    
+    Returns:
+        Number of directories removed
+    """
+    now = time.time() if now is None else now
+    directory = directory or tempfile.gettempdir()
+    removed = 0
+    
+    try:
+        entries = list(os.scandir(directory))
+    except OSError as e:
+        logger.warning(f"Failed to list {directory}: {e}")
+        return 0
+    
+    for entry in entries:
+        if not entry.name.startswith(prefix):
+            continue
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if now - entry.stat(follow_symlinks=False).st_mtime < max_age:
+                continue
+            shutil.rmtree(entry.path)
+        except OSError as e:
+            logger.warning(f"Failed to remove stale directory {entry.path}: {e}")
+            continue
+        logger.info(f"Removed stale directory {entry.path}")
+        removed += 1
+        
+    return removed
+
+
+class Reaper:
+    """Periodically removes stale grading containers and temp directories."""
+    
+    def __init__(self, client=None, max_age=None, interval=None, temp_dir=None):
+        """
+        Initialize the reaper.
+        
+        Args:
+            client: Docker client (default: the shared client; None and no
+                Docker SDK means only temporary directories are reaped)
+            max_age: Age in seconds after which leftovers are removed
+            interval: Seconds between passes when running in the background
+            temp_dir: Directory holding the grader's temporary directories
+        """
+        config = get_config()
+        
+        self.client = client
+        self.max_age = max_age or config.get("reaper", "max_age", 3600)
+        self.interval = interval or config.get("reaper", "interval", 300)
+        self.temp_dir = temp_dir
+        
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        
+        self.stats = {
+            "runs": 0,
+            "containers": 0,
+            "temp_dirs": 0,
+            "errors": 0,
+            "last_run": None
+        }
+    
+    def _docker_client(self):
+        """Get the Docker client, or None if Docker isn't available."""
+        if self.client is None:
+            try:
+                from .docker_client import get_docker_client
+                self.client = get_docker_client()
+            except Exception as e:
+                logger.debug(f"Docker unavailable, only reaping directories: {e}")
+        return self.client
+    
+    def run_once(self):
+        """
+        Make one cleanup pass.
+        
+        Returns:
+            Dictionary with the number of containers and directories
+            removed in this pass
+        """
+        now = time.time()
+        counts = {"containers": 0, "temp_dirs": 0}
+        errors = 0
+        
+        client = self._docker_client()
+        if client is not None:
+            try:
+                counts["containers"] = reap_containers(client, self.max_age, now)
+            except Exception as e:
+                logger.warning(f"Failed to reap containers: {e}")
+                errors += 1
+                    
+        counts["temp_dirs"] = reap_temp_dirs(self.max_age, self.temp_dir, now=now)
+        
+        with self._lock:
+            self.stats["runs"] += 1
+            self.stats["errors"] += errors
+            self.stats["last_run"] = now
+            for key, count in counts.items():
+                self.stats[key] += count
+                
+        if any(counts.values()):
+            logger.info(
+                f"Reaped {counts['containers']} containers "
+                f"and {counts['temp_dirs']} directories"
+            )
+        return counts
+    
+    def get_stats(self):
+        """
+        Get totals of what the reaper has removed.
+        
+        Returns:
+            Dictionary of counters
+        """
+        with self._lock:
+            return dict(self.stats)
+    
+    def start(self):
+        """Start reaping in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="grader-reaper", daemon=True)
+        self._thread.start()
+    
+    def _loop(self):
+        """Reap every interval until stopped."""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Reaper pass failed: {e}")
+            self._stop.wait(self.interval)
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == "__main__":
+    """Simple CLI for cleaning up once."""
+    import argparse
+    import json
+    
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description="Remove stale grading containers and directories")
+    parser.add_argument("--max-age", type=int, help="Age in seconds after which leftovers are removed")
+    
+    args = parser.parse_args()
+    
+    print(json.dumps(Reaper(max_age=args.max_age).run_once(), indent=2))
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Resource Accounting for Tool Grader
+
+This module describes how much CPU time, memory and wall time grading a
+submission took, and summarizes that across a batch so container limits
+can be sized from measurements.
+"""
+
+import sys
+import math
+import resource
+
+
+def resource_usage(wall_seconds=None, cpu_seconds=None, peak_memory_bytes=None,
+                   oom_killed=False, timed_out=False):
+    """
+    Build the resources entry attached to grading results.
+    
+    Args:
+        wall_seconds: Elapsed time
+        cpu_seconds: User plus system CPU time
+        peak_memory_bytes: Peak resident set size
+        oom_killed: True if the submission was killed for exceeding its memory limit
+        timed_out: True if the submission was stopped for exceeding a time limit
+        
+    Returns:
+        Dictionary of resource usage (unmeasured values are None)
+    """
+    return {
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        "peak_memory_bytes": peak_memory_bytes,
+        "oom_killed": oom_killed,
+        "timed_out": timed_out
+    }
+
+
+def rusage_usage(usage):
+    """
+    Get CPU time and peak memory from a getrusage/wait4 result.
+    
+    Args:
+        usage: resource.struct_rusage
+        
+    Returns:
+        Tuple of (cpu seconds, peak memory in bytes)
+    """
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * scale
+
+
+def process_usage():
+    """
+    Get resource usage of this process and the children it has waited for.
+    
+    Returns:
+        Tuple of (cpu seconds, peak memory in bytes)
+    """
+    cpu_self, peak_self = rusage_usage(resource.getrusage(resource.RUSAGE_SELF))
+    cpu_children, peak_children = rusage_usage(resource.getrusage(resource.RUSAGE_CHILDREN))
+    return cpu_self + cpu_children, max(peak_self, peak_children)
+
+
+def _stats(values):
+    """Summarize a list of numbers, or return None if there are none."""
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "total": sum(values),
+        "mean": sum(values) / len(values),
+        "p95": values[max(0, math.ceil(0.95 * len(values)) - 1)],
+        "max": values[-1]
+    }
+
+
+def summarize_resources(usages):
+    """
+    Aggregate resource usage over many submissions.
+    
+    Args:
+        usages: Iterable of resources dictionaries from resource_usage
+        
+    Returns:
+        Dictionary with total/mean/p95/max of each measurement, plus counts
+        of out-of-memory kills and timeouts
+    """
+    usages = [usage for usage in usages if usage]
+    
+    summary = {"measured": len(usages)}
+    for key in ("wall_seconds", "cpu_seconds", "peak_memory_bytes"):
+        summary[key] = _stats([usage[key] for usage in usages if usage.get(key) is not None])
+    summary["oom_killed"] = sum(1 for usage in usages if usage.get("oom_killed"))
+    summary["timed_out"] = sum(1 for usage in usages if usage.get("timed_out"))
+    
+    return summary
\ No newline at end of file
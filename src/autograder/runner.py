@@ -0,0 +1,401 @@
+"""
+Sandboxed Runner Interface for Tool Grader
+
+This module defines the interface shared by the backends that grade
+submissions in isolation (Docker containers, or Linux namespaces and
+rlimits), the helpers they use to run the in-container harness and decode
+its output, and a factory that picks a backend from the configuration.
+"""
+
+import abc
+import time
+import asyncio
+import logging
+import weakref
+import functools
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import get_config
+from .host import host_capacity
+from .harness import encode_assignment_config
+from .capture import HeadTailBuffer, output_limits
+from .resources import resource_usage
+from .test_runner import results_from_events
+from .docker_streams import parse_ndjson
+from .warmup import warm_up
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Names accepted by create_runner and the runner.backend setting
+BACKENDS = ("docker", "sandbox")
+
+
+def harness_command(module_name=None, assignment_config=None, code_dir=None, output_path=None,
+                    python="python"):
+    """
+    Build the command that grades a submission with the harness.
+    
+    Without code_dir the harness reads the submission as a tar archive from
+    stdin and streams NDJSON events to stdout. With code_dir and no
+    output_path it streams events for the submission in code_dir.
+    
+    Args:
+        module_name: Optional specific module to test
+        assignment_config: Optional assignment-specific configuration
+        code_dir: Directory containing the submission
+        output_path: Path to write results JSON to
+        python: Python interpreter to run the harness with
+        
+    Returns:
+        Command as a list of arguments
+    """
+    command = [python, "-m", "autograder.harness"]
+    if code_dir and output_path:
+        command += [code_dir, "--output", output_path]
+    elif code_dir:
+        command += [code_dir, "--format", "ndjson"]
+    else:
+        command += ["--stdin-tar", "--format", "ndjson"]
+    command += ["--config-json", encode_assignment_config(assignment_config)]
+    if module_name:
+        command += ["--main-file", module_name]
+    return command
+
+
+def runner_results(results, output, stderr=None, truncated=None):
+    """
+    Combine full harness results with the summary fields runners return.
+    
+    Args:
+        results: Results dictionary written by the harness
+        output: What the submission wrote to stdout (head and tail)
+        stderr: What the grading process wrote to stderr (head and tail)
+        truncated: Dictionary with the number of stdout and stderr bytes
+            dropped from the middle
+        
+    Returns:
+        Results dictionary with success, attempted, failed and output fields added
+    """
+    doctest_results = results.get("doctest_results", [])
+    failed = sum(r.get("failures", 0) for r in doctest_results)
+    
+    combined = dict(results)
+    combined.update({
+        'success': "error" not in results and failed == 0,
+        'attempted': sum(r.get("examples", 0) for r in doctest_results),
+        'failed': failed,
+        'output': output,
+        'stderr': stderr,
+        'output_truncated': truncated or {"stdout": 0, "stderr": 0}
+    })
+    return combined
+
+
+def stream_results(exit_code, stdout, stderr):
+    """
+    Turn streamed harness output into runner results.
+    
+    The results include a resources entry with the CPU time and peak memory
+    the harness reported, when it got far enough to report them.
+    
+    Args:
+        exit_code: Exit code of the grading process
+        stdout: CappedBuffer with the NDJSON events
+        stderr: HeadTailBuffer with everything else the process printed
+        
+    Returns:
+        Dict containing test results
+    """
+    stderr_text = stderr.text()
+    
+    if stdout.truncated:
+        return {
+            'success': False,
+            'error': f"Grading output exceeded {stdout.max_bytes} bytes",
+            'output': None,
+            'stderr': stderr_text,
+            'resources': resource_usage()
+        }
+    
+    # Split the grading events from the harness's trailing reports
+    events = []
+    reports = {}
+    for event in parse_ndjson(stdout.getvalue()):
+        if event.get("event") in ("output", "usage"):
+            reports[event["event"]] = event
+        else:
+            events.append(event)
+            
+    usage = reports.get("usage", {})
+    resources = resource_usage(
+        cpu_seconds=usage.get("cpu_seconds"),
+        peak_memory_bytes=usage.get("peak_memory_bytes")
+    )
+    output = reports.get("output", {})
+    
+    finished = bool(events) and events[-1].get("event") in ("score", "error")
+    if exit_code != 0 or not finished:
+        logger.error(f"Grading process exited with code {exit_code}")
+        return {
+            'success': False,
+            'error': f"Execution failed with code {exit_code}",
+            'output': output.get("stdout"),
+            'stderr': stderr_text,
+            'resources': resources
+        }
+    
+    results = runner_results(
+        results_from_events(events),
+        output.get("stdout", ""),
+        stderr_text,
+        {"stdout": output.get("truncated", 0), "stderr": stderr.truncated_bytes}
+    )
+    results['resources'] = resources
+    return results
+
+
+def record_wall_time(results, start, limits=None):
+    """
+    Record the wall time of a run in its resources entry.
+    
+    Args:
+        results: Results dictionary from a runner
+        start: time.perf_counter() value when the run started
+        limits: Optional limits the run was held to (see BaseRunner.resource_limits)
+        
+    Returns:
+        The same results dictionary
+    """
+    resources = results.setdefault('resources', resource_usage())
+    resources['wall_seconds'] = time.perf_counter() - start
+    if limits is not None:
+        resources['limits'] = limits
+    return results
+
+
+class BaseRunner(abc.ABC):
+    """Interface for backends that grade submissions in isolation."""
+    
+    # Backend name used in configuration
+    backend = None
+    
+    def __init__(self, memory_limit=None, cpu_limit=None, timeout=None, max_concurrency=None):
+        """
+        Initialize limits shared by all backends.
+        
+        Limits default to the docker section of the configuration, so every
+        backend enforces the same memory, CPU and time limits.
+        
+        Args:
+            memory_limit: Memory limit per submission (e.g. "256m")
+            cpu_limit: CPUs per submission
+            timeout: Timeout in seconds
+            max_concurrency: Maximum submissions run_doctest_async runs at once
+                (0 or None: as many as fit in host CPUs and memory)
+        """
+        config = get_config()
+        
+        self.memory_limit = memory_limit or config.get("docker", "memory_limit")
+        self.cpu_limit = cpu_limit or config.get("docker", "cpu_limit")
+        self.timeout = timeout or config.get("docker", "timeout")
+        self.max_output_bytes = config.get("docker", "max_output_bytes", 10 * 1024 * 1024)
+        self.nofile_limit = config.get("docker", "nofile_limit", 256)
+        self.file_size_limit = config.get("docker", "file_size_limit", 16 * 1024 * 1024)
+        self.output_head, self.output_tail = output_limits()
+        self.max_concurrency = (
+            max_concurrency
+            or config.get("docker", "max_concurrency", 0)
+            or host_capacity(self.cpu_limit, self.memory_limit)
+        )
+        
+        # Async state: one semaphore per event loop, threads created on first use
+        self._executor = None
+        self._limits = weakref.WeakKeyDictionary()
+        self._running = 0
+        self._waiting = 0
+    
+    @abc.abstractmethod
+    def run_doctest(self, code_path, module_name=None, assignment_config=None):
+        """
+        Grade a submission in isolation.
+        
+        The results have the same per-test and per-error-case detail as
+        test_runner.grade_submission, plus the success, attempted, failed
+        and output summary fields and a resources entry (see
+        resources.resource_usage).
+        
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            
+        Returns:
+            Dict containing test results
+        """
+    
+    def prepare(self, assignment_config=None):
+        """
+        Get ready to grade an assignment before its submissions arrive.
+        
+        Backends override this to do slow one-off work (such as building an
+        image with the assignment's dependencies) up front.
+        
+        Args:
+            assignment_config: Assignment-specific configuration
+        """
+    
+    def warm_up(self, assignment_config=None):
+        """
+        Pay one-off start-up costs before the first real submission arrives.
+        
+        Prepares for the assignment, then grades a canary submission
+        end to end (for Docker: starts and discards a container), so the
+        image is checked and the page cache is warm.
+        
+        Args:
+            assignment_config: Assignment-specific configuration to prepare for
+            
+        Returns:
+            Dictionary with ready, backend, prepare_seconds and
+            canary_seconds (the cold-start latency), plus error on failure
+        """
+        start = time.perf_counter()
+        try:
+            self.prepare(assignment_config)
+        except Exception as e:
+            logger.error(f"Failed to prepare {self.backend} runner: {e}")
+            return {"ready": False, "backend": self.backend, "error": str(e)}
+        prepare_seconds = time.perf_counter() - start
+        
+        report = warm_up(self.run_doctest)
+        report.update({"backend": self.backend, "prepare_seconds": prepare_seconds})
+        return report
+    
+    def resource_limits(self):
+        """
+        Get the limits each submission is held to, for the resources entry.
+        
+        Returns:
+            Dictionary of limit names and values
+        """
+        return {
+            "memory_limit": self.memory_limit,
+            "cpu_limit": self.cpu_limit,
+            "timeout": self.timeout,
+            "nofile_limit": self.nofile_limit,
+            "file_size_limit": self.file_size_limit
+        }
+    
+    def _output_buffer(self):
+        """Get a buffer that keeps the head and tail of a process's output."""
+        return HeadTailBuffer(self.output_head, self.output_tail)
+    
+    def close(self):
+        """Release worker threads and any backend resources."""
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def get_concurrency_stats(self):
+        """
+        Get async concurrency counters.
+        
+        Returns:
+            Dictionary with the concurrency limit and running and waiting counts
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "waiting": self._waiting
+        }
+    
+    def _async_limit(self, loop):
+        """Get the semaphore that bounds concurrent submissions on an event loop."""
+        limit = self._limits.get(loop)
+        if limit is None:
+            limit = self._limits[loop] = asyncio.Semaphore(self.max_concurrency)
+        return limit
+    
+    def _get_executor(self):
+        """Get the worker threads used for blocking backend calls."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"{self.backend}-runner"
+            )
+        return self._executor
+    
+    async def run_doctest_async(self, code_path, module_name=None, assignment_config=None):
+        """
+        Grade a submission in isolation without blocking the event loop.
+        
+        At most max_concurrency submissions run at once; further calls wait
+        their turn without holding a thread, so callers can queue any number
+        of submissions without oversubscribing the host.
+        
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            
+        Returns:
+            Dict containing test results (same as run_doctest)
+        """
+        loop = asyncio.get_running_loop()
+        
+        self._waiting += 1
+        try:
+            await self._async_limit(loop).acquire()
+        finally:
+            self._waiting -= 1
+            
+        self._running += 1
+        try:
+            return await self._run_async(loop, Path(code_path), module_name, assignment_config)
+        finally:
+            self._running -= 1
+            self._async_limit(loop).release()
+    
+    async def _run_async(self, loop, code_path, module_name=None, assignment_config=None):
+        """
+        Run one submission once a concurrency slot is free.
+        
+        Backends can override this to avoid holding a thread while the
+        submission runs.
+        """
+        return await loop.run_in_executor(
+            self._get_executor(),
+            functools.partial(self.run_doctest, code_path, module_name, assignment_config)
+        )
+
+
+def create_runner(backend=None, **kwargs):
+    """
+    Create a runner for the configured backend.
+    
+    Args:
+        backend: "docker" or "sandbox" (default: runner.backend setting)
+        **kwargs: Passed to the runner constructor
+        
+    Returns:
+        BaseRunner instance
+    """
+    backend = backend or get_config().get("runner", "backend", "docker")
+    
+    # Import lazily so each backend only needs its own dependencies
+    if backend == "docker":
+        from .docker_runner import DockerRunner
+        return DockerRunner(**kwargs)
+    if backend == "sandbox":
+        from .sandbox_runner import SandboxRunner
+        return SandboxRunner(**kwargs)
+    
+    raise ValueError(f"Unknown runner backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
\ No newline at end of file
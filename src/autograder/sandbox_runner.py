@@ -0,0 +1,623 @@
+"""
+Namespace Sandbox Runner for Tool Grader
+
+This module grades submissions in a plain subprocess instead of a Docker
+container. The grading harness runs in fresh Linux user, network, mount and
+PID namespaces (via unshare), with memory, CPU, process and output limits
+enforced by rlimits (via prlimit) and, where a delegated cgroup v2 tree is
+available, by a per-submission cgroup. With the user and mount namespaces
+the harness sees a read-only root holding only the system and Python
+directories, and can write only to its working directory and a private
+/tmp. Starting a process takes milliseconds rather than the hundreds a
+container needs.
+"""
+
+import os
+import pwd
+import sys
+import uuid
+import site
+import shutil
+import time
+import signal
+import select
+import logging
+import threading
+import tempfile
+import subprocess
+from pathlib import Path
+
+from .config import get_config
+from .host import parse_memory_limit
+from .runner import BaseRunner, harness_command, stream_results
+from .resources import resource_usage, rusage_usage
+from .reaper import TEMP_PREFIX
+from .docker_streams import CappedBuffer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Directory that contains the autograder package, for the child's PYTHONPATH
+PACKAGE_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# unshare(1) options for each namespace
+NAMESPACE_OPTIONS = {
+    "user": ["--user", "--map-root-user"],
+    "net": ["--net"],
+    "mount": ["--mount"],
+    "pid": ["--pid", "--fork", "--kill-child", "--mount-proc"]
+}
+
+# cgroup v2 period used for cpu.max, in microseconds
+CPU_PERIOD = 100000
+
+# Directories the harness needs read-only, besides Python's own
+SYSTEM_PATHS = ["/usr", "/bin", "/sbin", "/lib", "/lib32", "/lib64", "/etc"]
+
+# Run inside the user and mount namespaces: builds a root on a tmpfs from
+# read-only binds of the given paths, a writable working directory, device
+# nodes, /proc and a private /tmp, pivots into it and detaches the old root.
+# The harness then runs in a nested user namespace as a non-root user, so it
+# has no capabilities to undo any of this (the mounts are locked read-only).
+# Arguments: working directory, paths to bind, "--", command.
+ROOT_SETUP = r"""
+set -e
+work=$1
+root=$work/.root
+shift
+mount -t tmpfs -o mode=755,size=16m tool-grader-root "$root"
+while [ "$1" != "--" ]; do
+    path=$1
+    shift
+    mkdir -p "$root${path%/*}"
+    if [ -L "$path" ]; then
+        ln -s "$(readlink "$path")" "$root$path"
+    elif [ -d "$path" ]; then
+        mkdir -p "$root$path"
+        mount --rbind "$path" "$root$path"
+        mount -o remount,bind,ro "$root$path"
+    elif [ -e "$path" ]; then
+        touch "$root$path"
+        mount --bind "$path" "$root$path"
+        mount -o remount,bind,ro "$root$path"
+    fi
+done
+shift
+mkdir -p "$root/dev" "$root/proc" "$root/tmp"
+for device in null zero random urandom; do
+    touch "$root/dev/$device"
+    mount --bind "/dev/$device" "$root/dev/$device"
+done
+# Only possible in a new PID namespace
+mount -t proc proc "$root/proc" 2>/dev/null || true
+mount -t tmpfs -o size=64m tmpfs "$root/tmp"
+mkdir -p "$root$work"
+mount --bind "$work" "$root$work"
+cd "$root"
+mkdir .old
+pivot_root . .old
+umount -l /.old
+rmdir /.old
+mount -o remount,bind,ro /
+exec unshare --user --mount --map-user=1000 --map-group=1000 --wd="$work" -- "$@"
+"""
+
+# Waits for the parent to move it into its cgroup before starting the harness
+CGROUP_GATE = 'read -r _ && exec "$@"'
+
+
+def read_only_paths(extra=()):
+    """
+    Get the paths bound read-only into the sandbox's root.
+    
+    Args:
+        extra: Additional paths to include
+        
+    Returns:
+        Sorted list of existing paths, without any path inside another
+    """
+    candidates = SYSTEM_PATHS + [
+        sys.prefix, sys.base_prefix, sys.exec_prefix, PACKAGE_ROOT,
+        os.path.dirname(os.path.realpath(sys.executable))
+    ] + site.getsitepackages() + [site.getusersitepackages()] + list(extra)
+    
+    paths = []
+    for path in sorted({os.path.normpath(os.path.abspath(p)) for p in candidates}):
+        if not os.path.lexists(path):
+            continue
+        if any(path.startswith(parent.rstrip("/") + "/") for parent in paths):
+            continue
+        paths.append(path)
+    return paths
+
+
+def _drain(pipe, buffer):
+    """Copy a pipe into a buffer until EOF."""
+    try:
+        for chunk in iter(lambda: pipe.read1(65536), b""):
+            buffer.write(chunk)
+    except (OSError, ValueError):
+        # The pipe was closed under us
+        pass
+
+
+def _kill_session(process):
+    """Kill every process left in a sandboxed process's session."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+class SandboxRunner(BaseRunner):
+    """Runs the grading harness in a namespaced, resource-limited subprocess."""
+    
+    backend = "sandbox"
+    
+    def __init__(
+        self,
+        memory_limit=None,
+        cpu_limit=None,
+        timeout=None,
+        max_concurrency=None,
+        namespaces=None,
+        cgroup_root=None,
+        pids_limit=None,
+        user=None
+    ):
+        """
+        Initialize the sandbox runner.
+        
+        Args:
+            memory_limit: Memory limit per submission (default: docker.memory_limit)
+            cpu_limit: CPUs per submission (default: docker.cpu_limit)
+            timeout: Timeout in seconds (default: docker.timeout)
+            max_concurrency: Maximum submissions run_doctest_async runs at once
+            namespaces: Namespaces to unshare ("user", "net", "mount", "pid")
+            cgroup_root: Delegated cgroup v2 directory to create per-submission
+                cgroups in (limits fall back to rlimits if unusable)
+            pids_limit: Maximum number of processes per submission
+            user: Unprivileged user to run as when the grader runs as root
+        """
+        super().__init__(memory_limit, cpu_limit, timeout, max_concurrency)
+        config = get_config()
+        
+        self.namespaces = namespaces if namespaces is not None else config.get(
+            "sandbox", "namespaces", list(NAMESPACE_OPTIONS)
+        )
+        self.read_only_paths = read_only_paths(config.get("sandbox", "read_only_paths", []))
+        self.pids_limit = pids_limit or config.get("sandbox", "pids_limit", 64)
+        self.user = user if user is not None else config.get("sandbox", "user", "nobody")
+        self.memory_bytes = parse_memory_limit(self.memory_limit)
+        
+        unknown = set(self.namespaces) - set(NAMESPACE_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown namespaces: {', '.join(sorted(unknown))}")
+        if self.namespaces and not shutil.which("unshare"):
+            raise RuntimeError("The sandbox runner needs unshare(1) from util-linux")
+        if not shutil.which("prlimit"):
+            raise RuntimeError("The sandbox runner needs prlimit(1) from util-linux")
+        
+        self.isolate_filesystem = "user" in self.namespaces and "mount" in self.namespaces
+        if not self.isolate_filesystem:
+            logger.warning(
+                "Sandbox runs without filesystem isolation (needs the user and mount "
+                "namespaces): submissions can write anywhere the grader's user can"
+            )
+        
+        self.cgroup_root = self._setup_cgroup_root(
+            cgroup_root or config.get("sandbox", "cgroup_root", "/sys/fs/cgroup/tool-grader")
+        )
+    
+    def resource_limits(self):
+        """
+        Get the limits each submission is held to, for the resources entry.
+        
+        Returns:
+            Dictionary of limit names and values
+        """
+        limits = super().resource_limits()
+        limits.update({
+            "pids_limit": self.pids_limit,
+            # Results are written to a file, so it is bounded by the output limit
+            "file_size_limit": self.max_output_bytes + 1
+        })
+        return limits
+    
+    def _setup_cgroup_root(self, cgroup_root):
+        """
+        Prepare the parent cgroup that per-submission cgroups are created in.
+        
+        Args:
+            cgroup_root: Path to a cgroup v2 directory the grader may write to
+            
+        Returns:
+            Path to the cgroup, or None if cgroups can't be used
+        """
+        root = Path(cgroup_root)
+        try:
+            root.mkdir(exist_ok=True)
+            controllers = (root / "cgroup.controllers").read_text().split()
+            wanted = [c for c in ("memory", "cpu", "pids") if c in controllers]
+            (root / "cgroup.subtree_control").write_text(" ".join(f"+{c}" for c in wanted))
+        except OSError as e:
+            logger.warning(f"cgroup v2 limits unavailable at {root} ({e}); using rlimits only")
+            return None
+        return root
+    
+    def _create_cgroup(self):
+        """
+        Create a cgroup for one submission with memory, CPU and process limits.
+        
+        Returns:
+            Path to the cgroup, or None if cgroups aren't available
+        """
+        if self.cgroup_root is None:
+            return None
+        
+        cgroup = self.cgroup_root / f"grade-{uuid.uuid4().hex[:12]}"
+        limits = {
+            "memory.max": str(self.memory_bytes),
+            "memory.swap.max": "0",
+            "cpu.max": f"{int(CPU_PERIOD * self.cpu_limit)} {CPU_PERIOD}",
+            "pids.max": str(self.pids_limit)
+        }
+        try:
+            cgroup.mkdir()
+        except OSError as e:
+            logger.warning(f"Failed to create cgroup {cgroup}: {e}")
+            return None
+        
+        for name, value in limits.items():
+            try:
+                (cgroup / name).write_text(value)
+            except OSError as e:
+                # e.g. memory.swap.max is missing without swap accounting
+                logger.debug(f"Could not set {name} on {cgroup}: {e}")
+        return cgroup
+    
+    def _remove_cgroup(self, cgroup):
+        """
+        Kill anything left in a submission's cgroup and remove it.
+        
+        Returns:
+            Dictionary with the cgroup's oom_killed flag, and cpu_seconds and
+            peak_memory_bytes where the kernel reports them
+        """
+        usage = {"oom_killed": False}
+        if cgroup is None:
+            return usage
+        
+        try:
+            for line in (cgroup / "memory.events").read_text().splitlines():
+                name, _, value = line.partition(" ")
+                if name == "oom_kill" and int(value) > 0:
+                    usage["oom_killed"] = True
+        except (OSError, ValueError):
+            pass
+        try:
+            for line in (cgroup / "cpu.stat").read_text().splitlines():
+                name, _, value = line.partition(" ")
+                if name == "usage_usec":
+                    usage["cpu_seconds"] = int(value) / 1e6
+        except (OSError, ValueError):
+            pass
+        try:
+            # memory.peak needs Linux 5.19+
+            usage["peak_memory_bytes"] = int((cgroup / "memory.peak").read_text())
+        except (OSError, ValueError):
+            pass
+        
+        try:
+            (cgroup / "cgroup.kill").write_text("1")
+        except OSError:
+            pass
+        try:
+            cgroup.rmdir()
+        except OSError as e:
+            logger.warning(f"Failed to remove cgroup {cgroup}: {e}")
+        
+        return usage
+    
+    def _command(self, work_dir, code_dir, module_name=None, assignment_config=None, account=None):
+        """
+        Build the prlimit + unshare + harness command line.
+        
+        Args:
+            work_dir: Submission's private working directory
+            code_dir: Directory the submission was copied to
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            account: pwd entry of the unprivileged user the sandbox runs as, or None
+        
+        Returns:
+            Command as a list of arguments
+        """
+        command = ["prlimit"] + self._rlimit_options(account) + ["--"]
+        if self.namespaces:
+            command.append("unshare")
+            for namespace in self.namespaces:
+                command += NAMESPACE_OPTIONS[namespace]
+            command.append("--")
+        if self.isolate_filesystem:
+            command += ["sh", "-c", ROOT_SETUP, "sh", work_dir] + self.read_only_paths + ["--"]
+        return command + harness_command(
+            module_name, assignment_config, code_dir=code_dir, python=sys.executable
+        )
+    
+    def _rlimit_options(self, account=None):
+        """
+        Get prlimit options for the submission's resource limits.
+        
+        Limits are applied by prlimit rather than in a preexec_fn, which
+        isn't safe to use from the threads run_doctest_async grades in.
+        
+        Args:
+            account: pwd entry of the unprivileged user the sandbox runs as, or None
+            
+        Returns:
+            List of prlimit options
+        """
+        options = [
+            f"--as={self.memory_bytes}",
+            f"--cpu={max(1, int(self.timeout))}",
+            # One byte over the cap so oversized grading output is detectable
+            f"--fsize={self.max_output_bytes + 1}",
+            "--core=0",
+            f"--nofile={self.nofile_limit}"
+        ]
+        if account is not None:
+            # RLIMIT_NPROC counts every process of the user, so only use it
+            # for a dedicated user
+            options.append(f"--nproc={self.pids_limit}")
+        return options
+    
+    def run_doctest(self, code_path, module_name=None, assignment_config=None):
+        """
+        Grade code in a namespaced subprocess.
+        
+        The submission is copied into a private working directory, graded by
+        the harness, and the NDJSON events it writes are decoded the same way
+        as for containers.
+        
+        Args:
+            code_path: Path to directory containing code
+            module_name: Optional specific module to test
+            assignment_config: Optional assignment-specific configuration
+            
+        Returns:
+            Dict containing test results
+        """
+        account = None
+        if os.geteuid() == 0 and self.user:
+            try:
+                account = pwd.getpwnam(self.user)
+            except KeyError:
+                return {
+                    'success': False,
+                    'error': f"Sandbox user '{self.user}' does not exist",
+                    'output': None
+                }
+        
+        with tempfile.TemporaryDirectory(prefix=TEMP_PREFIX) as work_dir:
+            code_dir = os.path.join(work_dir, "submission")
+            try:
+                shutil.copytree(code_path, code_dir)
+                if self.isolate_filesystem:
+                    # Mount point for the sandbox's root
+                    os.mkdir(os.path.join(work_dir, ".root"))
+                if account is not None:
+                    for path in [str(p) for p in Path(work_dir).rglob("*")] + [work_dir]:
+                        os.chown(path, account.pw_uid, account.pw_gid)
+            except OSError as e:
+                return {
+                    'success': False,
+                    'error': f"Failed to prepare submission: {str(e)}",
+                    'output': None
+                }
+            
+            env = {
+                "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+                "PYTHONPATH": PACKAGE_ROOT,
+                "PYTHONDONTWRITEBYTECODE": "1",
+                "HOME": work_dir,
+                "TMPDIR": work_dir,
+                "LANG": "C.UTF-8"
+            }
+            
+            start = time.perf_counter()
+            cgroup = self._create_cgroup()
+            try:
+                stderr = self._output_buffer()
+                with tempfile.TemporaryFile() as out_file:
+                    command = self._command(work_dir, code_dir, module_name, assignment_config, account)
+                    if cgroup is not None:
+                        command = ["sh", "-c", CGROUP_GATE, "sh"] + command
+                    try:
+                        # Popen drops privileges itself (Python 3.9+), with
+                        # no preexec_fn, which isn't safe to use from threads
+                        process = subprocess.Popen(
+                            command,
+                            cwd=work_dir,
+                            env=env,
+                            stdin=subprocess.PIPE if cgroup is not None else subprocess.DEVNULL,
+                            stdout=out_file,
+                            stderr=subprocess.PIPE,
+                            user=account.pw_uid if account is not None else None,
+                            group=account.pw_gid if account is not None else None,
+                            extra_groups=[] if account is not None else None,
+                            start_new_session=True
+                        )
+                        if cgroup is not None:
+                            self._start_in_cgroup(process, cgroup)
+                    except (OSError, subprocess.SubprocessError) as e:
+                        logger.error(f"Failed to start sandbox: {str(e)}")
+                        return {
+                            'success': False,
+                            'error': f"Failed to run tests: {str(e)}",
+                            'output': None
+                        }
+                    
+                    # stderr is drained as it's written, keeping only head and tail
+                    drain = threading.Thread(target=_drain, args=(process.stderr, stderr), daemon=True)
+                    drain.start()
+                    
+                    timed_out = False
+                    try:
+                        exit_code, rusage = self._wait(process, self.timeout)
+                    except subprocess.TimeoutExpired:
+                        timed_out = True
+                        exit_code, rusage = self._kill(process)
+                    finally:
+                        # Nothing the submission started may outlive it
+                        _kill_session(process)
+                        cgroup_usage = self._remove_cgroup(cgroup)
+                        cgroup = None
+                        
+                    # Everything in the sandbox is dead, so stderr is at EOF
+                    drain.join(timeout=5)
+                    process.stderr.close()
+                    stdout = self._read_capped(out_file)
+            finally:
+                self._remove_cgroup(cgroup)
+        
+        # Prefer the cgroup's accounting, which covers every process inside it
+        cpu_seconds, peak_memory_bytes = rusage_usage(rusage)
+        usage = resource_usage(
+            wall_seconds=time.perf_counter() - start,
+            cpu_seconds=cgroup_usage.get("cpu_seconds", cpu_seconds),
+            peak_memory_bytes=cgroup_usage.get("peak_memory_bytes", peak_memory_bytes),
+            oom_killed=cgroup_usage["oom_killed"],
+            timed_out=timed_out
+        )
+        usage['limits'] = self.resource_limits()
+        
+        if timed_out:
+            return {
+                'success': False,
+                'error': f"Execution timed out after {self.timeout} seconds",
+                'output': None,
+                'resources': usage
+            }
+        
+        results = stream_results(exit_code, stdout, stderr)
+        results['resources'] = usage
+        if usage["oom_killed"] and "error" in results:
+            results['error'] = f"Memory limit of {self.memory_limit} exceeded"
+        return results
+    
+    def _start_in_cgroup(self, process, cgroup):
+        """
+        Move a gated sandbox process into its cgroup, then let it start.
+        
+        Args:
+            process: subprocess.Popen object waiting on CGROUP_GATE
+            cgroup: Path to the submission's cgroup
+        """
+        try:
+            (cgroup / "cgroup.procs").write_text(str(process.pid))
+        except OSError:
+            _kill_session(process)
+            process.wait()
+            raise
+        process.stdin.write(b"go\n")
+        process.stdin.close()
+    
+    def _wait(self, process, timeout):
+        """
+        Wait for a sandboxed process and collect its resource usage.
+        
+        Args:
+            process: subprocess.Popen object
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            Tuple of (exit code, resource.struct_rusage)
+            
+        Raises:
+            subprocess.TimeoutExpired: If the process is still running
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):
+            pidfd = None
+        
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if pidfd is not None:
+                    ready, _, _ = select.select([pidfd], [], [], max(0, remaining))
+                    if not ready:
+                        raise subprocess.TimeoutExpired(process.args, timeout)
+                    return self._reap(process, 0)
+                
+                # No pidfd (older kernels): poll
+                reaped = self._reap(process, os.WNOHANG)
+                if reaped is not None:
+                    return reaped
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+                time.sleep(min(0.01, remaining))
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+    
+    def _reap(self, process, options):
+        """
+        Reap a process with wait4, keeping its rusage.
+        
+        Returns:
+            Tuple of (exit code, resource.struct_rusage), or None if the
+            process is still running
+        """
+        pid, status, rusage = os.wait4(process.pid, options)
+        if pid == 0:
+            return None
+        # Tell Popen the process is gone so it doesn't wait for it again
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return process.returncode, rusage
+    
+    def _kill(self, process):
+        """
+        Kill a sandboxed process and everything in its session.
+        
+        Returns:
+            Tuple of (exit code, resource.struct_rusage)
+        """
+        _kill_session(process)
+        return self._reap(process, 0)
+    
+    def _read_capped(self, file):
+        """Read a captured output file into a CappedBuffer."""
+        buffer = CappedBuffer(self.max_output_bytes)
+        file.seek(0)
+        buffer.write(file.read(self.max_output_bytes + 1))
+        return buffer
+
+
+if __name__ == "__main__":
+    """Simple CLI for testing."""
+    import json
+    import argparse
+    
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
+    parser = argparse.ArgumentParser(description="Run code in a namespace sandbox")
+    parser.add_argument("path", help="Path to code directory")
+    parser.add_argument("--module", help="Specific module to test")
+    parser.add_argument("--config", help="Path to assignment configuration file (JSON)")
+    parser.add_argument("--timeout", type=int, help="Timeout in seconds")
+    
+    args = parser.parse_args()
+    
+    assignment_config = None
+    if args.config:
+        with open(args.config, 'r') as f:
+            assignment_config = json.load(f)
+    
+    with SandboxRunner(timeout=args.timeout) as runner:
+        results = runner.run_doctest(args.path, args.module, assignment_config)
+    
+    print(json.dumps(results, indent=2))
\ No newline at end of file
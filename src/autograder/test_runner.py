@@ -6,21 +6,111 @@ and collecting results. It's based on the MVP demo implementation.
 """
 
 import sys
+import time
+import builtins
+import signal
 import doctest
 import importlib.util
 import json
+import logging
+import threading
 from pathlib import Path
-from io import StringIO
+from contextlib import contextmanager
 
 from .config import get_config
+from .capture import HeadTailWriter, BoundedSpoofOut, output_limits
 
+# Set up logging
+logger = logging.getLogger(__name__)
 
-def load_module_from_file(file_path):
+# Seconds between repeated interrupts once a time limit has passed, so code
+# that swallows one (e.g. a bare except in a loop) is interrupted again
+TIMEOUT_REPEAT = 0.1
+
+# Whether the missing time limits off the main thread have been logged
+_warned_no_alarm = False
+
+
+class GradingTimeout(KeyboardInterrupt):
+    """
+    Raised when student code runs past its time budget.
+    
+    This derives from KeyboardInterrupt because doctest re-raises
+    KeyboardInterrupt instead of recording it as an example failure, and
+    ``except Exception`` blocks in student code won't swallow it.
+    """
+
+
+@contextmanager
+def time_limit(seconds):
+    """
+    Interrupt the enclosed block with GradingTimeout after a wall-clock budget.
+    
+    Once the budget has passed, GradingTimeout is raised again every
+    TIMEOUT_REPEAT seconds until the block exits. Uses SIGALRM, so the limit
+    is only enforced on Unix in the main thread; elsewhere only the runner's
+    process timeout stops the block, and a warning is logged.
+    
+    Args:
+        seconds: Time budget in seconds, or None for no limit
+    """
+    if seconds is None:
+        yield
+        return
+    
+    if seconds <= 0:
+        raise GradingTimeout(seconds)
+    
+    if not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        global _warned_no_alarm
+        if not _warned_no_alarm:
+            _warned_no_alarm = True
+            logger.warning(
+                "Time limits need SIGALRM in the main thread; student code graded in "
+                f"thread {threading.current_thread().name} is only stopped by the "
+                "runner's process timeout"
+            )
+        yield
+        return
+    
+    def handle_alarm(signum, frame):
+        raise GradingTimeout(seconds)
+    
+    old_handler = signal.signal(signal.SIGALRM, handle_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds, TIMEOUT_REPEAT)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old_handler)
+
+
+def _time_budget(timeout=None, deadline=None):
+    """
+    Get the time available for the next step.
+    
+    Args:
+        timeout: Per-step limit in seconds, or None
+        deadline: time.monotonic() value when the whole submission must finish, or None
+        
+    Returns:
+        Seconds available, or None for no limit
+    """
+    budgets = []
+    if timeout is not None:
+        budgets.append(timeout)
+    if deadline is not None:
+        budgets.append(deadline - time.monotonic())
+    return min(budgets) if budgets else None
+
+
+def load_module_from_file(file_path, timeout=None):
     """
     Dynamically load a Python module from a file path.
     
     Args:
         file_path: Path to Python file
+        timeout: Optional time limit in seconds for running the module body
         
     Returns:
         Loaded module object
@@ -31,8 +121,15 @@ def load_module_from_file(file_path):
     sys.modules[module_name] = module
     
     try:
-        spec.loader.exec_module(module)
+        with time_limit(timeout):
+            spec.loader.exec_module(module)
         return module
+    except GradingTimeout:
+        return {
+            "error": f"Failed to load module: timed out after {timeout:.1f}s",
+            "module_name": module_name,
+            "timeout": True
+        }
     except Exception as e:
         # Capture import/execution errors
         return {
@@ -41,59 +138,145 @@ def load_module_from_file(file_path):
         }
 
 
-def run_doctest(module):
+def _run_examples(runner, test, example_timeout, deadline):
     """
-    Run doctest on a module and return results.
+    Run a doctest one example at a time, each under its own time limit.
+    
+    Examples share the test's globals, so they behave as if run together.
+    An example that times out is recorded as a failure and the remaining
+    examples still run.
     
     Args:
-        module: Python module object
+        runner: doctest.DocTestRunner writing to sys.stdout
+        test: DocTest to run
+        example_timeout: Per-example limit in seconds, or None
+        deadline: time.monotonic() value when the submission must finish, or None
         
     Returns:
-        List of test results
+        Tuple of (failures, timeouts)
+    """
+    failures = 0
+    timeouts = 0
+    
+    try:
+        for example in test.examples:
+            budget = _time_budget(example_timeout, deadline)
+            if budget is not None and budget <= 0:
+                # The submission is out of time; don't start anything new
+                sys.stdout.write(f"Skipped (submission time limit reached):\n    {example.source}")
+                failures += 1
+                timeouts += 1
+                continue
+            
+            single = doctest.DocTest(
+                [example], test.globs, test.name, test.filename, test.lineno, test.docstring
+            )
+            try:
+                with time_limit(budget):
+                    example_failures, _ = runner.run(single, clear_globs=False)
+                failures += example_failures
+            except GradingTimeout:
+                sys.stdout.write(f"Timed out after {budget:.1f}s\n")
+                failures += 1
+                timeouts += 1
+    finally:
+        test.globs.clear()
+    
+    return failures, timeouts
+
+
+def iter_doctest(module, example_timeout=None, deadline=None, output_head=None, output_tail=None):
+    """
+    Run doctest on a module, yielding each test's result as it finishes.
+    
+    Each test's output keeps only its first output_head and last
+    output_tail characters, with output_truncated counting the rest.
+    
+    Args:
+        module: Python module object
+        example_timeout: Optional time limit in seconds for each example
+        deadline: Optional time.monotonic() value when the submission must finish
+        output_head: Characters of output to keep from the start
+            (default: grading.output_head_bytes)
+        output_tail: Characters of output to keep from the end
+            (default: grading.output_tail_bytes)
+        
+    Yields:
+        Test result dictionaries
     """
     # Handle modules that failed to load
     if isinstance(module, dict) and "error" in module:
-        return [{
+        yield {
             "name": module.get("module_name", "unknown"),
             "error": module["error"],
             "examples": 0,
             "failures": 0,
             "success": False,
+            "status": "timeout" if module.get("timeout") else "error",
             "output": None
-        }]
+        }
+        return
+    
+    default_head, default_tail = output_limits()
+    output_head = default_head if output_head is None else output_head
+    output_tail = default_tail if output_tail is None else output_tail
     
     finder = doctest.DocTestFinder()
     runner = doctest.DocTestRunner(verbose=True)
+    # Don't let one example's output grow without bound while it runs
+    runner._fakeout = BoundedSpoofOut(output_head + output_tail)
     
     tests = finder.find(module)
     
-    test_results = []
     for test in tests:
         if test.examples:  # Skip docstrings without examples
             output = ""
             old_stdout = sys.stdout
             try:
                 # Capture doctest output
-                fake_stdout = StringIO()
+                fake_stdout = HeadTailWriter(output_head, output_tail)
                 sys.stdout = fake_stdout
                 
                 # Run the test
-                failures, tests_run = runner.run(test)
+                failures, timeouts = _run_examples(runner, test, example_timeout, deadline)
                 
                 # Get the output
                 output = fake_stdout.getvalue()
             finally:
                 sys.stdout = old_stdout
             
-            test_results.append({
+            if timeouts:
+                status = "timeout"
+            else:
+                status = "passed" if failures == 0 else "failed"
+            
+            yield {
                 "name": test.name,
                 "examples": len(test.examples),
                 "failures": failures,
+                "timeouts": timeouts,
                 "success": failures == 0,
-                "output": output
-            })
+                "status": status,
+                "output": output,
+                "output_truncated": fake_stdout.truncated_bytes
+            }
+    
+
+def run_doctest(module, example_timeout=None, deadline=None, output_head=None, output_tail=None):
+    """
+    Run doctest on a module and return results.
     
-    return test_results
+    Args:
+        module: Python module object
+        example_timeout: Optional time limit in seconds for each example
+        deadline: Optional time.monotonic() value when the submission must finish
+        output_head: Characters of each test's output to keep from the start
+        output_tail: Characters of each test's output to keep from the end
+        
+    Returns:
+        List of test results
+    """
+    return list(iter_doctest(module, example_timeout, deadline, output_head, output_tail))
 
 
 def check_function_implementation(module, function_name):
@@ -113,74 +296,138 @@ def check_function_implementation(module, function_name):
         return False
 
 
-def check_error_handling(module, test_functions):
+def _resolve_exception(exception):
     """
-    Check if the module properly handles error cases.
+    Turn an expected exception from an error case into a class.
+    
+    Configs loaded from JSON name exceptions as strings ("ValueError"), so
+    built-in names are looked up; other names are kept as strings and
+    matched against the raised exception's class name.
     
     Args:
-        module: Python module object
-        test_functions: Dictionary mapping function names to test cases
+        exception: Exception class, exception name, or None
         
     Returns:
-        Dictionary with error handling results
+        Exception class, exception name, or None
     """
-    results = {}
+    if isinstance(exception, str):
+        resolved = getattr(builtins, exception, None)
+        if isinstance(resolved, type) and issubclass(resolved, BaseException):
+            return resolved
+    return exception
+
+
+def _exception_name(exception):
+    """Get the display name of an expected exception (class or name)."""
+    return exception if isinstance(exception, str) else exception.__name__
+
+
+def _exception_matches(error, exception):
+    """Check whether a raised exception is the expected one (class or name)."""
+    if isinstance(exception, str):
+        return type(error).__name__ == exception
+    return isinstance(error, exception)
+
+
+def iter_error_handling(module, test_functions, case_timeout=None, deadline=None):
+    """
+    Check if the module properly handles error cases, one case at a time.
     
+    Args:
+        module: Python module object
+        test_functions: Dictionary mapping function names to test cases
+        case_timeout: Optional time limit in seconds for each case
+        deadline: Optional time.monotonic() value when the submission must finish
+        
+    Yields:
+        Tuples of (function name, case name, case result dictionary)
+    """
     for func_name, test_cases in test_functions.items():
         if not check_function_implementation(module, func_name):
             continue
         
         func = getattr(module, func_name)
-        results[func_name] = {}
         
         for case_name, case_info in test_cases.items():
             args = case_info.get("args", [])
-            expected_exception = case_info.get("exception", None)
+            expected_exception = _resolve_exception(case_info.get("exception", None))
             
+            budget = _time_budget(case_timeout, deadline)
             try:
                 # Call the function with test arguments
-                result = func(*args)
+                with time_limit(budget):
+                    result = func(*args)
                 
                 # If we expected an exception but didn't get one, mark as failed
                 if expected_exception:
-                    results[func_name][case_name] = {
+                    case_result = {
                         "success": False,
-                        "reason": f"Expected {expected_exception.__name__} but no exception was raised"
+                        "reason": f"Expected {_exception_name(expected_exception)} but no exception was raised"
                     }
                 else:
                     # No exception expected, and none raised - success
-                    results[func_name][case_name] = {
+                    case_result = {
                         "success": True
                     }
+            except GradingTimeout:
+                case_result = {
+                    "success": False,
+                    "status": "timeout",
+                    "reason": f"Timed out after {max(budget, 0):.1f}s"
+                }
             except Exception as e:
                 # Check if this is the expected exception
-                if expected_exception and isinstance(e, expected_exception):
-                    results[func_name][case_name] = {
+                if expected_exception and _exception_matches(e, expected_exception):
+                    case_result = {
                         "success": True
                     }
                 else:
                     # Wrong exception or unexpected exception
-                    results[func_name][case_name] = {
+                    case_result = {
                         "success": False,
-                        "reason": f"Got {type(e).__name__}, expected {'no exception' if not expected_exception else expected_exception.__name__}"
+                        "reason": f"Got {type(e).__name__}, expected {'no exception' if not expected_exception else _exception_name(expected_exception)}"
                     }
+            
+            yield func_name, case_name, case_result
+
+
+def check_error_handling(module, test_functions, case_timeout=None, deadline=None):
+    """
+    Check if the module properly handles error cases.
+    
+    Args:
+        module: Python module object
+        test_functions: Dictionary mapping function names to test cases
+        case_timeout: Optional time limit in seconds for each case
+        deadline: Optional time.monotonic() value when the submission must finish
+        
+    Returns:
+        Dictionary with error handling results
+    """
+    results = {
+        func_name: {} for func_name in test_functions
+        if check_function_implementation(module, func_name)
+    }
+    
+    for func_name, case_name, case_result in iter_error_handling(
+        module, test_functions, case_timeout, deadline
+    ):
+        results[func_name][case_name] = case_result
     
     return results
 
 
-def grade_submission(student_code_path, assignment_config=None):
+def resolve_submission_file(student_code_path, assignment_config=None):
     """
-    Grade a student submission.
+    Find the Python file to grade for a submission.
     
     Args:
-        student_code_path: Path to student submission
+        student_code_path: Path to student submission (file or directory)
         assignment_config: Optional assignment-specific configuration
         
     Returns:
-        Dictionary with grading results
+        Tuple of (student file Path, None) or (None, error results dict)
     """
-    # Set defaults from global config if not provided
-    config = get_config()
     if not assignment_config:
         assignment_config = {}
     
@@ -198,7 +445,7 @@ def grade_submission(student_code_path, assignment_config=None):
                 # Find first Python file
                 python_files = list(student_code_path.glob("*.py"))
                 if not python_files:
-                    return {
+                    return None, {
                         "error": f"No Python files found in {student_code_path}",
                         "score": 0,
                         "max_score": 100
@@ -207,7 +454,7 @@ def grade_submission(student_code_path, assignment_config=None):
         else:
             student_file = student_code_path
     else:
-        return {
+        return None, {
             "error": "Invalid student_code_path",
             "score": 0,
             "max_score": 100
@@ -215,14 +462,156 @@ def grade_submission(student_code_path, assignment_config=None):
     
     # Ensure file exists
     if not student_file.exists():
-        return {
+        return None, {
             "error": f"Student file {student_file} does not exist",
             "score": 0,
             "max_score": 100
         }
     
+    return student_file, None
+
+
+def grade_submission(student_code_path, assignment_config=None, cache=None):
+    """
+    Grade a student submission.
+    
+    Args:
+        student_code_path: Path to student submission
+        assignment_config: Optional assignment-specific configuration
+        cache: Optional ResultCache; a hit returns the stored results
+            without loading the student module
+            
+    Returns:
+        Dictionary with grading results
+    """
+    # Set defaults from global config if not provided
+    config = get_config()
+    if not assignment_config:
+        assignment_config = {}
+    
+    student_file, error = resolve_submission_file(student_code_path, assignment_config)
+    if error:
+        return error
+    
+    cache_key = None
+    if cache is not None:
+        submission_dir = Path(student_code_path) if Path(student_code_path).is_dir() else None
+        cache_key = cache.make_key(student_file, assignment_config, submission_dir)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            cached["student_file"] = str(student_file)
+            cached["cached"] = True
+            return cached
+    
+    results = _grade_file(student_file, assignment_config)
+    
+    # Timeouts depend on host load, so don't remember them
+    if cache_key is not None and not has_timeouts(results):
+        cache.put(cache_key, results)
+    
+    return results
+
+
+def has_timeouts(results):
+    """
+    Check whether any part of a grading run hit a time limit.
+    
+    Args:
+        results: Grading results dictionary
+        
+    Returns:
+        True if a doctest, error case or module load timed out
+    """
+    for result in results.get("doctest_results", []):
+        if result.get("status") == "timeout":
+            return True
+    for func_results in results.get("error_handling_results", {}).values():
+        for case_result in func_results.values():
+            if case_result.get("status") == "timeout":
+                return True
+    return False
+
+
+def _grade_file(student_file, assignment_config):
+    """
+    Load and grade a single student file.
+    
+    Args:
+        student_file: Path to the student's Python file
+        assignment_config: Assignment-specific configuration
+        
+    Returns:
+        Dictionary with grading results
+    """
+    return results_from_events(_iter_file_events(student_file, assignment_config))
+
+
+def iter_grade_events(student_code_path, assignment_config=None):
+    """
+    Grade a student submission, yielding events as grading progresses.
+    
+    Events are small dictionaries with an "event" key:
+    
+    - "error": the submission could not be graded (no file found, etc.)
+    - "load": the student module was loaded (or failed to load)
+    - "functions": which required functions are implemented
+    - "doctest": one doctest finished (same fields as run_doctest results)
+    - "error_case": one error handling case finished
+    - "score": final counts and scores
+    
+    Only running totals are kept, so results are never all in memory at once.
+    
+    Args:
+        student_code_path: Path to student submission
+        assignment_config: Optional assignment-specific configuration
+        
+    Yields:
+        Event dictionaries
+    """
+    if not assignment_config:
+        assignment_config = {}
+    
+    student_file, error = resolve_submission_file(student_code_path, assignment_config)
+    if error:
+        yield dict(event="error", **error)
+        return
+    
+    yield from _iter_file_events(student_file, assignment_config)
+
+
+def _iter_file_events(student_file, assignment_config):
+    """
+    Load and grade a single student file, yielding grading events.
+    
+    Args:
+        student_file: Path to the student's Python file
+        assignment_config: Assignment-specific configuration
+        
+    Yields:
+        Event dictionaries (see iter_grade_events)
+    """
+    config = get_config()
+    
+    # Time limits: per example (and per error case), and for the whole submission
+    example_timeout = assignment_config.get(
+        "example_timeout", config.get("grading", "example_timeout")
+    )
+    submission_timeout = assignment_config.get(
+        "submission_timeout", config.get("grading", "submission_timeout")
+    )
+    deadline = time.monotonic() + submission_timeout if submission_timeout else None
+    
     # Load the module
-    module = load_module_from_file(student_file)
+    module = load_module_from_file(student_file, _time_budget(deadline=deadline))
+    
+    load_event = {
+        "event": "load",
+        "student_file": str(student_file),
+        "module": Path(student_file).stem
+    }
+    if isinstance(module, dict):
+        load_event["error"] = module["error"]
+    yield load_event
     
     # Check if required functions are implemented
     required_functions = assignment_config.get("required_functions", [])
@@ -232,8 +621,28 @@ def grade_submission(student_code_path, assignment_config=None):
         if check_function_implementation(module, func):
             implemented_functions.append(func)
     
-    # Run doctests
-    doctest_results = run_doctest(module)
+    yield {
+        "event": "functions",
+        "implemented": implemented_functions,
+        "missing": [f for f in required_functions if f not in implemented_functions]
+    }
+    
+    # Run doctests, keeping only the counts needed for scoring
+    functions_with_doctests = set()
+    passed_tests = 0
+    total_tests = 0
+    
+    for result in iter_doctest(module, example_timeout, deadline):
+        total_tests += 1
+        if result.get("success", False):
+            passed_tests += 1
+        
+        # Extract function name from doctest name (e.g., 'module.function')
+        parts = result["name"].split('.')
+        if len(parts) > 1:
+            functions_with_doctests.add(parts[1])
+        
+        yield dict(event="doctest", **result)
     
     # Calculate scores
     implementation_weight = assignment_config.get("implementation_weight", 70)
@@ -245,14 +654,6 @@ def grade_submission(student_code_path, assignment_config=None):
     else:
         implementation_score = implementation_weight
     
-    # Count functions with doctests
-    functions_with_doctests = set()
-    for result in doctest_results:
-        # Extract function name from doctest name (e.g., 'module.function')
-        parts = result["name"].split('.')
-        if len(parts) > 1:
-            functions_with_doctests.add(parts[1])
-    
     if required_functions:
         doctest_score = len(functions_with_doctests) / len(required_functions) * doctest_weight
     else:
@@ -260,38 +661,28 @@ def grade_submission(student_code_path, assignment_config=None):
     
     # Check error handling if specified in assignment config
     error_handling_score = 0
-    error_handling_results = {}
     
     if "error_cases" in assignment_config:
-        error_handling_results = check_error_handling(module, assignment_config["error_cases"])
-        
-        # Calculate error handling score
-        if error_handling_results:
-            total_cases = 0
-            passed_cases = 0
+        total_cases = 0
+        passed_cases = 0
+            
+        for func_name, case_name, case_result in iter_error_handling(
+            module, assignment_config["error_cases"], example_timeout, deadline
+        ):
+            total_cases += 1
+            if case_result["success"]:
+                passed_cases += 1
             
-            for func_results in error_handling_results.values():
-                for case_result in func_results.values():
-                    total_cases += 1
-                    if case_result["success"]:
-                        passed_cases += 1
+            yield dict(event="error_case", function=func_name, case=case_name, **case_result)
             
-            if total_cases > 0:
-                error_handling_score = (passed_cases / total_cases) * error_handling_weight
+        if total_cases > 0:
+            error_handling_score = (passed_cases / total_cases) * error_handling_weight
     
     total_score = implementation_score + doctest_score + error_handling_score
     
-    # Generate results
-    passed_tests = sum(1 for r in doctest_results if r.get("success", False))
-    total_tests = len(doctest_results)
-    
-    return {
-        "student_file": str(student_file),
-        "implemented_functions": implemented_functions,
-        "missing_functions": [f for f in required_functions if f not in implemented_functions],
+    yield {
+        "event": "score",
         "functions_with_doctests": list(functions_with_doctests),
-        "doctest_results": doctest_results,
-        "error_handling_results": error_handling_results,
         "passed_tests": passed_tests,
         "total_tests": total_tests,
         "scores": {
@@ -304,6 +695,53 @@ def grade_submission(student_code_path, assignment_config=None):
     }
 
 
+def results_from_events(events):
+    """
+    Build a grading results dictionary from grading events.
+    
+    Args:
+        events: Iterable of events from iter_grade_events
+        
+    Returns:
+        Dictionary with grading results, as returned by grade_submission
+    """
+    results = {}
+    
+    for event in events:
+        event = dict(event)
+        kind = event.pop("event")
+        
+        if kind == "error":
+            return event
+        elif kind == "load":
+            results["student_file"] = event["student_file"]
+        elif kind == "functions":
+            results["implemented_functions"] = event["implemented"]
+            results["missing_functions"] = event["missing"]
+            results["doctest_results"] = []
+            results["error_handling_results"] = {}
+        elif kind == "doctest":
+            results["doctest_results"].append(event)
+        elif kind == "error_case":
+            func_results = results["error_handling_results"].setdefault(event.pop("function"), {})
+            func_results[event.pop("case")] = event
+        elif kind == "score":
+            results = {
+                "student_file": results["student_file"],
+                "implemented_functions": results["implemented_functions"],
+                "missing_functions": results["missing_functions"],
+                "functions_with_doctests": event["functions_with_doctests"],
+                "doctest_results": results["doctest_results"],
+                "error_handling_results": results["error_handling_results"],
+                "passed_tests": event["passed_tests"],
+                "total_tests": event["total_tests"],
+                "scores": event["scores"],
+                "max_score": event["max_score"]
+            }
+    
+    return results
+
+
 def format_results_markdown(results):
     """
     Format grading results as markdown.
@@ -341,7 +779,11 @@ def format_results_markdown(results):
     md += "## Detailed Test Results\n\n"
     for test_result in results['doctest_results']:
         md += f"### {test_result['name']}\n\n"
-        md += f"**Status:** {'Passed' if test_result.get('success', False) else 'Failed'}\n\n"
+        if test_result.get('status') == "timeout":
+            status = "Timed out"
+        else:
+            status = 'Passed' if test_result.get('success', False) else 'Failed'
+        md += f"**Status:** {status}\n\n"
         md += f"**Examples tested:** {test_result.get('examples', 0)}\n\n"
         md += f"**Failures:** {test_result.get('failures', 0)}\n\n"
         
@@ -0,0 +1,171 @@
+"""
+Warm-Up for Tool Grader
+
+This module grades a tiny canary submission when a service starts, so the
+one-off costs of the first grading run (checking or building the image,
+starting a container from a cold page cache, importing the grader) are
+paid before real submissions arrive, and reports how long that took.
+"""
+
+import time
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+from .reaper import TEMP_PREFIX
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CANARY_SOURCE = '''"""Canary submission graded at start-up."""
+
+
+def add(a, b):
+    """
+    >>> add(1, 2)
+    3
+    """
+    return a + b
+'''
+
+
+def warm_up(grade):
+    """
+    Grade the canary submission and time it.
+    
+    Args:
+        grade: Function that grades the submission in a directory and
+            returns a results dictionary
+    
+    Returns:
+        Dictionary with ready (True if the canary graded cleanly),
+        canary_seconds and, if it failed, error
+    """
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix=TEMP_PREFIX) as temp_dir:
+            (Path(temp_dir) / "canary.py").write_text(CANARY_SOURCE)
+            results = grade(Path(temp_dir))
+    except Exception as e:
+        results = {"error": str(e)}
+    elapsed = time.perf_counter() - start
+    
+    report = {
+        "ready": "error" not in results and results.get("passed_tests", 0) > 0,
+        "canary_seconds": elapsed
+    }
+    if not report["ready"]:
+        report["error"] = results.get("error") or "Canary submission did not pass"
+        logger.error(f"Warm-up failed after {elapsed:.2f}s: {report['error']}")
+    else:
+        logger.info(f"Warm-up canary graded in {elapsed:.2f}s")
+    return report
+
+
+class Readiness:
+    """
+    Tracks whether a service has finished warming up.
+    
+    A failed warm-up (say, the Docker daemon was still starting) is retried
+    once a cooldown has passed, doubling the cooldown after each failure up
+    to max_retry_delay.
+    """
+    
+    def __init__(self, retry_delay=30, max_retry_delay=600):
+        """
+        Initialize the readiness state.
+        
+        Args:
+            retry_delay: Seconds to wait after the first failure before
+                warming up again
+            max_retry_delay: Longest wait between retries in seconds
+        """
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        self.state = {"status": "starting"}
+        self.failures = 0
+        self.retry_at = None
+    
+    def run(self, warm):
+        """
+        Warm up, recording progress and the outcome.
+        
+        Args:
+            warm: Function that warms up and returns a report from warm_up
+            
+        Returns:
+            The warm-up report
+        """
+        self._set({"status": "warming"})
+        return self._warm(warm)
+    
+    def start(self, warm):
+        """Warm up in a background thread."""
+        # Marked warming before the thread starts, so a second caller
+        # doesn't start another warm-up in the meantime
+        self._set({"status": "warming"})
+        thread = threading.Thread(target=self._warm, args=(warm,), name="grader-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def due(self):
+        """
+        Check whether a warm-up should be started.
+        
+        Returns:
+            True before the first warm-up, and after a failed one once its
+            cooldown has passed
+        """
+        with self._lock:
+            status = self.state["status"]
+            return status == "starting" or (status == "failed" and time.monotonic() >= self.retry_at)
+    
+    def _warm(self, warm):
+        try:
+            report = warm()
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+            report = {"ready": False, "error": str(e)}
+        
+        with self._lock:
+            if report.get("ready"):
+                self.failures = 0
+                self.retry_at = None
+                self.state = {"status": "ready", "warmup": report}
+            else:
+                self.failures += 1
+                delay = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+                self.retry_at = time.monotonic() + delay
+                self.state = {
+                    "status": "failed",
+                    "warmup": report,
+                    "failures": self.failures,
+                    "retry_in": delay
+                }
+                logger.warning(f"Retrying warm-up in {delay}s (failure {self.failures})")
+        return report
+    
+    def _set(self, state):
+        with self._lock:
+            self.state = state
+    
+    @property
+    def ready(self):
+        """True once warm-up has succeeded."""
+        with self._lock:
+            return self.state["status"] == "ready"
+    
+    def get_state(self):
+        """
+        Get the readiness state.
+        
+        Returns:
+            Dictionary with status ("starting", "warming", "ready" or
+            "failed") and, once finished, the warm-up report; after a
+            failure also the number of failures in a row and the seconds
+            until the next attempt (retry_in)
+        """
+        with self._lock:
+            return dict(self.state)
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Prefork Grading Worker for Tool Grader
+
+This module provides a "zygote" process that imports the grader and any
+heavy modules once, then forks a copy-on-write child for each submission.
+Each child starts with everything already imported, so per-submission
+startup is the cost of a fork instead of a fresh interpreter.
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import logging
+import importlib
+import selectors
+
+from .resources import resource_usage, rusage_usage
+from .test_runner import grade_submission, has_timeouts
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class GradingZygote:
+    """Forks a pre-initialized child process for each submission."""
+    
+    def __init__(self, preload=None):
+        """
+        Initialize the zygote and preload modules.
+        
+        Args:
+            preload: Optional list of module names to import before forking
+                (e.g. ["numpy", "pandas"])
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("GradingZygote requires os.fork(), which is not available on this platform")
+        
+        self.preloaded = []
+        for module_name in preload or []:
+            try:
+                importlib.import_module(module_name)
+                self.preloaded.append(module_name)
+            except ImportError as e:
+                logger.warning(f"Could not preload module '{module_name}': {e}")
+        
+        # Move everything imported so far out of the collector's reach so
+        # children don't touch (and copy) those pages during collection
+        gc.collect()
+        gc.freeze()
+    
+    def _fork_child(self, student_code_path, assignment_config, cache=None):
+        """
+        Fork a child that grades one submission and writes JSON to a pipe.
+        
+        Args:
+            student_code_path: Path to student submission
+            assignment_config: Assignment-specific configuration
+            cache: Optional ResultCache
+            
+        Returns:
+            Tuple of (child pid, read file descriptor)
+        """
+        # Don't let buffered output get written twice
+        sys.stdout.flush()
+        sys.stderr.flush()
+        
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        
+        if pid == 0:
+            # Child: grade, report, and exit without running parent cleanup
+            exit_code = 0
+            try:
+                os.close(read_fd)
+                try:
+                    results = grade_submission(student_code_path, assignment_config, cache)
+                except Exception as e:
+                    results = {
+                        "error": f"Grading failed: {str(e)}",
+                        "score": 0,
+                        "max_score": 100
+                    }
+                    exit_code = 1
+                data = json.dumps(results, default=str).encode('utf-8')
+                view = memoryview(data)
+                while view:
+                    written = os.write(write_fd, view)
+                    view = view[written:]
+            except BaseException:
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        
+        os.close(write_fd)
+        return pid, read_fd
+    
+    def _collect_child(self, pid, data):
+        """
+        Reap a finished child and decode its results.
+        
+        Args:
+            pid: Child process ID
+            data: Bytes read from the child's pipe
+            
+        Returns:
+            Grading results dictionary, with the child's CPU time and peak
+            memory in its resources entry
+        """
+        _, status, usage = os.wait4(pid, 0)
+        cpu_seconds, peak_memory_bytes = rusage_usage(usage)
+        
+        try:
+            results = json.loads(data.decode('utf-8'))
+        except ValueError:
+            if os.WIFSIGNALED(status):
+                reason = f"killed by signal {os.WTERMSIG(status)}"
+            else:
+                reason = f"exited with code {os.WEXITSTATUS(status)}"
+            results = {
+                "error": f"Grading process {reason} without reporting results",
+                "score": 0,
+                "max_score": 100
+            }
+            
+        results["resources"] = resource_usage(
+            cpu_seconds=cpu_seconds,
+            peak_memory_bytes=peak_memory_bytes,
+            timed_out=has_timeouts(results)
+        )
+        return results
+    
+    def grade(self, student_code_path, assignment_config=None, cache=None):
+        """
+        Grade a single submission in a forked child.
+        
+        Args:
+            student_code_path: Path to student submission
+            assignment_config: Optional assignment-specific configuration
+            cache: Optional ResultCache
+            
+        Returns:
+            Dictionary with grading results
+        """
+        for _, results, _ in self.grade_many([(None, student_code_path)], assignment_config, cache=cache):
+            return results
+    
+    def grade_many(self, submissions, assignment_config=None, max_children=None, cache=None):
+        """
+        Grade several submissions with up to max_children forks at once.
+        
+        Args:
+            submissions: Iterable of (key, student_code_path) tuples
+            assignment_config: Optional assignment-specific configuration
+            max_children: Maximum concurrent children (default: number of CPUs)
+            cache: Optional ResultCache
+        
+        Yields:
+            Tuples of (key, results, elapsed seconds) as children finish
+        """
+        max_children = max_children or os.cpu_count() or 1
+        pending = iter(submissions)
+        selector = selectors.DefaultSelector()
+        running = 0
+        
+        try:
+            while True:
+                # Keep the number of live children at the limit
+                while running < max_children:
+                    try:
+                        key, path = next(pending)
+                    except StopIteration:
+                        break
+                    pid, read_fd = self._fork_child(path, assignment_config, cache)
+                    selector.register(read_fd, selectors.EVENT_READ, {
+                        "key": key,
+                        "pid": pid,
+                        "chunks": [],
+                        "start": time.perf_counter()
+                    })
+                    running += 1
+                    
+                if running == 0:
+                    break
+                
+                for selector_key, _ in selector.select():
+                    child = selector_key.data
+                    chunk = os.read(selector_key.fd, 65536)
+                    if chunk:
+                        child["chunks"].append(chunk)
+                        continue
+                    
+                    # EOF: the child is done writing
+                    selector.unregister(selector_key.fd)
+                    os.close(selector_key.fd)
+                    running -= 1
+                    results = self._collect_child(child["pid"], b"".join(child["chunks"]))
+                    elapsed = time.perf_counter() - child["start"]
+                    results["resources"]["wall_seconds"] = elapsed
+                    yield child["key"], results, elapsed
+        finally:
+            # Don't leave zombies behind if the caller stops early
+            for selector_key in list(selector.get_map().values()):
+                os.close(selector_key.fd)
+                try:
+                    os.waitpid(selector_key.data["pid"], 0)
+                except ChildProcessError:
+                    pass
+            selector.close()
\ No newline at end of file
@@ -9,8 +9,12 @@ import sys
 import json
 from pathlib import Path
 
-from autograder.config import load_config
+from autograder.config import load_config, get_config
+from autograder.cache import ResultCache
 from autograder.test_runner import grade_submission, format_results_markdown
+from autograder.harness import write_events
+from autograder.batch import grade_batch, write_batch_results
+from autograder.warmup import warm_up
 
 
 def main():
@@ -32,14 +36,80 @@ def main():
     )
     grade_parser.add_argument(
         "--format", 
-        choices=["json", "markdown"], 
+        choices=["json", "markdown", "ndjson"], 
         default="markdown",
-        help="Output format (default: markdown)"
+        help="Output format (default: markdown); ndjson streams one event per line "
+             "as grading runs and bypasses the cache"
     )
     grade_parser.add_argument(
         "--output", 
         help="Path to write results (default: stdout)"
     )
+    grade_parser.add_argument(
+        "--no-cache", 
+        action="store_true",
+        help="Always re-run grading instead of using cached results"
+    )
+    
+    # Batch grade command
+    batch_parser = subparsers.add_parser(
+        "grade-batch", 
+        help="Grade every submission in a roster directory"
+    )
+    batch_parser.add_argument(
+        "roster", 
+        help="Roster directory with one subdirectory or .py file per student"
+    )
+    batch_parser.add_argument(
+        "--config", 
+        help="Path to assignment configuration file"
+    )
+    batch_parser.add_argument(
+        "-j", "--jobs", 
+        type=int, 
+        default=None,
+        help="Number of worker processes (default: number of CPUs)"
+    )
+    batch_parser.add_argument(
+        "--output-dir", 
+        default="results",
+        help="Directory to write per-student results and summary (default: results)"
+    )
+    batch_parser.add_argument(
+        "--zygote", 
+        action="store_true",
+        help="Fork each submission from a pre-initialized grader process"
+    )
+    batch_parser.add_argument(
+        "--preload", 
+        default="",
+        help="Comma-separated modules to import before forking (implies --zygote)"
+    )
+    batch_parser.add_argument(
+        "--no-cache", 
+        action="store_true",
+        help="Always re-run grading instead of using cached results"
+    )
+    batch_parser.add_argument(
+        "--no-warm-up", 
+        action="store_true",
+        help="Skip grading a canary submission before the batch starts"
+    )
+    batch_parser.add_argument(
+        "--no-dedupe", 
+        action="store_true",
+        help="Grade identical submissions separately instead of once per group"
+    )
+    
+    # Image build command
+    image_parser = subparsers.add_parser(
+        "build-image", 
+        help="Build the grading image with an assignment's dependencies"
+    )
+    image_parser.add_argument(
+        "config", 
+        help="Path to assignment configuration file"
+    )
     
     # Config test command
     config_parser = subparsers.add_parser(
@@ -73,20 +143,48 @@ def main():
         print(json.dumps(config.config, indent=2))
         return 0
     
+    # Load assignment configuration if provided
+    assignment_config = None
+    if args.command in ("grade", "grade-batch", "build-image") and args.config:
+        try:
+            with open(args.config, 'r') as f:
+                assignment_config = json.load(f)
+        except Exception as e:
+            print(f"Error loading assignment configuration: {e}", file=sys.stderr)
+            return 1
+    
+    # Handle image build command
+    if args.command == "build-image":
+        from autograder.docker_runner import DockerRunner
+        
+        runner = DockerRunner(pool_size=0)
+        try:
+            image = runner.prepare(assignment_config)
+        except Exception as e:
+            print(f"Error building grading image: {e}", file=sys.stderr)
+            return 1
+        finally:
+            runner.close()
+        
+        print(f"Grading image for {Path(args.config).stem}: {image}")
+        return 0
+    
+    # Set up the result cache unless disabled
+    cache = None
+    if args.command in ("grade", "grade-batch") and not args.no_cache:
+        if get_config().get("cache", "enabled", True):
+            cache = ResultCache()
+    
     # Handle grade command
+    if args.command == "grade" and args.format == "ndjson":
+        # Write each event as soon as it happens; the student's own prints
+        # are reported in an "output" event instead of mixed into the stream
+        write_events(args.path, assignment_config, args.output)
+        return 0
+    
     if args.command == "grade":
-        # Load assignment configuration if provided
-        assignment_config = None
-        if args.config:
-            try:
-                with open(args.config, 'r') as f:
-                    assignment_config = json.load(f)
-            except Exception as e:
-                print(f"Error loading assignment configuration: {e}", file=sys.stderr)
-                return 1
-        
         # Grade the submission
-        results = grade_submission(args.path, assignment_config)
+        results = grade_submission(args.path, assignment_config, cache)
         
         # Format the results
         if args.format == "json":
@@ -103,6 +201,61 @@ def main():
         
         return 0
     
+    # Handle batch grade command
+    if args.command == "grade-batch":
+        if not Path(args.roster).is_dir():
+            print(f"Roster directory {args.roster} does not exist", file=sys.stderr)
+            return 1
+        
+        # Pay import and cold-cache costs once, before workers start (and
+        # before the zygote forks, so its children inherit a warm grader)
+        if not args.no_warm_up and get_config().get("warmup", "enabled", True):
+            report = warm_up(grade_submission)
+            if not report["ready"]:
+                print(f"Warm-up failed: {report['error']}", file=sys.stderr)
+                return 1
+            print(f"Warm-up canary graded in {report['canary_seconds']:.2f}s")
+        
+        zygote = None
+        preload = [name.strip() for name in args.preload.split(",") if name.strip()]
+        if args.zygote or preload:
+            from autograder.zygote import GradingZygote
+            zygote = GradingZygote(preload)
+        
+        results, summary = grade_batch(
+            args.roster, assignment_config, args.jobs, zygote, cache,
+            dedupe=not args.no_dedupe
+        )
+        if summary["assignment"] is None and args.config:
+            summary["assignment"] = Path(args.config).stem
+        write_batch_results(results, summary, args.output_dir)
+        
+        print(
+            f"Graded {summary['submissions']} submissions with {summary['jobs']} "
+            f"{summary['executor']} workers in {summary['elapsed_seconds']:.2f}s "
+            f"({summary['submissions_per_second']:.1f} submissions/s)"
+        )
+        if summary["dedupe"]["executions_saved"]:
+            print(
+                f"Graded {summary['dedupe']['graded']} unique submissions, "
+                f"saved {summary['dedupe']['executions_saved']} executions"
+            )
+        if summary["cache_hits"]:
+            print(f"{summary['cache_hits']} results served from cache")
+        cpu = summary["resources"]["cpu_seconds"]
+        if cpu:
+            print(f"CPU time: {cpu['total']:.2f}s total, {cpu['mean']:.3f}s mean, {cpu['p95']:.3f}s p95")
+        memory = summary["resources"]["peak_memory_bytes"]
+        if memory:
+            print(f"Peak memory: {memory['max'] / 2 ** 20:.1f} MiB max, {memory['p95'] / 2 ** 20:.1f} MiB p95")
+        if summary["resources"]["timed_out"]:
+            print(f"{summary['resources']['timed_out']} submissions hit a time limit")
+        if summary["errors"]:
+            print(f"{summary['errors']} submissions failed to grade", file=sys.stderr)
+        print(f"Results written to {args.output_dir}")
+        
+        return 0
+    
     return 0
 
 
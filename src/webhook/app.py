@@ -8,14 +8,66 @@ import os
 import hmac
 import hashlib
 import json
+import threading
 from flask import Flask, request, jsonify, abort
 
 from autograder.config import get_config
+from autograder.reaper import Reaper
+from autograder.runner import create_runner
+from autograder.warmup import Readiness
 from webhook.handlers import handle_push_event
 
 
 app = Flask(__name__)
 
+# Background cleanup of leftovers from crashed or timed-out grading
+reaper = None
+
+# Whether start-up warm-up has finished
+readiness = Readiness(
+    retry_delay=get_config().get("warmup", "retry_delay", 30),
+    max_retry_delay=get_config().get("warmup", "max_retry_delay", 600)
+)
+# Held while starting background work, so it only starts once
+_startup_lock = threading.Lock()
+
+
+def _warm_up_runner():
+    """Warm up the configured grading backend."""
+    runner = create_runner()
+    try:
+        return runner.warm_up()
+    finally:
+        # The Docker client, image lookups and events stream stay warm in
+        # the process after the runner is closed
+        runner.close()
+
+
+def start_warmup():
+    """
+    Start warming up the grading backend, unless that has already started.
+    
+    A failed warm-up is started again once its cooldown has passed, so the
+    service recovers by itself when, say, the Docker daemon comes up late.
+    """
+    with _startup_lock:
+        if not readiness.due():
+            return
+        if get_config().get("warmup", "enabled", True):
+            readiness.start(_warm_up_runner)
+        else:
+            readiness.run(lambda: {"ready": True, "skipped": True})
+
+
+def start_reaper():
+    """Start the background reaper if it is enabled and not already running."""
+    global reaper
+    with _startup_lock:
+        if reaper is None and get_config().get("reaper", "enabled", True):
+            reaper = Reaper()
+            reaper.start()
+    return reaper
+
 
 @app.before_request
 def validate_webhook():
@@ -85,10 +137,29 @@ def github_webhook():
 @app.route("/webhook/status", methods=["GET"])
 def webhook_status():
     """Return webhook service status."""
-    return jsonify({
-        "status": "ok",
-        "message": "Webhook service is running"
-    })
+    # Under a WSGI server __main__ doesn't run, so the first probe starts
+    # the reaper and warm-up, and later probes retry warm-up after a failure
+    start_reaper()
+    start_warmup()
+    state = readiness.get_state()
+    
+    if readiness.ready:
+        status = {
+            "status": "ok",
+            "message": "Webhook service is running"
+        }
+    else:
+        status = {
+            "status": state["status"],
+            "message": "Webhook service is not ready to grade"
+        }
+    if "warmup" in state:
+        status["warmup"] = state["warmup"]
+    if reaper is not None:
+        status["reaper"] = reaper.get_stats()
+    
+    # Load balancers only route to the service once it reports 200
+    return jsonify(status), 200 if readiness.ready else 503
 
 
 if __name__ == "__main__":
@@ -97,4 +168,6 @@ if __name__ == "__main__":
     port = int(os.environ.get("FLASK_PORT", 5000))
     debug = os.environ.get("FLASK_DEBUG", "").lower() in ("true", "1", "yes")
     
+    start_reaper()
+    start_warmup()
     app.run(host=host, port=port, debug=debug)
\ No newline at end of file
@@ -12,6 +12,7 @@ from pathlib import Path
 import logging
 
 from autograder.config import get_config
+from autograder.reaper import TEMP_PREFIX
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -56,7 +57,7 @@ def handle_push_event(payload):
         }
     
     # Clone repository to temporary directory
-    with tempfile.TemporaryDirectory() as temp_dir:
+    with tempfile.TemporaryDirectory(prefix=TEMP_PREFIX) as temp_dir:
         # Clone repository
         clone_result = _clone_repository(repo_name, temp_dir)
         if "error" in clone_result:
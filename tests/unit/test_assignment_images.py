@@ -0,0 +1,94 @@
+"""
+Unit tests for the assignment_images module.
+"""
+
+import pytest
+
+from autograder.assignment_images import (
+    AssignmentImages, assignment_dependencies, assignment_image_tag, dependency_dockerfile
+)
+
+
+class FakeImages:
+    """Image store that records builds."""
+    
+    def __init__(self):
+        self.tags = {}
+        self.builds = []
+    
+    def list(self, name=None):
+        return [name] if name in self.tags else []
+    
+    def build(self, fileobj, tag, **kwargs):
+        self.builds.append(fileobj.read().decode('utf-8'))
+        self.tags[tag] = f"sha256:built{len(self.builds)}"
+
+
+class FakeClient:
+    def __init__(self):
+        self.images = FakeImages()
+
+
+class FakeImageCache:
+    """Resolves names from the fake image store."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.client.images.tags["grader:latest"] = "sha256:base"
+    
+    def resolve(self, image):
+        return self.client.images.tags[image]
+    
+    def invalidate(self, image=None):
+        pass
+
+
+def test_assignment_dependencies():
+    """Test reading and validating declared dependencies."""
+    assert assignment_dependencies(None) == []
+    assert assignment_dependencies({"dependencies": ["numpy", "attrs==23.1", "numpy"]}) == [
+        "attrs==23.1", "numpy"
+    ]
+    with pytest.raises(ValueError):
+        assignment_dependencies({"dependencies": ["--index-url=http://evil", "numpy"]})
+
+
+def test_image_tag_keyed_by_base_and_dependencies():
+    """Test that the tag changes with the base image or the dependencies only."""
+    tag = assignment_image_tag("grader:latest", "sha256:base", ["numpy"])
+    
+    assert tag.startswith("grader:deps-")
+    assert tag == assignment_image_tag("grader:latest", "sha256:base", ["numpy"])
+    assert tag != assignment_image_tag("grader:latest", "sha256:other", ["numpy"])
+    assert tag != assignment_image_tag("grader:latest", "sha256:base", ["numpy", "attrs"])
+    assert assignment_image_tag("registry:5000/grader", "sha256:base", []).startswith(
+        "registry:5000/grader:deps-"
+    )
+
+
+def test_dockerfile_quotes_requirements():
+    """Test that requirements are passed to pip as single arguments."""
+    dockerfile = dependency_dockerfile("sha256:base", ["numpy>=1.26"])
+    
+    assert dockerfile.startswith("FROM sha256:base\n")
+    assert "pip install --no-cache-dir --prefer-binary 'numpy>=1.26'" in dockerfile
+
+
+def test_image_built_once():
+    """Test that the derived image is built once and then reused."""
+    client = FakeClient()
+    images = AssignmentImages(client, FakeImageCache(client))
+    config = {"dependencies": ["numpy"]}
+    
+    assert images.image_for("grader:latest") == "sha256:base"
+    first = images.image_for("grader:latest", config)
+    assert images.image_for("grader:latest", config) == first
+    
+    assert first == "sha256:built1"
+    assert len(client.images.builds) == 1
+    assert images.stats == {"built": 1, "reused": 0}
+    
+    # A new process finds the existing image instead of building it again
+    images = AssignmentImages(client, FakeImageCache(client))
+    assert images.image_for("grader:latest", config) == first
+    assert images.stats == {"built": 0, "reused": 1}
\ No newline at end of file
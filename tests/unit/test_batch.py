@@ -0,0 +1,131 @@
+"""
+Unit tests for the batch grading module.
+"""
+
+import json
+
+import pytest
+
+from autograder.batch import (
+    find_student_submissions,
+    grade_batch,
+    submission_fingerprint,
+    write_batch_results,
+)
+from autograder.zygote import GradingZygote
+
+
+PASSING_CODE = '''
+def add(a, b):
+    """
+    >>> add(2, 3)
+    5
+    """
+    return a + b
+'''
+
+FAILING_CODE = '''
+def add(a, b):
+    """
+    >>> add(2, 3)
+    5
+    """
+    return a - b
+'''
+
+
+@pytest.fixture
+def roster(tmp_path):
+    """Create a roster with two directory submissions and one file submission."""
+    for student, code in [("alice", PASSING_CODE), ("bob", FAILING_CODE)]:
+        student_dir = tmp_path / student
+        student_dir.mkdir()
+        (student_dir / "functions.py").write_text(code)
+    (tmp_path / "carol.py").write_text(PASSING_CODE)
+    return tmp_path
+
+
+def test_find_student_submissions(roster):
+    """Test discovering students in a roster directory."""
+    submissions = find_student_submissions(roster)
+    
+    assert list(submissions) == ["alice", "bob", "carol"]
+    assert submissions["carol"] == roster / "carol.py"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_grade_batch(roster, jobs):
+    """Test grading a roster in-process and with a process pool."""
+    config = {"required_functions": ["add"]}
+    results, summary = grade_batch(roster, config, jobs=jobs)
+    
+    assert list(results) == ["alice", "bob", "carol"]
+    assert results["alice"]["passed_tests"] == 1
+    assert results["bob"]["passed_tests"] == 0
+    assert summary["submissions"] == 3
+    assert summary["errors"] == 0
+    assert summary["submissions_per_second"] > 0
+    assert summary["resources"]["measured"] == 3
+    assert summary["resources"]["cpu_seconds"]["total"] > 0
+    assert results["alice"]["resources"]["timed_out"] is False
+
+
+def test_grade_batch_zygote(roster):
+    """Test grading a roster by forking from a zygote."""
+    zygote = GradingZygote(preload=["json", "not_a_real_module"])
+    results, summary = grade_batch(roster, {"required_functions": ["add"]}, jobs=2, zygote=zygote)
+    
+    assert zygote.preloaded == ["json"]
+    assert summary["executor"] == "zygote"
+    assert results["alice"]["passed_tests"] == 1
+    assert results["bob"]["passed_tests"] == 0
+    assert results["carol"]["implemented_functions"] == ["add"]
+    # Each forked child's peak memory is measured separately
+    assert summary["resources"]["peak_memory_bytes"]["max"] > 0
+
+
+def test_submission_fingerprint_ignores_comments_and_whitespace(tmp_path):
+    """Test that AST-equivalent files share a fingerprint and others don't."""
+    original = tmp_path / "a" / "functions.py"
+    reformatted = tmp_path / "b" / "functions.py"
+    different = tmp_path / "c" / "functions.py"
+    for path in (original, reformatted, different):
+        path.parent.mkdir()
+    original.write_text(PASSING_CODE)
+    reformatted.write_text("# my solution\n\n" + PASSING_CODE.replace("a + b", "a  +  b  # add"))
+    different.write_text(FAILING_CODE)
+    
+    assert submission_fingerprint(original) == submission_fingerprint(reformatted)
+    assert submission_fingerprint(original) != submission_fingerprint(different)
+
+
+def test_grade_batch_dedupe(roster):
+    """Test that equivalent submissions are graded once and fanned out."""
+    (roster / "dave").mkdir()
+    (roster / "dave" / "functions.py").write_text("# copied\n" + PASSING_CODE)
+    
+    results, summary = grade_batch(roster, {"required_functions": ["add"]}, jobs=1)
+    
+    assert summary["dedupe"]["graded"] == 3
+    assert summary["dedupe"]["executions_saved"] == 1
+    assert summary["dedupe"]["duplicate_groups"] == [["alice", "dave"]]
+    assert results["dave"]["student_file"] == str(roster / "dave" / "functions.py")
+    assert results["dave"]["equivalent_to"] == str(roster / "alice" / "functions.py")
+    assert results["dave"]["scores"] == results["alice"]["scores"]
+    assert "resources" not in results["dave"]
+    assert summary["resources"]["measured"] == 3
+    
+    _, summary = grade_batch(roster, {"required_functions": ["add"]}, jobs=1, dedupe=False)
+    assert summary["dedupe"]["graded"] == 4
+
+
+def test_write_batch_results(roster, tmp_path):
+    """Test writing per-student results and the summary."""
+    results, summary = grade_batch(roster, jobs=1)
+    output_dir = tmp_path / "out"
+    
+    write_batch_results(results, summary, output_dir)
+    
+    assert (output_dir / "alice_results.json").exists()
+    assert (output_dir / "alice_results.md").exists()
+    assert json.loads((output_dir / "summary.json").read_text())["submissions"] == 3
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Unit tests for the grading result cache.
+"""
+
+import os
+
+import pytest
+
+from autograder import cache as cache_module
+from autograder.cache import ResultCache
+from autograder.config import get_config
+from autograder import test_runner
+from autograder.test_runner import grade_submission
+
+
+CODE = '''
+def add(a, b):
+    """
+    >>> add(2, 3)
+    5
+    """
+    return a + b
+'''
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a cache in a temporary directory."""
+    return ResultCache(directory=tmp_path / "cache", max_size_mb=1)
+
+
+def test_cache_key_depends_on_content_and_config(cache, tmp_path):
+    """Test that the key changes with the submission and the config."""
+    submission = tmp_path / "functions.py"
+    submission.write_text(CODE)
+    key = cache.make_key(submission, {"required_functions": ["add"]})
+    
+    assert key == cache.make_key(submission, {"required_functions": ["add"]})
+    assert key != cache.make_key(submission, {"required_functions": ["sub"]})
+    
+    submission.write_text(CODE + "\n# changed\n")
+    assert key != cache.make_key(submission, {"required_functions": ["add"]})
+
+
+def test_cache_hit_skips_module_load(cache, tmp_path, monkeypatch):
+    """Test that a cache hit returns stored results without loading the module."""
+    submission = tmp_path / "functions.py"
+    submission.write_text(CODE)
+    
+    first = grade_submission(submission, {"required_functions": ["add"]}, cache)
+    assert "cached" not in first
+    
+    def fail_load(file_path):
+        raise AssertionError("module should not be loaded on a cache hit")
+    
+    monkeypatch.setattr(test_runner, "load_module_from_file", fail_load)
+    second = grade_submission(submission, {"required_functions": ["add"]}, cache)
+    
+    assert second["cached"] is True
+    assert second["scores"] == first["scores"]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that eviction removes the oldest entries first."""
+    cache = ResultCache(directory=tmp_path / "cache", max_size_mb=0.001)
+    payload = {"output": "x" * 400}
+    
+    cache.put("aa" + "0" * 62, payload)
+    old_path = cache._entry_path("aa" + "0" * 62)
+    os.utime(old_path, (0, 0))
+    cache.put("bb" + "0" * 62, payload)
+    cache.put("cc" + "0" * 62, payload)
+    
+    assert cache.get("aa" + "0" * 62) is None
+    assert cache.get("cc" + "0" * 62) == payload
+
+
+def test_cache_key_covers_helper_files_and_grading_settings(cache, tmp_path, monkeypatch):
+    """Test that the key changes with other submission files and result-affecting settings."""
+    submission = tmp_path / "submission"
+    (submission / "__pycache__").mkdir(parents=True)
+    (submission / "functions.py").write_text("from helpers import add\n")
+    (submission / "helpers.py").write_text(CODE)
+    key = cache.make_key(submission / "functions.py", submission_dir=submission)
+    
+    # Bytecode written by grading doesn't change the submission
+    (submission / "__pycache__" / "helpers.cpython.pyc").write_bytes(b"\0")
+    assert cache.make_key(submission / "functions.py", submission_dir=submission) == key
+    
+    (submission / "helpers.py").write_text(CODE + "\n# changed\n")
+    changed = cache.make_key(submission / "functions.py", submission_dir=submission)
+    assert changed != key
+    
+    grading = dict(get_config().get("grading"), example_timeout=1)
+    monkeypatch.setitem(get_config().config, "grading", grading)
+    assert cache.make_key(submission / "functions.py", submission_dir=submission) != changed
+
+
+def test_cache_put_scans_only_when_needed(tmp_path, monkeypatch):
+    """Test that puts under budget don't rescan the whole cache every time."""
+    monkeypatch.setattr(cache_module, "EVICT_INTERVAL", 5)
+    cache = ResultCache(directory=tmp_path / "cache", max_size_mb=1)
+    scans = []
+    evict = cache.evict
+    
+    def counting_evict():
+        scans.append(1)
+        evict()
+    monkeypatch.setattr(cache, "evict", counting_evict)
+    
+    for n in range(11):
+        cache.put(f"{n:02d}" + "0" * 62, {"output": "x"})
+    
+    # The first put learns the size; then one scan every EVICT_INTERVAL puts
+    assert len(scans) == 3
\ No newline at end of file
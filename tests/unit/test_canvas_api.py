@@ -0,0 +1,125 @@
+"""
+Unit tests for the canvas_api module.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("canvasapi")
+
+from canvasapi.exceptions import CanvasException
+
+from autograder import canvas_api
+from autograder.canvas_api import CanvasIntegration
+
+
+class FakeProgress:
+    """Progress that moves through the given states, one per query."""
+    
+    def __init__(self, states, message=None, errors=0):
+        self.id = 1
+        self.states = list(states)
+        self.workflow_state = self.states.pop(0)
+        self.message = message
+        self.errors = errors
+        self.queries = 0
+    
+    def query(self):
+        self.queries += 1
+        if self.errors:
+            self.errors -= 1
+            raise CanvasException("poll failed")
+        if self.states:
+            self.workflow_state = self.states.pop(0)
+        return self
+
+
+class FakeAssignment:
+    """Assignment whose bulk update records what Canvas would store."""
+    
+    def __init__(self, progress, recorded=None):
+        self.progress = progress
+        # Student ID to the grade Canvas ends up holding; by default the posted one
+        self.recorded = recorded
+        self.submissions = {}
+        self.updates = []
+    
+    def submissions_bulk_update(self, grade_data):
+        self.updates.append(grade_data)
+        for student_id, data in grade_data.items():
+            if "posted_grade" in data:
+                grade = data["posted_grade"]
+                if self.recorded is not None:
+                    grade = self.recorded.get(student_id, grade)
+                self.submissions[student_id] = grade
+        return self.progress
+    
+    def get_submissions(self, per_page=None, include=None):
+        return [
+            SimpleNamespace(user_id=student_id, entered_grade=grade, submission_comments=[])
+            for student_id, grade in self.submissions.items()
+        ]
+
+
+def make_integration(assignment, monkeypatch):
+    """Build an integration that talks to a fake course."""
+    monkeypatch.setattr(canvas_api.time, "sleep", lambda seconds: None)
+    integration = CanvasIntegration(api_url="", api_token="", course_id=None)
+    integration.canvas = object()
+    integration.course = SimpleNamespace(get_assignment=lambda assignment_id: assignment)
+    return integration
+
+
+def test_bulk_post_polls_and_verifies(monkeypatch):
+    """Test that a bulk post waits for the batch and reports grades Canvas didn't take."""
+    progress = FakeProgress(["queued", "running", "completed"])
+    assignment = FakeAssignment(progress, recorded={"2": None})
+    integration = make_integration(assignment, monkeypatch)
+    
+    results = integration.post_grades_bulk(7, {"1": (90, "Good"), "2": (80, None)}, poll_interval=1, timeout=60)
+    
+    assert assignment.updates == [{
+        "1": {"posted_grade": 90, "text_comment": "Good"},
+        "2": {"posted_grade": 80}
+    }]
+    assert progress.queries == 2
+    assert results["progress"] == "completed"
+    assert results["posted"] == ["1"]
+    assert list(results["failed"]) == ["2"]
+    assert not results["success"]
+    
+    # Grades Canvas took aren't posted again
+    again = integration.post_grades_bulk(7, {"1": (90, "Good")}, poll_interval=1, timeout=60)
+    assert again["skipped"] == ["1"]
+    assert len(assignment.updates) == 1
+
+
+def test_bulk_post_reports_failed_batch(monkeypatch):
+    """Test that every student is reported failed when the batch fails."""
+    assignment = FakeAssignment(FakeProgress(["running", "failed"], message="boom"))
+    integration = make_integration(assignment, monkeypatch)
+    
+    results = integration.post_grades_bulk(7, {"1": (90, None)}, poll_interval=1, timeout=60)
+    
+    assert results["progress"] == "failed"
+    assert results["posted"] == []
+    assert "boom" in results["failed"]["1"]
+
+
+def test_wait_for_progress(monkeypatch):
+    """Test that polling survives failed checks and gives up at the timeout."""
+    integration = make_integration(None, monkeypatch)
+    
+    progress = FakeProgress(["queued", "completed"], errors=2)
+    assert integration._wait_for_progress(progress, 1, 60) == "completed"
+    assert progress.queries == 3
+    
+    clock = [0.0]
+    
+    def sleep(seconds):
+        clock[0] += seconds
+    monkeypatch.setattr(canvas_api.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(canvas_api.time, "sleep", sleep)
+    
+    assert integration._wait_for_progress(FakeProgress(["running"] * 100), 10, 30) == "timed out"
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Unit tests for the canvas_cache module.
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from autograder import canvas_cache
+from autograder.canvas_cache import SubmissionIndex, PostedState, grade_matches
+
+
+def make_fetch(calls, user_ids=(1, 2, 3)):
+    """Build a fetch function that counts how often it's called."""
+    def fetch(assignment_id):
+        calls.append(assignment_id)
+        return [SimpleNamespace(user_id=user_id, assignment_id=assignment_id) for user_id in user_ids]
+    return fetch
+
+
+def test_index_built_once_per_assignment():
+    """Test that looking up a whole class fetches each assignment once."""
+    calls = []
+    index = SubmissionIndex(make_fetch(calls, range(100)))
+    
+    for user_id in range(100):
+        assert index.get(7, user_id).user_id == user_id
+    # String IDs (e.g. from the command line) find the same submission
+    assert index.get(7, "42").user_id == 42
+    index.get(8, 1)
+    
+    assert calls == [7, 8]
+    assert index.get_stats() == {"builds": 2, "hits": 102, "misses": 0, "assignments": 2}
+
+
+def test_index_expires(monkeypatch):
+    """Test that the index is rebuilt after its TTL."""
+    calls = []
+    index = SubmissionIndex(make_fetch(calls), ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(canvas_cache.time, "monotonic", lambda: now[0])
+    
+    index.get(7, 1)
+    now[0] += 30
+    index.get(7, 1)
+    now[0] += 31
+    index.get(7, 1)
+    
+    assert calls == [7, 7]
+
+
+def test_missing_student_and_put():
+    """Test that unknown students miss, and submissions fetched directly can be added."""
+    index = SubmissionIndex(make_fetch([]))
+    
+    assert index.get(7, 99) is None
+    index.put(7, SimpleNamespace(user_id=99))
+    assert index.get(7, 99).user_id == 99
+    
+    index.invalidate(7)
+    assert index.get(7, 99) is None
+
+
+def test_concurrent_lookups_fetch_once():
+    """Test that concurrent lookups share one fetch."""
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    fetch = make_fetch(calls)
+    
+    def slow_fetch(assignment_id):
+        started.set()
+        release.wait(5)
+        return fetch(assignment_id)
+    
+    index = SubmissionIndex(slow_fetch)
+    threads = [threading.Thread(target=index.get, args=(7, 1)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert calls == [7]
+    # Build locks are dropped once the index is stored
+    assert index._building == {}
+
+
+def test_failed_build_drops_its_lock():
+    """Test that a fetch error doesn't leave the assignment's build lock behind."""
+    def broken_fetch(assignment_id):
+        raise OSError("Canvas unavailable")
+    index = SubmissionIndex(broken_fetch)
+    
+    with pytest.raises(OSError):
+        index.index(7)
+    
+    assert index._building == {}
+
+
+def test_posted_state_skips_unchanged_posts():
+    """Test that only the parts of a post that changed are posted again."""
+    state = PostedState()
+    assert state.changes(7, 1, grade=90, comment="Good") == (90, "Good")
+    state.record(7, 1, grade=90, comment="Good")
+    
+    assert state.changes(7, 1, grade="90.0", comment="Good") is None
+    assert state.changes(7, "1", grade=90) is None
+    assert state.changes(7, 1, grade=95, comment="Good") == (95, None)
+    assert state.changes(7, 1, grade=90, comment="Better") == (None, "Better")
+    assert state.changes(7, 2, grade=90) == (90, None)
+    assert state.get_stats() == {"recorded": 1, "skipped": 2, "students": 1, "seeded": 0}
+
+
+def test_posted_state_seeded_from_submissions():
+    """Test that seeding replaces an assignment's state with what Canvas holds."""
+    state = PostedState()
+    state.record(7, 3, grade=50)
+    state.record(8, 1, grade=60)
+    submissions = [
+        SimpleNamespace(user_id=1, entered_grade="90", submission_comments=[
+            {"comment": "Old"}, {"comment": "Latest"}
+        ]),
+        SimpleNamespace(user_id=2, entered_grade=None, grade=None, submission_comments=[])
+    ]
+    
+    state.seed(7, submissions)
+    
+    assert state.seeded(7) and not state.seeded(8)
+    assert state.changes(7, 1, grade=90, comment="Latest") is None
+    assert state.changes(7, 1, comment="Old") == (None, "Old")
+    assert not state.has_grade(7, 2)
+    # Students Canvas doesn't list are forgotten; other assignments are kept
+    assert state.changes(7, 3, grade=50) == (50, None)
+    assert state.changes(8, 1, grade=60) is None
+
+
+def test_grade_matches():
+    """Test that recorded grades are compared by value, falling back to text."""
+    assert grade_matches(SimpleNamespace(entered_grade="90.0"), 90)
+    assert grade_matches(SimpleNamespace(entered_grade=None, grade="A"), " A ")
+    assert grade_matches(SimpleNamespace(entered_grade=None, grade=None), "")
+    assert not grade_matches(SimpleNamespace(entered_grade="85"), "90")
+    assert not grade_matches(SimpleNamespace(entered_grade=None, grade=None), 90)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Unit tests for the canvas_client module.
+"""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from autograder import canvas_client
+from autograder.canvas_client import AsyncCanvasClient, CanvasRequestError, RateLimitBudget
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, remaining=None, text="", next_url=None):
+        self.status_code = status_code
+        self.body = body
+        self.text = text
+        self.headers = {}
+        if remaining is not None:
+            self.headers["X-Rate-Limit-Remaining"] = str(remaining)
+        self.links = {"next": {"url": next_url}} if next_url else {}
+    
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Session that answers from a handler and tracks requests in flight."""
+    
+    def __init__(self, handler, delay=0):
+        self.handler = handler
+        self.delay = delay
+        self.headers = {}
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def request(self, method, url, timeout=None, **kwargs):
+        with self._lock:
+            self.calls.append((method, url, kwargs))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return self.handler(method, url, kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+    
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(canvas_client, "backoff_delay", lambda attempt: 0)
+
+
+def make_client(handler, delay=0, **kwargs):
+    session = FakeSession(handler, delay)
+    return AsyncCanvasClient("https://canvas.test/", "token", session=session, **kwargs), session
+
+
+def test_budget_scales_concurrency():
+    """Test that concurrency shrinks as the rate-limit budget runs down."""
+    budget = RateLimitBudget(8, low=100, high=400)
+    
+    budget.update(700)
+    assert budget.limit == 8
+    budget.update(250)
+    assert 1 < budget.limit < 8
+    budget.update(50)
+    assert budget.limit == 1
+    budget.update(700)
+    budget.throttled()
+    assert budget.limit == 1
+
+
+def test_throttled_requests_are_retried():
+    """Test that a 403 throttle response is retried until it succeeds."""
+    answers = [
+        FakeResponse(403, text="403 Forbidden (Rate Limit Exceeded)", remaining=0),
+        FakeResponse(403, text="403 Forbidden (Rate Limit Exceeded)", remaining=0),
+        FakeResponse(200, {"id": 5, "name": "Lab 1"}, remaining=600)
+    ]
+    client, session = make_client(lambda method, url, kwargs: answers.pop(0))
+    
+    assignment = asyncio.run(client.get_assignment(1, 5))
+    
+    assert assignment["name"] == "Lab 1"
+    assert session.calls[0][1] == "https://canvas.test/api/v1/courses/1/assignments/5"
+    assert session.headers["Authorization"] == "Bearer token"
+    assert client.stats == {"requests": 3, "throttled": 2, "retries": 2}
+    assert client.budget.limit == client.max_concurrency
+
+
+def test_gives_up_after_max_retries():
+    """Test that a request that stays throttled fails instead of looping."""
+    client, session = make_client(
+        lambda method, url, kwargs: FakeResponse(429), max_retries=2
+    )
+    
+    with pytest.raises(CanvasRequestError) as error:
+        asyncio.run(client.get_assignment(1, 5))
+    
+    assert error.value.status_code == 429
+    assert len(session.calls) == 3
+
+
+def test_pagination_follows_links():
+    """Test that every page of submissions is fetched."""
+    def handler(method, url, kwargs):
+        if "page=2" in url:
+            return FakeResponse(200, [{"user_id": 3}])
+        assert kwargs["params"]["per_page"] == 100
+        return FakeResponse(200, [{"user_id": 1}, {"user_id": 2}],
+                            next_url="https://canvas.test/api/v1/next?page=2")
+    
+    client, session = make_client(handler)
+    submissions = asyncio.run(client.get_submissions(1, 5))
+    
+    assert [s["user_id"] for s in submissions] == [1, 2, 3]
+
+
+def test_edit_submissions_concurrent_with_failures():
+    """Test posting a roster concurrently, with per-student failures and the budget respected."""
+    def handler(method, url, kwargs):
+        if url.endswith("/submissions/13"):
+            return FakeResponse(404, text="not found", remaining=150)
+        # A low budget drops concurrency to one request at a time
+        return FakeResponse(200, {"grade": kwargs["data"]["submission[posted_grade]"]}, remaining=50)
+    
+    client, session = make_client(handler, delay=0.01, max_concurrency=4)
+    grades = {student_id: (90, "Nice work") for student_id in range(10, 20)}
+    
+    results = asyncio.run(client.edit_submissions(1, 5, grades))
+    
+    assert not results["success"]
+    assert set(results["failed"]) == {13}
+    assert len(results["posted"]) == 9
+    assert session.calls[0][0] == "PUT"
+    assert session.calls[0][2]["data"] == {
+        "submission[posted_grade]": 90, "comment[text_comment]": "Nice work"
+    }
+    # Only the requests sent before the first budget report ran together
+    assert session.max_in_flight <= 4
+    assert client.budget.limit == 1
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Unit tests for the canvas_outbox module.
+"""
+
+import pytest
+
+from autograder import canvas_outbox
+from autograder.canvas_outbox import CanvasOutbox, CircuitBreaker, OutboxWorker
+
+COURSE = 42
+
+
+def make_post(calls, failed=None, error=None):
+    """Build a post function that records calls and fails the given students."""
+    def post(assignment_id, grades):
+        calls.append((assignment_id, dict(grades)))
+        if error is not None:
+            raise error
+        failures = {student_id: "failed" for student_id in grades if student_id in (failed or ())}
+        return {
+            "posted": [student_id for student_id in grades if student_id not in failures],
+            "failed": failures
+        }
+    return post
+
+
+def test_pending_posts_coalesce(tmp_path):
+    """Test that repeated posts for a student become one post of the latest grade."""
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue(COURSE, 7, 1, comment="Feedback")
+    for grade in range(10):
+        outbox.enqueue(COURSE, 7, 1, grade=grade)
+    outbox.enqueue(COURSE, 7, 2, grade=5)
+    
+    posts = outbox.claim(COURSE)
+    
+    assert len(posts) == 2
+    first = next(post for post in posts if post["student_id"] == "1")
+    assert first["grade"] == "9"
+    assert first["comment"] == "Feedback"
+    assert outbox.get_stats()["pending"] == 2
+
+
+def test_enqueue_needs_something_to_post(tmp_path):
+    """Test that an empty post is rejected."""
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    
+    with pytest.raises(ValueError):
+        outbox.enqueue(COURSE, 7, 1)
+
+
+def test_posts_survive_reopening(tmp_path):
+    """Test that queued posts are still there after a restart."""
+    path = tmp_path / "outbox.sqlite3"
+    outbox = CanvasOutbox(path)
+    outbox.enqueue(COURSE, 7, 1, grade=90)
+    outbox.close()
+    
+    posts = CanvasOutbox(path).claim(COURSE)
+    
+    assert [(post["student_id"], post["grade"]) for post in posts] == [("1", "90")]
+
+
+def test_worker_delivers_and_removes_posts(tmp_path):
+    """Test that a drain posts each assignment once and empties the outbox."""
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue(COURSE, 7, 1, grade=90, comment="Good")
+    outbox.enqueue(COURSE, 7, 2, grade=80)
+    outbox.enqueue(COURSE, 8, 1, grade=70)
+    calls = []
+    worker = OutboxWorker(outbox, COURSE, make_post(calls), interval=1)
+    
+    assert worker.drain_once() == 3
+    
+    assert sorted(calls) == [
+        ("7", {"1": ("90", "Good"), "2": ("80", None)}),
+        ("8", {"1": ("70", None)})
+    ]
+    assert outbox.get_stats()["pending"] == 0
+    assert worker.drain_once() == 0
+
+
+def test_failed_posts_back_off_then_give_up(tmp_path, monkeypatch):
+    """Test that failed posts wait before retrying and are dropped after max_attempts."""
+    now = [1000.0]
+    monkeypatch.setattr(canvas_outbox.time, "time", lambda: now[0])
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3", max_attempts=2)
+    outbox.enqueue(COURSE, 7, 1, grade=90)
+    outbox.enqueue(COURSE, 7, 2, grade=80)
+    calls = []
+    worker = OutboxWorker(outbox, COURSE, make_post(calls, failed={"2"}), interval=1)
+    
+    assert worker.drain_once() == 1
+    # Backing off: nothing is due yet
+    assert outbox.claim(COURSE) == []
+    
+    now[0] += 3600
+    worker.drain_once()
+    
+    assert [grades for _, grades in calls] == [{"1": ("90", None), "2": ("80", None)}, {"2": ("80", None)}]
+    assert outbox.get_stats()["pending"] == 0
+    assert outbox.get_stats()["dead"] == 1
+
+
+def test_post_replaced_in_flight_stays_queued(tmp_path):
+    """Test that a grade queued while an older one is being sent isn't lost."""
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue(COURSE, 7, 1, grade=80)
+    
+    def post(assignment_id, grades):
+        outbox.enqueue(COURSE, 7, 1, grade=95)
+        return {"posted": list(grades), "failed": {}}
+    OutboxWorker(outbox, COURSE, post, interval=1).drain_once()
+    
+    assert [post["grade"] for post in outbox.claim(COURSE)] == ["95"]
+
+
+def test_breaker_opens_after_repeated_failures(tmp_path, monkeypatch):
+    """Test that the worker stops calling Canvas while it keeps failing."""
+    clock = [0.0]
+    monkeypatch.setattr(canvas_outbox.time, "monotonic", lambda: clock[0])
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    calls = []
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    worker = OutboxWorker(outbox, COURSE, make_post(calls, error=OSError("down")), interval=1, breaker=breaker)
+    
+    for assignment_id in range(5):
+        outbox.enqueue(COURSE, assignment_id, 1, grade=90)
+    worker.drain_once()
+    
+    assert len(calls) == 2
+    assert worker.get_stats()["breaker"] == "open"
+    assert worker.drain_once() == 0
+    assert len(calls) == 2
+    
+    # After the reset timeout one trial call goes through and closes the circuit
+    clock[0] += 60
+    assert breaker.state == "half-open"
+    worker.post = make_post(calls)
+    monkeypatch.setattr(canvas_outbox.time, "time", lambda: 10 ** 10)
+    
+    assert worker.drain_once() == 5
+    assert breaker.state == "closed"
+
+
+def test_flush_waits_for_delivery(tmp_path):
+    """Test that flush reports nothing left once every post is delivered."""
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue(COURSE, 7, 1, grade=90)
+    worker = OutboxWorker(outbox, COURSE, make_post([]), interval=0.01)
+    
+    assert worker.flush(timeout=1) == 0
+
+
+def test_claims_are_exclusive_until_the_lease_expires(tmp_path, monkeypatch):
+    """Test that two outboxes on one database never claim the same post."""
+    now = [1000.0]
+    monkeypatch.setattr(canvas_outbox.time, "time", lambda: now[0])
+    path = tmp_path / "outbox.sqlite3"
+    first = CanvasOutbox(path, lease=60)
+    second = CanvasOutbox(path, lease=60)
+    for student_id in range(3):
+        first.enqueue(COURSE, 7, student_id, grade=90)
+    
+    claimed = first.claim(COURSE, limit=2)
+    
+    assert len(claimed) == 2
+    assert [post["student_id"] for post in second.claim(COURSE)] == ["2"]
+    assert second.claim(COURSE) == []
+    
+    # A sender that died holding a lease doesn't block its posts forever
+    now[0] += 61
+    assert len(second.claim(COURSE)) == 3
+
+
+def test_posts_are_claimed_per_course(tmp_path):
+    """Test that a worker only sends posts queued for its own course."""
+    outbox = CanvasOutbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue(COURSE, 7, 1, grade=90)
+    outbox.enqueue("other", 8, 1, grade=70)
+    calls = []
+    
+    OutboxWorker(outbox, COURSE, make_post(calls), interval=1).drain_once()
+    
+    assert [assignment_id for assignment_id, _ in calls] == ["7"]
+    assert [post["assignment_id"] for post in outbox.claim("other")] == ["8"]
+
+
+def test_one_worker_per_process(tmp_path, monkeypatch):
+    """Test that every integration in a process shares the course's worker."""
+    monkeypatch.setattr(canvas_outbox, "_workers", {})
+    monkeypatch.setattr(canvas_outbox.atexit, "register", lambda function: None)
+    path = tmp_path / "outbox.sqlite3"
+    
+    worker = canvas_outbox.get_outbox_worker(COURSE, make_post([]), path)
+    try:
+        assert canvas_outbox.get_outbox_worker(COURSE, make_post([]), path) is worker
+        assert canvas_outbox.get_outbox_worker("other", make_post([]), path) is not worker
+    finally:
+        canvas_outbox.stop_outbox_workers()
+    
+    assert canvas_outbox._workers == {}
\ No newline at end of file
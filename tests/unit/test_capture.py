@@ -0,0 +1,75 @@
+"""
+Unit tests for the capture module.
+"""
+
+import sys
+
+from autograder.capture import HeadTailBuffer, HeadTailWriter
+from autograder.test_runner import load_module_from_file, run_doctest
+
+
+def test_head_tail_buffer():
+    """Test that only the head and tail are kept."""
+    buffer = HeadTailBuffer(4, 3)
+    for chunk in (b"ab", b"cdef", b"ghij", b"", b"k"):
+        buffer.write(chunk)
+    
+    assert buffer.total == 11
+    assert buffer.truncated_bytes == 4
+    assert buffer.getvalue() == b"abcd\n... [4 bytes truncated] ...\nijk"
+    assert buffer.text().startswith("abcd")
+
+
+def test_head_tail_buffer_untruncated():
+    """Test that short output is kept as is."""
+    buffer = HeadTailBuffer(4, 4)
+    buffer.write(b"abcdef")
+    
+    assert not buffer.truncated
+    assert buffer.getvalue() == b"abcdef"
+
+
+def test_head_tail_buffer_many_small_writes():
+    """Test that memory stays bounded for output printed in a loop."""
+    buffer = HeadTailBuffer(10, 10, empty="")
+    for i in range(100000):
+        buffer.write(f"{i}\n")
+        
+    assert len(buffer._tail) <= 10
+    assert buffer.getvalue().endswith("998\n99999\n")
+
+
+def test_head_tail_writer_as_stdout():
+    """Test capturing prints with the writer."""
+    writer = HeadTailWriter(5, 5)
+    old_stdout = sys.stdout
+    sys.stdout = writer
+    try:
+        for _ in range(10):
+            print("xx")
+    finally:
+        sys.stdout = old_stdout
+    
+    assert writer.truncated_bytes == 20
+    assert writer.getvalue().startswith("xx\nxx")
+
+
+def test_doctest_output_is_capped(tmp_path):
+    """Test that a doctest printing in a loop has bounded output."""
+    source = tmp_path / "functions.py"
+    source.write_text('''
+def noisy():
+    """
+    >>> noisy()
+    done
+    """
+    for i in range(200000):
+        print("spam")
+''')
+    
+    module = load_module_from_file(source)
+    result = run_doctest(module, output_head=100, output_tail=100)[0]
+    
+    assert result["failures"] == 1
+    assert result["output_truncated"] > 0
+    assert len(result["output"]) < 1000
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Unit tests for the container_events module.
+"""
+
+import queue
+import concurrent.futures
+
+import pytest
+
+from autograder.container_events import ContainerCompletionTracker, GRADER_LABEL
+
+
+class FakeStream:
+    """Blocking events stream fed from a queue."""
+    
+    def __init__(self):
+        self.events = queue.Queue()
+    
+    def __iter__(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+    
+    def close(self):
+        self.events.put(None)
+
+
+class FakeAPI:
+    """Low-level API used to reconcile after a dropped stream."""
+    
+    def __init__(self):
+        self.states = {}
+    
+    def inspect_container(self, container_id):
+        return {"State": self.states[container_id]}
+
+
+class FakeClient:
+    """Minimal stand-in for a docker client."""
+    
+    def __init__(self):
+        self.streams = []
+        self.subscriptions = []
+        self.api = FakeAPI()
+    
+    def events(self, **kwargs):
+        self.subscriptions.append(kwargs)
+        stream = FakeStream()
+        self.streams.append(stream)
+        return stream
+
+
+def event(container_id, action, exit_code=None):
+    """Build a docker container event."""
+    attributes = {GRADER_LABEL: "1"}
+    if exit_code is not None:
+        attributes["exitCode"] = str(exit_code)
+    return {
+        "Type": "container",
+        "Action": action,
+        "Actor": {"ID": container_id, "Attributes": attributes},
+        "timeNano": 1700000000000000000
+    }
+
+
+@pytest.fixture
+def tracker():
+    client = FakeClient()
+    tracker = ContainerCompletionTracker(client, reconnect_delay=0)
+    tracker.start()
+    yield tracker
+    tracker.close()
+
+
+def test_resolves_on_die(tracker):
+    """Test that die events complete futures, with OOM recorded."""
+    first = tracker.watch("aaa")
+    second = tracker.watch("bbb")
+    
+    subscription = tracker.client.subscriptions[0]
+    assert subscription["filters"]["label"] == GRADER_LABEL
+    assert subscription["filters"]["event"] == ["die", "oom"]
+    
+    stream = tracker.client.streams[0]
+    stream.events.put(event("bbb", "oom"))
+    stream.events.put(event("bbb", "die", 137))
+    stream.events.put(event("aaa", "die", 0))
+    
+    assert first.result(timeout=5) == {"StatusCode": 0, "OOMKilled": False}
+    assert second.result(timeout=5) == {"StatusCode": 137, "OOMKilled": True}
+
+
+def test_exit_before_watch(tracker):
+    """Test that an exit seen before watch() is not lost."""
+    tracker.client.streams[0].events.put(event("ccc", "die", 1))
+    # Wait for the event to be processed
+    tracker.client.streams[0].events.put(event("sync", "die", 0))
+    tracker.watch("sync").result(timeout=5)
+    
+    assert tracker.wait("ccc", timeout=5) == {"StatusCode": 1, "OOMKilled": False}
+
+
+def test_wait_timeout(tracker):
+    """Test that wait() times out and stops watching."""
+    with pytest.raises(concurrent.futures.TimeoutError):
+        tracker.wait("ddd", timeout=0.01)
+    assert "ddd" not in tracker._pending
+
+
+def test_reconcile_after_reconnect(tracker):
+    """Test that exits missed while disconnected are picked up by inspect."""
+    client = tracker.client
+    client.api.states["eee"] = {"Running": False, "ExitCode": 2, "OOMKilled": False}
+    future = tracker.watch("eee")
+    
+    # Drop the stream; the tracker resubscribes and reconciles
+    client.streams[0].close()
+    
+    assert future.result(timeout=5) == {"StatusCode": 2, "OOMKilled": False}
+    assert len(client.subscriptions) >= 2
+
+
+def test_watch_twice(tracker):
+    """Test that watching a container again after it exits still resolves."""
+    first = tracker.watch("fff")
+    tracker.client.streams[0].events.put(event("fff", "die", 0))
+    first.result(timeout=5)
+    
+    assert tracker.wait("fff", timeout=5)["StatusCode"] == 0
@@ -0,0 +1,169 @@
+"""
+Unit tests for the warm container pool.
+"""
+
+import io
+import struct
+import tarfile
+import itertools
+
+from autograder.container_pool import ContainerPool
+from autograder.capture import HeadTailBuffer
+from autograder.docker_streams import CappedBuffer, iter_frames, parse_ndjson, tar_directory
+
+
+class FakeContainer:
+    """Minimal stand-in for a docker container."""
+    
+    _ids = itertools.count()
+    
+    def __init__(self):
+        self.id = f"container{next(self._ids):04d}"
+        self.removed = False
+    
+    def remove(self, force=False, v=False):
+        self.removed = True
+
+
+def frame(stream_id, data):
+    """Encode one docker multiplexed stream frame."""
+    return struct.pack(">BxxxL", stream_id, len(data)) + data
+
+
+class FakeSocket:
+    """Socket that records stdin and replays multiplexed output."""
+    
+    def __init__(self, output):
+        self.output = io.BytesIO(output)
+        self.sent = b""
+    
+    def sendall(self, data):
+        self.sent += data
+    
+    def shutdown(self, how):
+        pass
+    
+    def recv(self, size):
+        return self.output.read(size)
+    
+    def close(self):
+        pass
+
+
+class FakeAPI:
+    """Low-level exec API used by the pool."""
+    
+    def __init__(self):
+        self.execs = []
+        self.leftovers = False
+    
+    def exec_create(self, container_id, cmd, **kwargs):
+        self.execs.append((container_id, cmd, kwargs))
+        return {"Id": f"exec{len(self.execs)}"}
+    
+    def exec_start(self, exec_id, socket=False):
+        if not socket:
+            return b""
+        self.socket = FakeSocket(frame(1, b'{"event": "score"}\n') + frame(2, b"printed\n"))
+        return self.socket
+    
+    def exec_inspect(self, exec_id):
+        cmd = self.execs[int(exec_id[4:]) - 1][1]
+        # The leftover-process check fails when a submission left processes
+        return {"ExitCode": 1 if cmd[0] == "sh" and self.leftovers else 0}
+
+
+class FakeClient:
+    """Minimal stand-in for a docker client."""
+    
+    def __init__(self):
+        self.started = []
+        self.containers = self
+        self.api = FakeAPI()
+    
+    def run(self, **kwargs):
+        container = FakeContainer()
+        self.started.append((container, kwargs))
+        return container
+
+
+def test_tar_directory(tmp_path):
+    """Test that submissions are archived under the requested name."""
+    (tmp_path / "functions.py").write_text("x = 1\n")
+    
+    with tarfile.open(fileobj=io.BytesIO(tar_directory(tmp_path))) as tar:
+        names = tar.getnames()
+    
+    assert "submission/functions.py" in names
+
+
+def test_stream_helpers():
+    """Test frame demultiplexing, output caps and NDJSON parsing."""
+    sock = FakeSocket(frame(1, b"out") + frame(2, b"err") + frame(1, b"more"))
+    assert list(iter_frames(sock)) == [(1, b"out"), (2, b"err"), (1, b"more")]
+    
+    buffer = CappedBuffer(4)
+    buffer.write(b"abc")
+    buffer.write(b"def")
+    assert buffer.getvalue() == b"abcd"
+    assert buffer.truncated_bytes == 2
+    
+    assert parse_ndjson(b'{"event": "load"}\nnoise\n\n{"event": "score"}\n') == [
+        {"event": "load"}, {"event": "score"}
+    ]
+
+
+def test_pool_reuses_and_recycles_containers(tmp_path):
+    """Test hit/miss accounting and replacement after max_uses."""
+    client = FakeClient()
+    pool = ContainerPool(client, "image", size=1, max_uses=2,
+                         container_options={"network_mode": "none"})
+    pool.start()
+    
+    assert pool.get_stats()["cold_starts"] == 1
+    assert client.started[0][1]["network_mode"] == "none"
+    
+    first = pool.acquire()
+    second = pool.acquire()  # pool is empty, so this is a miss
+    pool.release(second)
+    pool.release(first)      # pool is full, so this one is discarded
+    
+    stats = pool.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["recycled"] == 1
+    assert first.removed
+    
+    # The kept container is replaced once it reaches max_uses
+    exit_code, stdout, stderr = pool.run(
+        b"archive", ["python", "x"], 5, CappedBuffer(1024), HeadTailBuffer(64, 64)
+    )
+    assert exit_code == 0
+    assert stdout.getvalue() == b'{"event": "score"}\n'
+    assert stderr.getvalue() == b"printed\n"
+    assert client.api.socket.sent == b"archive"
+    assert client.api.execs[0][0] == second.id
+    assert client.api.execs[0][1] == ["timeout", "-s", "KILL", "5", "python", "x"]
+    assert second.removed
+    
+    pool.close()
+
+
+def test_pool_replaces_container_with_leftover_processes():
+    """Test that a container a submission left processes in isn't reused."""
+    client = FakeClient()
+    pool = ContainerPool(client, "image", size=1, max_uses=20)
+    pool.start()
+    
+    pool.run(b"archive", ["python", "x"], 5, CappedBuffer(1024), HeadTailBuffer(64, 64))
+    first = client.started[0][0]
+    assert not first.removed
+    assert client.api.execs[1][1][:2] == ["sh", "-c"]
+    
+    client.api.leftovers = True
+    exit_code, _, _ = pool.run(b"archive", ["python", "x"], 5, CappedBuffer(1024), HeadTailBuffer(64, 64))
+    
+    assert exit_code == 0
+    assert first.removed
+    assert pool.get_stats()["recycled"] == 1
+    pool.close()
\ No newline at end of file
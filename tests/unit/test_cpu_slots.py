@@ -0,0 +1,71 @@
+"""
+Unit tests for the cpu_slots module.
+"""
+
+import threading
+
+import pytest
+
+from autograder.cpu_slots import CpuSlots
+
+
+# Two cores with two hyperthreads each; siblings are numbered apart, as on most hosts
+TOPOLOGY = {0: (0, 0), 1: (0, 1), 2: (0, 0), 3: (0, 1)}
+
+
+def test_slots_are_disjoint():
+    """Test that slots split the CPUs without overlap."""
+    slots = CpuSlots(1, cpus=[0, 1, 2, 3], topology=TOPOLOGY)
+    
+    taken = [slots.acquire() for _ in range(4)]
+    cpus = [slots.cpuset(index) for index in taken]
+    
+    assert sorted(cpus) == ["0", "1", "2", "3"]
+    with pytest.raises(TimeoutError):
+        slots.acquire(timeout=0.01)
+
+
+def test_slots_spread_across_cores():
+    """Test that the second submission goes to an idle core, not a hyperthread sibling."""
+    slots = CpuSlots(1, cpus=[0, 1, 2, 3], topology=TOPOLOGY)
+    
+    first = slots.cpuset(slots.acquire())
+    second = slots.cpuset(slots.acquire())
+    
+    assert TOPOLOGY[int(first)] != TOPOLOGY[int(second)]
+
+
+def test_multi_cpu_slots_take_whole_cores():
+    """Test that a two-CPU slot is both hyperthreads of one core."""
+    slots = CpuSlots(2, cpus=[0, 1, 2, 3], topology=TOPOLOGY)
+    
+    assert slots.slots == [(0, 2), (1, 3)]
+    with slots.slot() as cpuset:
+        assert cpuset == "0,2"
+
+
+def test_small_host_shares_one_slot():
+    """Test that a host with fewer CPUs than a slot still gets one slot."""
+    slots = CpuSlots(4, cpus=[0, 1], topology={0: (0, 0), 1: (0, 1)})
+    
+    assert slots.slots == [(0, 1)]
+
+
+def test_waiting_and_utilization():
+    """Test that a caller waits for a released slot and that stats are kept."""
+    slots = CpuSlots(1, cpus=[0], topology={0: (0, 0)})
+    index = slots.acquire()
+    
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(slots.acquire(timeout=5)))
+    waiter.start()
+    slots.release(index)
+    waiter.join()
+    
+    assert acquired == [0]
+    stats = slots.get_stats()
+    assert stats["slots"] == 1
+    assert stats["busy"] == 1
+    assert stats["acquired"] == 2
+    assert stats["waited"] == 1
+    assert 0 < stats["utilization"] <= 1
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Unit tests for the docker_client module.
+"""
+
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from autograder import docker_client
+from autograder.docker_client import ImageCache
+
+
+class FakeImage:
+    def __init__(self, image_id):
+        self.id = image_id
+
+
+class FakeImages:
+    """Image store whose tags can be moved."""
+    
+    def __init__(self):
+        self.tags = {"grader:latest": "sha256:aaa"}
+        self.calls = 0
+    
+    def get(self, name):
+        self.calls += 1
+        if name not in self.tags:
+            raise LookupError(name)
+        return FakeImage(self.tags[name])
+
+
+class FakeClient:
+    def __init__(self):
+        self.images = FakeImages()
+
+
+def test_image_cache_hits_within_ttl():
+    """Test that repeated lookups don't go back to the daemon."""
+    client = FakeClient()
+    cache = ImageCache(client, ttl=60)
+    
+    for _ in range(100):
+        assert cache.resolve("grader:latest") == "sha256:aaa"
+    
+    assert client.images.calls == 1
+
+
+def test_image_cache_refreshes_moved_tag(monkeypatch):
+    """Test that a moved tag is picked up after the TTL or an invalidate."""
+    client = FakeClient()
+    cache = ImageCache(client, ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(docker_client.time, "monotonic", lambda: now[0])
+    
+    cache.resolve("grader:latest")
+    client.images.tags["grader:latest"] = "sha256:bbb"
+    assert cache.resolve("grader:latest") == "sha256:aaa"
+    
+    now[0] += 61
+    assert cache.resolve("grader:latest") == "sha256:bbb"
+    
+    client.images.tags["grader:latest"] = "sha256:ccc"
+    cache.invalidate("grader:latest")
+    assert cache.resolve("grader:latest") == "sha256:ccc"
+
+
+def test_image_cache_missing_image_not_cached():
+    """Test that a missing image raises and is looked up again next time."""
+    client = FakeClient()
+    cache = ImageCache(client)
+    
+    with pytest.raises(LookupError):
+        cache.resolve("missing:latest")
+    with pytest.raises(LookupError):
+        cache.resolve("missing:latest")
+    
+    assert client.images.calls == 2
+
+
+def test_shared_objects_are_per_process(monkeypatch):
+    """Test that shared objects are reused, but recreated after a fork."""
+    monkeypatch.setattr(docker_client, "_shared", {})
+    created = []
+    
+    def factory():
+        created.append(object())
+        return created[-1]
+    
+    first = docker_client._shared_object("thing", factory)
+    assert docker_client._shared_object("thing", factory) is first
+    
+    monkeypatch.setattr(docker_client.os, "getpid", lambda: -1)
+    assert docker_client._shared_object("thing", factory) is not first
+    assert len(created) == 2
+
+
+def test_shared_objects_built_on_the_client(monkeypatch):
+    """Test that caches built on the shared client can be created from a cold start."""
+    monkeypatch.setattr(docker_client, "_shared", {})
+    client = FakeClient()
+    monkeypatch.setitem(sys.modules, "docker", SimpleNamespace(from_env=lambda **kwargs: client))
+    results = {}
+    
+    def create():
+        results["images"] = docker_client.get_image_cache()
+        results["assignment_images"] = docker_client.get_assignment_images()
+    # Run in a thread so a deadlock fails the test instead of hanging it
+    thread = threading.Thread(target=create, daemon=True)
+    thread.start()
+    thread.join(5)
+    
+    assert not thread.is_alive()
+    assert results["images"].client is client
+    assert results["assignment_images"].client is client
+    assert docker_client.get_docker_client() is client
+
+
+def test_daemon_cpus_local_and_remote(monkeypatch):
+    """Test that only a daemon on this host is pinned to this host's CPUs."""
+    monkeypatch.setattr(docker_client, "host_cpus", lambda: [2, 3])
+    monkeypatch.setattr(docker_client.socket, "gethostname", lambda: "grader")
+    
+    def client(base_url, name, ncpu):
+        return SimpleNamespace(
+            api=SimpleNamespace(base_url=base_url),
+            info=lambda: {"Name": name, "NCPU": ncpu}
+        )
+    
+    assert docker_client.daemon_cpus(client("http+docker://localhost", "grader", 8)) == ([2, 3], None)
+    # A remote DOCKER_HOST, or Docker Desktop's VM behind a local socket
+    assert docker_client.daemon_cpus(client("https://build:2376", "build", 4)) == ([0, 1, 2, 3], {})
+    assert docker_client.daemon_cpus(client("http+docker://localhost", "docker-desktop", 2)) == ([0, 1], {})
+
+
+def test_daemon_cpus_shared(monkeypatch):
+    """Test that the daemon is only asked for its CPUs once per process."""
+    monkeypatch.setattr(docker_client, "_shared", {})
+    calls = []
+    
+    def info():
+        calls.append(1)
+        return {"Name": "build", "NCPU": 2}
+    client = SimpleNamespace(api=SimpleNamespace(base_url="https://build:2376"), info=info)
+    monkeypatch.setattr(docker_client, "get_docker_client", lambda: client)
+    
+    assert docker_client.get_daemon_cpus() == ([0, 1], {})
+    assert docker_client.get_daemon_cpus() == ([0, 1], {})
+    assert len(calls) == 1
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Unit tests for the in-container grading harness.
+"""
+
+import json
+
+from autograder.harness import encode_assignment_config, main
+from autograder.test_runner import grade_submission
+
+
+CODE = '''
+def divide(a, b):
+    """
+    >>> divide(6, 3)
+    2.0
+    """
+    return a / b
+'''
+
+
+def test_encode_assignment_config_names_exceptions():
+    """Test that exception classes are sent to the harness by name."""
+    config = {"error_cases": {"divide": {"zero": {"args": [1, 0], "exception": ZeroDivisionError}}}}
+    
+    decoded = json.loads(encode_assignment_config(config))
+    
+    assert decoded["error_cases"]["divide"]["zero"]["exception"] == "ZeroDivisionError"
+
+
+def test_harness_matches_local_grading(tmp_path):
+    """Test that the harness writes the same results as grade_submission."""
+    (tmp_path / "functions.py").write_text(CODE)
+    output = tmp_path / "results.json"
+    config = {
+        "required_functions": ["divide"],
+        "error_cases": {"divide": {
+            "zero": {"args": [1, 0], "exception": ZeroDivisionError},
+            "custom": {"args": [1, 0], "exception": "NotARealError"}
+        }}
+    }
+    
+    assert main([str(tmp_path), "--config-json", encode_assignment_config(config),
+                 "--output", str(output)]) == 0
+    
+    results = json.loads(output.read_text())
+    assert results == json.loads(json.dumps(grade_submission(tmp_path, config)))
+    assert results["error_handling_results"]["divide"]["zero"]["success"]
+    assert not results["error_handling_results"]["divide"]["custom"]["success"]
+
+
+def test_harness_streams_stdin_tar(tmp_path, monkeypatch, capfd):
+    """Test grading a tar archive from stdin with NDJSON events on stdout."""
+    import io
+    import sys
+    from autograder.docker_streams import tar_directory, parse_ndjson
+    from autograder.test_runner import results_from_events
+    
+    (tmp_path / "functions.py").write_text(CODE + "\nprint('noise')\n")
+    stdin = io.TextIOWrapper(io.BytesIO(tar_directory(tmp_path)))
+    monkeypatch.setattr(sys, "stdin", stdin)
+    
+    assert main(["--stdin-tar", "--format", "ndjson"]) == 0
+    
+    captured = capfd.readouterr()
+    events = parse_ndjson(captured.out.encode())
+    assert [e["event"] for e in events][-3:] == ["score", "output", "usage"]
+    assert events[-1]["peak_memory_bytes"] > 0
+    assert results_from_events(events)["passed_tests"] == 1
+    # Student prints are reported in an event, not mixed into the stream
+    assert events[-2]["stdout"] == "noise\n"
+
+
+def test_write_events_keeps_student_prints_out_of_the_stream(tmp_path, capfd):
+    """Test that a submission printing at import time doesn't corrupt the NDJSON stream."""
+    from autograder.harness import write_events
+    from autograder.docker_streams import parse_ndjson
+    
+    (tmp_path / "functions.py").write_text("print('hello from import')\n" + CODE)
+    output = tmp_path / "events.ndjson"
+    
+    write_events(tmp_path, {}, str(output))
+    write_events(tmp_path, {})
+    
+    for stream in (output.read_text(), capfd.readouterr().out):
+        lines = stream.splitlines()
+        assert all(line.startswith("{") for line in lines), lines
+        events = parse_ndjson(stream.encode())
+        assert events[0]["event"] == "load"
+        assert events[-2]["stdout"] == "hello from import\n"
\ No newline at end of file
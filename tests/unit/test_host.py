@@ -0,0 +1,63 @@
+"""
+Unit tests for the host module.
+"""
+
+import pytest
+
+from autograder import host
+from autograder.host import (
+    parse_memory_limit, host_capacity, host_cpu_count, host_memory_bytes, cpu_topology
+)
+
+
+def test_parse_memory_limit():
+    """Test converting Docker memory limits to bytes."""
+    assert parse_memory_limit("256m") == 256 * 1024 ** 2
+    assert parse_memory_limit("1g") == 1024 ** 3
+    assert parse_memory_limit("512K") == 512 * 1024
+    assert parse_memory_limit("1.5gb") == int(1.5 * 1024 ** 3)
+    assert parse_memory_limit(1000) == 1000
+    
+    with pytest.raises(ValueError):
+        parse_memory_limit("lots")
+
+
+def test_host_capacity():
+    """Test that capacity is bounded by both CPU and memory."""
+    gib = 1024 ** 3
+    
+    # CPU bound: 8 / 0.5 = 16, memory allows 32
+    assert host_capacity(0.5, "256m", cpus=8, memory=8 * gib) == 16
+    # Memory bound: 2 GiB / 512 MiB = 4
+    assert host_capacity(0.5, "512m", cpus=8, memory=2 * gib) == 4
+    # No floating point rounding down
+    assert host_capacity(0.1, None, cpus=2, memory=None) == 20
+    # Never less than one
+    assert host_capacity(4, "8g", cpus=1, memory=gib) == 1
+
+
+def test_cgroup_limits(tmp_path, monkeypatch):
+    """Test that cgroup v2 limits cap the detected resources."""
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    (tmp_path / "memory.max").write_text(f"{64 * 1024 ** 2}\n")
+    monkeypatch.setattr(host, "CGROUP_ROOT", tmp_path)
+    
+    assert host_cpu_count() <= 1.5
+    assert host_memory_bytes() == 64 * 1024 ** 2
+    
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    (tmp_path / "memory.max").write_text("max\n")
+    assert host_cpu_count() >= 1
+    assert host_memory_bytes() > 0
+
+
+def test_cpu_topology(tmp_path, monkeypatch):
+    """Test mapping CPUs to cores, with unreadable CPUs as separate cores."""
+    for cpu, core in ((0, 0), (1, 0)):
+        topology = tmp_path / f"cpu{cpu}" / "topology"
+        topology.mkdir(parents=True)
+        (topology / "physical_package_id").write_text("0\n")
+        (topology / "core_id").write_text(f"{core}\n")
+    monkeypatch.setattr(host, "CPU_ROOT", tmp_path)
+    
+    assert cpu_topology([0, 1, 5]) == {0: (0, 0), 1: (0, 0), 5: (-1, 5)}
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Unit tests for the reaper module.
+"""
+
+import os
+import socket
+import time
+
+from autograder.container_events import GRADER_LABEL
+from autograder.container_pool import POOL_LABEL, pool_owner
+from autograder.reaper import (
+    Reaper, TEMP_PREFIX, reap_containers, reap_temp_dirs, _parse_timestamp
+)
+
+
+class FakeAPI:
+    """Low-level API with a fixed set of containers."""
+    
+    def __init__(self, containers=()):
+        self.container_list = list(containers)
+        self.removed_containers = []
+    
+    def containers(self, all=False, filters=None):
+        return [c for c in self.container_list if GRADER_LABEL in c["Labels"]]
+    
+    def remove_container(self, container_id, v=False, force=False):
+        self.removed_containers.append(container_id)
+
+
+class FakeClient:
+    def __init__(self, api):
+        self.api = api
+
+
+def container(container_id, created, state="exited", **labels):
+    """Build a container entry as returned by the containers API."""
+    return {
+        "Id": container_id,
+        "Created": created,
+        "State": state,
+        "Labels": dict({GRADER_LABEL: "1"}, **labels)
+    }
+
+
+def test_parse_timestamp():
+    """Test parsing Docker's epoch and RFC 3339 timestamps."""
+    assert _parse_timestamp(1700000000) == 1700000000.0
+    assert _parse_timestamp("2023-11-14T22:13:20Z") == 1700000000.0
+    assert _parse_timestamp("2023-11-14T22:13:20.123456789Z") == 1700000000.123456
+    assert _parse_timestamp("garbage") is None
+
+
+def test_reap_containers_by_age():
+    """Test that only grading containers past the age threshold are removed."""
+    now = 10000
+    api = FakeAPI([
+        container("old-exited", now - 7200),
+        container("old-running", now - 7200, state="running"),
+        container("new", now - 60, state="running"),
+    ])
+    
+    assert reap_containers(FakeClient(api), 3600, now) == 2
+    assert api.removed_containers == ["old-exited", "old-running"]
+
+
+def test_reap_containers_keeps_live_pools():
+    """Test that pooled containers survive while their owner process lives."""
+    now = 10000
+    host = socket.gethostname()
+    api = FakeAPI([
+        container("ours", now - 7200, state="running", **{POOL_LABEL: pool_owner()}),
+        container("orphan", now - 7200, state="running", **{POOL_LABEL: f"{host}:999999999"}),
+        container("stopped", now - 7200, **{POOL_LABEL: pool_owner()}),
+        # Owned by a process elsewhere, whose PID can't be checked here
+        container("elsewhere", now - 7200, state="running", **{POOL_LABEL: "other-host:999999999"}),
+    ])
+    
+    assert reap_containers(FakeClient(api), 3600, now) == 2
+    assert api.removed_containers == ["orphan", "stopped"]
+
+
+def test_reap_temp_dirs(tmp_path):
+    """Test that only old directories with the grader's prefix are removed."""
+    old = tmp_path / f"{TEMP_PREFIX}old"
+    new = tmp_path / f"{TEMP_PREFIX}new"
+    other = tmp_path / "other-old"
+    for path in (old, new, other):
+        (path / "sub").mkdir(parents=True)
+    
+    stale = time.time() - 7200
+    os.utime(old, (stale, stale))
+    os.utime(other, (stale, stale))
+    
+    assert reap_temp_dirs(3600, tmp_path) == 1
+    assert not old.exists()
+    assert new.exists() and other.exists()
+
+
+def test_reaper_counts(tmp_path):
+    """Test that the reaper accumulates counts across passes."""
+    stale = time.time() - 7200
+    api = FakeAPI([container("old", stale)])
+    (tmp_path / f"{TEMP_PREFIX}x").mkdir()
+    os.utime(tmp_path / f"{TEMP_PREFIX}x", (stale, stale))
+    
+    reaper = Reaper(FakeClient(api), max_age=3600, temp_dir=tmp_path)
+    assert reaper.run_once() == {"containers": 1, "temp_dirs": 1}
+    reaper.run_once()
+    
+    stats = reaper.get_stats()
+    assert stats["runs"] == 2
+    assert stats["containers"] == 2  # The fake API never forgets containers
+    assert stats["temp_dirs"] == 1
+    assert stats["errors"] == 0
\ No newline at end of file
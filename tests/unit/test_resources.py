@@ -0,0 +1,40 @@
+"""
+Unit tests for the resources module.
+"""
+
+from autograder.resources import resource_usage, summarize_resources, process_usage
+
+
+def test_summarize_resources():
+    """Test aggregating usage, skipping unmeasured values."""
+    usages = [
+        resource_usage(wall_seconds=1.0, cpu_seconds=0.5, peak_memory_bytes=100),
+        resource_usage(wall_seconds=3.0, cpu_seconds=1.5, peak_memory_bytes=300, timed_out=True),
+        resource_usage(wall_seconds=2.0, oom_killed=True),
+        None
+    ]
+    
+    summary = summarize_resources(usages)
+    
+    assert summary["measured"] == 3
+    assert summary["wall_seconds"] == {"total": 6.0, "mean": 2.0, "p95": 3.0, "max": 3.0}
+    assert summary["cpu_seconds"]["total"] == 2.0
+    assert summary["peak_memory_bytes"]["max"] == 300
+    assert summary["oom_killed"] == 1
+    assert summary["timed_out"] == 1
+
+
+def test_summarize_nothing():
+    """Test that an empty batch has no statistics."""
+    summary = summarize_resources([])
+    
+    assert summary["measured"] == 0
+    assert summary["cpu_seconds"] is None
+
+
+def test_process_usage():
+    """Test measuring this process."""
+    cpu_seconds, peak_memory_bytes = process_usage()
+    
+    assert cpu_seconds > 0
+    assert peak_memory_bytes > 1024 * 1024
\ No newline at end of file
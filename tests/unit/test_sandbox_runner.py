@@ -0,0 +1,238 @@
+"""
+Unit tests for the namespace sandbox runner.
+"""
+
+import os
+import pwd
+import sys
+import time
+import asyncio
+import shutil
+import subprocess
+
+import pytest
+
+from autograder.runner import BaseRunner, create_runner
+from autograder.sandbox_runner import PACKAGE_ROOT, SandboxRunner
+
+
+CODE = '''
+def divide(a, b):
+    """
+    >>> divide(6, 3)
+    2.0
+    >>> divide(1, 0)
+    Traceback (most recent call last):
+    ZeroDivisionError: division by zero
+    """
+    return a / b
+'''
+
+
+def make_runner(namespaces=None, **kwargs):
+    # Run as the current user so the interpreter and source tree stay readable
+    kwargs.setdefault("timeout", 10)
+    return SandboxRunner(namespaces=namespaces, user="", **kwargs)
+
+
+def can_unshare():
+    """Check whether unprivileged namespaces work on this host."""
+    if not shutil.which("unshare"):
+        return False
+    result = subprocess.run(["unshare", "--user", "--map-root-user", "--net", "true"],
+                            capture_output=True)
+    return result.returncode == 0
+
+
+def can_run_as(user):
+    """Check whether the grader can run the harness as another user."""
+    if os.geteuid() != 0:
+        return False
+    try:
+        pwd.getpwnam(user)
+    except KeyError:
+        return False
+    # The interpreter and the autograder package must be reachable by the user
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", "import autograder"],
+            env={"PYTHONPATH": PACKAGE_ROOT}, cwd="/", user=user, capture_output=True
+        )
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def test_sandbox_grades_submission(tmp_path):
+    """Test grading without namespaces (rlimits only)."""
+    (tmp_path / "functions.py").write_text(CODE)
+    
+    runner = make_runner(namespaces=[])
+    assert isinstance(runner, BaseRunner)
+    results = runner.run_doctest(tmp_path)
+    
+    assert results["success"]
+    assert results["attempted"] == 2
+    assert results["failed"] == 0
+    assert results["passed_tests"] == 1
+    assert results["resources"]["cpu_seconds"] > 0
+    assert results["resources"]["peak_memory_bytes"] > 0
+    assert results["resources"]["wall_seconds"] > 0
+    assert results["resources"]["limits"]["pids_limit"] == runner.pids_limit
+    assert results["resources"]["limits"]["nofile_limit"] == runner.nofile_limit
+
+
+def test_sandbox_open_files_limit(tmp_path):
+    """Test that a submission can't hold more open files than allowed."""
+    (tmp_path / "functions.py").write_text('''
+def open_many():
+    """
+    >>> open_many()
+    'limited'
+    """
+    files = []
+    try:
+        for _ in range(10000):
+            files.append(open(__file__))
+    except OSError:
+        return 'limited'
+    return 'unlimited'
+''')
+    
+    results = make_runner(namespaces=[]).run_doctest(tmp_path)
+    
+    assert results["success"], results
+
+
+def test_sandbox_warm_up():
+    """Test warming up a runner with the canary submission."""
+    report = make_runner(namespaces=[]).warm_up()
+    
+    assert report["ready"], report
+    assert report["backend"] == "sandbox"
+    assert report["canary_seconds"] > 0
+
+
+@pytest.mark.skipif(not can_unshare(), reason="user namespaces unavailable")
+def test_sandbox_has_no_network(tmp_path):
+    """Test that the submission runs without network interfaces."""
+    (tmp_path / "functions.py").write_text(CODE + '''
+import socket
+
+def connect():
+    """
+    >>> connect()
+    'blocked'
+    """
+    try:
+        socket.create_connection(("1.1.1.1", 53), timeout=1)
+    except OSError:
+        return 'blocked'
+    return 'connected'
+''')
+    
+    results = make_runner(namespaces=["user", "net", "mount", "pid"]).run_doctest(tmp_path)
+    
+    assert results["success"], results
+
+
+@pytest.mark.skipif(not can_unshare(), reason="user namespaces unavailable")
+def test_sandbox_filesystem_is_read_only(tmp_path):
+    """Test that the submission can only write to its working directory and /tmp."""
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (tmp_path / "functions.py").write_text(f'''
+import os
+
+def write(path):
+    """
+    >>> write({str(outside / "x")!r})
+    'blocked'
+    >>> write(os.path.expanduser("~/x"))
+    'written'
+    >>> write("/tmp/x")
+    'written'
+    >>> write({PACKAGE_ROOT + "/x"!r})
+    'blocked'
+    """
+    try:
+        with open(path, "w") as f:
+            f.write("x")
+    except OSError:
+        return 'blocked'
+    return 'written'
+''')
+    
+    results = make_runner(namespaces=["user", "net", "mount", "pid"]).run_doctest(tmp_path)
+    
+    assert results["success"], results
+    assert results["failed"] == 0, results
+    assert not (outside / "x").exists()
+
+
+@pytest.mark.skipif(not can_unshare() or not can_run_as("nobody"), reason="needs root, user namespaces and a Python nobody can run")
+def test_sandbox_runs_as_default_user(tmp_path):
+    """Test the isolated sandbox as the unprivileged user a root grader defaults to."""
+    (tmp_path / "functions.py").write_text(CODE + '''
+
+def whoami():
+    """
+    >>> whoami() != 0
+    True
+    """
+    import os
+    return os.getuid()
+''')
+    
+    runner = SandboxRunner(namespaces=["user", "net", "mount", "pid"], timeout=10)
+    assert runner.user == "nobody"
+    results = runner.run_doctest(tmp_path)
+    
+    assert results["success"], results
+    assert results["failed"] == 0, results
+
+
+def test_sandbox_timeout(tmp_path):
+    """Test that a submission that never finishes is killed."""
+    (tmp_path / "functions.py").write_text("while True:\n    pass\n")
+    
+    start = time.perf_counter()
+    results = make_runner(namespaces=[], timeout=1).run_doctest(tmp_path)
+    
+    assert not results["success"]
+    assert "timed out" in results["error"]
+    assert results["resources"]["timed_out"]
+    assert time.perf_counter() - start < 5
+
+
+def test_sandbox_memory_limit(tmp_path):
+    """Test that allocating past the memory limit fails the submission."""
+    (tmp_path / "functions.py").write_text("data = bytearray(512 * 1024 * 1024)\n")
+    
+    results = make_runner(namespaces=[], memory_limit="256m").run_doctest(tmp_path)
+    
+    # The allocation fails, so the module can't be loaded
+    assert results["doctest_results"][0]["status"] == "error"
+    assert results["passed_tests"] == 0
+
+
+def test_sandbox_async(tmp_path):
+    """Test the async API through the shared runner interface."""
+    (tmp_path / "functions.py").write_text(CODE)
+    runner = create_runner("sandbox", namespaces=[], user="", max_concurrency=2)
+    
+    async def grade_all():
+        return await asyncio.gather(*(runner.run_doctest_async(tmp_path) for _ in range(3)))
+    
+    try:
+        results = asyncio.run(grade_all())
+    finally:
+        runner.close()
+    
+    assert all(r["success"] for r in results)
+
+
+def test_create_runner_rejects_unknown_backend():
+    """Test that an unknown backend name is an error."""
+    with pytest.raises(ValueError):
+        create_runner("vm")
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Unit tests for the test runner module.
+"""
+
+import time
+import threading
+
+import pytest
+
+from autograder import test_runner
+from autograder.test_runner import (
+    GradingTimeout,
+    time_limit,
+    grade_submission,
+    has_timeouts,
+    iter_grade_events,
+    results_from_events,
+)
+
+
+HANGING_CODE = '''
+def spin():
+    """
+    >>> spin()
+    >>> 1 + 1
+    2
+    """
+    while True:
+        pass
+
+
+def add(a, b):
+    """
+    >>> add(2, 3)
+    5
+    """
+    return a + b
+'''
+
+
+@pytest.fixture
+def hanging_submission(tmp_path):
+    """Create a submission with one function that never returns."""
+    path = tmp_path / "functions.py"
+    path.write_text(HANGING_CODE)
+    return path
+
+
+def test_example_timeout_continues_grading(hanging_submission):
+    """Test that a hanging example is recorded as a timeout and grading continues."""
+    results = grade_submission(hanging_submission, {"example_timeout": 0.2})
+    by_name = {r["name"]: r for r in results["doctest_results"]}
+    
+    spin = by_name["functions.spin"]
+    assert spin["status"] == "timeout"
+    assert spin["timeouts"] == 1
+    assert spin["failures"] == 1  # the example after the hang still passes
+    assert not spin["success"]
+    
+    assert by_name["functions.add"]["status"] == "passed"
+    assert has_timeouts(results)
+
+
+def test_error_case_timeout(hanging_submission):
+    """Test that a hanging error case is recorded as a timeout."""
+    results = grade_submission(hanging_submission, {
+        "example_timeout": 0.2,
+        "error_cases": {"spin": {"hangs": {"args": []}}}
+    })
+    
+    case = results["error_handling_results"]["spin"]["hangs"]
+    assert case["status"] == "timeout"
+    assert not case["success"]
+
+
+def test_submission_timeout_bounds_total_time(hanging_submission):
+    """Test that the per-submission budget caps total grading time."""
+    start = time.monotonic()
+    results = grade_submission(hanging_submission, {
+        "example_timeout": 10,
+        "submission_timeout": 0.3
+    })
+    
+    assert time.monotonic() - start < 5
+    assert has_timeouts(results)
+
+
+def test_iter_grade_events_matches_grade_submission(tmp_path):
+    """Test that streamed events rebuild the same results as grade_submission."""
+    path = tmp_path / "functions.py"
+    path.write_text(HANGING_CODE.replace("while True:\n        pass", "return None"))
+    config = {
+        "required_functions": ["add", "spin"],
+        "error_cases": {"add": {"bad_type": {"args": [1, "a"], "exception": TypeError}}}
+    }
+    
+    events = list(iter_grade_events(path, config))
+    
+    assert [e["event"] for e in events] == [
+        "load", "functions", "doctest", "doctest", "error_case", "score"
+    ]
+    assert events[4]["function"] == "add" and events[4]["success"]
+    assert results_from_events(events) == grade_submission(path, config)
+
+
+def test_iter_grade_events_missing_file(tmp_path):
+    """Test that an ungradable submission produces a single error event."""
+    events = list(iter_grade_events(tmp_path / "missing.py"))
+    
+    assert len(events) == 1
+    assert events[0]["event"] == "error"
+    assert results_from_events(events)["score"] == 0
+
+
+def test_time_limit_interrupts_again_after_a_swallowed_timeout():
+    """Test that student code catching the first interrupt is interrupted again."""
+    def stubborn():
+        try:
+            while True:
+                pass
+        except BaseException:
+            pass
+        end = time.monotonic() + 5
+        while time.monotonic() < end:
+            pass
+    
+    start = time.monotonic()
+    with pytest.raises(GradingTimeout):
+        with time_limit(0.1):
+            stubborn()
+    assert time.monotonic() - start < 2
+
+
+def test_time_limit_off_the_main_thread_warns(monkeypatch, caplog):
+    """Test that a block run where SIGALRM can't reach it is logged, not silently unlimited."""
+    monkeypatch.setattr(test_runner, "_warned_no_alarm", False)
+    ran = []
+    
+    def run():
+        with time_limit(0.1):
+            ran.append(True)
+    thread = threading.Thread(target=run, name="grader-test")
+    thread.start()
+    thread.join()
+    
+    assert ran == [True]
+    assert "grader-test" in caplog.text
+    assert "process timeout" in caplog.text
\ No newline at end of file
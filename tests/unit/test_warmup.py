@@ -0,0 +1,76 @@
+"""
+Unit tests for the warmup module.
+"""
+
+from autograder.test_runner import grade_submission
+from autograder import warmup
+from autograder.warmup import Readiness, warm_up
+
+
+def test_warm_up_grades_canary():
+    """Test that the canary submission passes with the in-process grader."""
+    report = warm_up(grade_submission)
+    
+    assert report["ready"]
+    assert report["canary_seconds"] > 0
+    assert "error" not in report
+
+
+def test_warm_up_reports_failure():
+    """Test that a grader that fails or raises leaves the service not ready."""
+    report = warm_up(lambda path: {"success": False, "error": "image not found"})
+    assert not report["ready"]
+    assert report["error"] == "image not found"
+    
+    def broken(path):
+        raise RuntimeError("daemon unreachable")
+    
+    assert warm_up(broken)["error"] == "daemon unreachable"
+
+
+def test_readiness_states():
+    """Test that readiness only turns ready after a successful warm-up."""
+    readiness = Readiness()
+    assert readiness.get_state() == {"status": "starting"}
+    
+    seen = []
+    
+    def warm():
+        seen.append(readiness.get_state()["status"])
+        return {"ready": True, "canary_seconds": 0.5}
+    
+    readiness.start(warm).join()
+    
+    assert seen == ["warming"]
+    assert readiness.ready
+    assert readiness.get_state()["warmup"]["canary_seconds"] == 0.5
+    
+    readiness.run(lambda: {"ready": False, "error": "boom"})
+    assert not readiness.ready
+    assert readiness.get_state()["status"] == "failed"
+
+
+def test_failed_warm_up_is_retried_with_backoff(monkeypatch):
+    """Test that a failed warm-up becomes due again after a growing cooldown."""
+    clock = [0.0]
+    monkeypatch.setattr(warmup.time, "monotonic", lambda: clock[0])
+    readiness = Readiness(retry_delay=10, max_retry_delay=25)
+    assert readiness.due()
+    
+    readiness.start(lambda: {"ready": False, "error": "daemon down"}).join()
+    
+    assert readiness.get_state()["retry_in"] == 10
+    assert not readiness.due()
+    clock[0] = 10
+    assert readiness.due()
+    
+    readiness.run(lambda: {"ready": False, "error": "daemon down"})
+    assert readiness.get_state()["failures"] == 2
+    assert readiness.get_state()["retry_in"] == 20
+    readiness.run(lambda: {"ready": False, "error": "daemon down"})
+    assert readiness.get_state()["retry_in"] == 25
+    
+    readiness.run(lambda: {"ready": True})
+    assert readiness.ready
+    assert not readiness.due()
+    assert readiness.failures == 0
\ No newline at end of file